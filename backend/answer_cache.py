@@ -0,0 +1,175 @@
+import os
+import time
+import hashlib
+import threading
+
+from backend import runtime
+from backend.cache_payload import encode_payload, decode_payload
+from backend.local_cache import LocalLRUCache
+
+# ----------------------------
+# Answer cache keys
+# ----------------------------
+# Keys are namespaced by bot type and a hash of the bot's prompt, and carry
+# the knowledge base version. Ingestion bumps the version, so answers built
+# from an older knowledge base are never served again and simply expire.
+#
+#   answer:<bot type>:<prompt hash>:v<kb version>:<question hash>
+#
+# Lookups go through a small in-process LRU (L1) before Redis (L2). When
+# the version is bumped, an invalidation message is published so every
+# worker switches to the new version and drops its L1 right away.
+
+ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", "86400"))
+KB_VERSION_KEY = "kb:version"
+# How long a worker trusts its last read of the knowledge base version.
+KB_VERSION_REFRESH_SECONDS = float(os.getenv("KB_VERSION_REFRESH_SECONDS", "5"))
+INVALIDATION_CHANNEL = "answer_cache:invalidate"
+
+L1_CACHE_MAX_ENTRIES = int(os.getenv("L1_CACHE_MAX_ENTRIES", "1024"))
+L1_CACHE_MAX_BYTES = int(os.getenv("L1_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+L1_CACHE_TTL = float(os.getenv("L1_CACHE_TTL", "300"))
+
+local_cache = LocalLRUCache(max_entries=L1_CACHE_MAX_ENTRIES, max_bytes=L1_CACHE_MAX_BYTES, ttl=L1_CACHE_TTL)
+redis_stats = {"hits": 0, "misses": 0}
+
+_version_lock = threading.Lock()
+_kb_version = 0
+_kb_version_read_at = 0.0
+_listener_started = False
+
+
+def _hash(text: str, length: int = 16) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:length]
+
+
+def prompt_hash(prompt: str) -> str:
+    return _hash(prompt, 12)
+
+
+def get_cache_stats() -> dict:
+    """Hit/miss counters for the in-process (l1) and Redis (redis) tiers."""
+    return {"l1": local_cache.stats(), "redis": dict(redis_stats)}
+
+
+def _handle_invalidation(message):
+    global _kb_version, _kb_version_read_at
+    try:
+        version = int(message["data"])
+    except (TypeError, ValueError):
+        return
+    with _version_lock:
+        _kb_version = max(_kb_version, version)
+        _kb_version_read_at = time.monotonic()
+    local_cache.clear()
+
+
+def _handle_listener_error(error, pubsub, thread):
+    print(f"Answer cache invalidation listener error: {error}")
+    time.sleep(1)
+
+
+def start_invalidation_listener():
+    """Subscribe this worker to knowledge base invalidation messages (once)."""
+    global _listener_started
+    if _listener_started:
+        return
+    cache = runtime.get_redis()
+    with _version_lock:
+        if _listener_started or not cache:
+            return
+        _listener_started = True
+    try:
+        pubsub = cache.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{INVALIDATION_CHANNEL: _handle_invalidation})
+        pubsub.run_in_thread(sleep_time=1.0, daemon=True, exception_handler=_handle_listener_error)
+    except Exception as e:
+        print(f"Answer cache invalidation listener failed to start: {e}")
+
+
+def get_kb_version() -> int:
+    """Return the current knowledge base version (0 when Redis is unavailable)."""
+    global _kb_version, _kb_version_read_at
+    cache = runtime.get_redis()
+    if not cache:
+        return _kb_version
+
+    with _version_lock:
+        if time.monotonic() - _kb_version_read_at < KB_VERSION_REFRESH_SECONDS:
+            return _kb_version
+        try:
+            _kb_version = int(cache.get(KB_VERSION_KEY) or 0)
+            _kb_version_read_at = time.monotonic()
+        except Exception as e:
+            print(f"Knowledge base version read error: {e}")
+        return _kb_version
+
+
+def bump_kb_version() -> int:
+    """Invalidate every cached answer by moving to a new knowledge base version."""
+    global _kb_version, _kb_version_read_at
+    cache = runtime.get_redis()
+    local_cache.clear()
+    with _version_lock:
+        if cache:
+            try:
+                _kb_version = int(cache.incr(KB_VERSION_KEY))
+                _kb_version_read_at = time.monotonic()
+                cache.publish(INVALIDATION_CHANNEL, _kb_version)
+                return _kb_version
+            except Exception as e:
+                print(f"Knowledge base version update error: {e}")
+        _kb_version += 1
+        return _kb_version
+
+
+class AnswerCache:
+    """Two-tier (in-process LRU, then Redis) cache of answers for one bot and prompt."""
+
+    def __init__(self, namespace: str, prompt: str, ttl: int = None):
+        self.namespace = namespace.strip().lower().replace(" ", "_")
+        self.prompt_hash = prompt_hash(prompt)
+        self.ttl = ANSWER_CACHE_TTL if ttl is None else ttl
+
+    @property
+    def scope(self) -> str:
+        """Bot, prompt and knowledge base version the cached answers belong to."""
+        return f"{self.namespace}:{self.prompt_hash}:v{get_kb_version()}"
+
+    def key(self, question: str) -> str:
+        return f"answer:{self.scope}:{_hash(question, 32)}"
+
+    def get(self, question: str):
+        start_invalidation_listener()
+        key = self.key(question)
+        cached = local_cache.get(key)
+        if cached is not None:
+            return cached
+
+        cache = runtime.get_redis()
+        if not cache:
+            return None
+        try:
+            payload = cache.get(key)
+            cached = decode_payload(payload) if payload else None
+            if cached:
+                redis_stats["hits"] += 1
+                local_cache.set(key, cached, size=len(payload))
+                return cached
+            redis_stats["misses"] += 1
+        except Exception as e:
+            print(f"Cache retrieval error: {e}")
+        return None
+
+    def set(self, question: str, result: dict):
+        key = self.key(question)
+        payload = encode_payload(result)
+        local_cache.set(key, decode_payload(payload), size=len(payload))
+
+        cache = runtime.get_redis()
+        if not cache:
+            return
+        try:
+            cache.set(key, payload, ex=self.ttl)
+        except Exception as e:
+            print(f"Cache storage error: {e}")
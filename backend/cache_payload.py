@@ -0,0 +1,73 @@
+import json
+import time
+import zlib
+from typing import Optional
+
+# ----------------------------
+# Cached answer payload format
+# ----------------------------
+# Only the answer text is ever read back from the cache, so instead of
+# pickling the whole retrieval chain result (input plus every retrieved
+# Document) we store a small versioned JSON record:
+#
+#   {"v": 1, "answer": "...", "sources": ["doc-id", ...], "ts": 1700000000.0}
+#
+# The first byte tells how the rest is encoded: b"j" for plain JSON and
+# b"z" for zlib-compressed JSON (used once the record is large enough to
+# benefit). Anything else, including old pickled entries, is treated as a
+# cache miss, so nothing from Redis is ever unpickled.
+
+PAYLOAD_VERSION = 1
+COMPRESS_MIN_BYTES = 512
+
+PLAIN_PREFIX = b"j"
+COMPRESSED_PREFIX = b"z"
+
+
+def source_ids(result: dict) -> list:
+    """Return the ids of the documents a retrieval chain result was built from."""
+    ids = []
+    for doc in result.get("context") or []:
+        metadata = getattr(doc, "metadata", None) or {}
+        doc_id = getattr(doc, "id", None) or metadata.get("doc_id") or metadata.get("source")
+        if doc_id and doc_id not in ids:
+            ids.append(str(doc_id))
+    return ids
+
+
+def encode_payload(result: dict) -> bytes:
+    record = {
+        "v": PAYLOAD_VERSION,
+        "answer": result["answer"],
+        "sources": result.get("sources") or source_ids(result),
+        "ts": result.get("created_at") or time.time(),
+    }
+    data = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if len(data) >= COMPRESS_MIN_BYTES:
+        return COMPRESSED_PREFIX + zlib.compress(data)
+    return PLAIN_PREFIX + data
+
+
+def decode_payload(payload: bytes) -> Optional[dict]:
+    """Decode a cached payload, returning None for anything unrecognised."""
+    if not payload:
+        return None
+
+    prefix, data = payload[:1], payload[1:]
+    try:
+        if prefix == COMPRESSED_PREFIX:
+            data = zlib.decompress(data)
+        elif prefix != PLAIN_PREFIX:
+            return None
+        record = json.loads(data.decode("utf-8"))
+    except (zlib.error, UnicodeDecodeError, ValueError):
+        return None
+
+    if not isinstance(record, dict) or record.get("v") != PAYLOAD_VERSION:
+        return None
+
+    return {
+        "answer": record["answer"],
+        "sources": record.get("sources", []),
+        "created_at": record.get("ts"),
+    }
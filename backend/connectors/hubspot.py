@@ -2,6 +2,8 @@ import re
 from datetime import datetime
 from datetime import timezone
 from typing import Any
+from typing import Iterable
+from typing import Iterator
 from typing import cast
 
 import requests
@@ -26,6 +28,32 @@ HUBSPOT_API_URL = "https://api.hubapi.com/integrations/v1/me"
 # Available HubSpot object types
 AVAILABLE_OBJECT_TYPES = {"tickets", "companies", "deals", "contacts"}
 
+# Property holding each object type's last modification time; incremental
+# fetches filter and sort on it through the CRM search API
+LAST_MODIFIED_PROPERTIES = {
+    "tickets": "hs_lastmodifieddate",
+    "companies": "hs_lastmodifieddate",
+    "deals": "hs_lastmodifieddate",
+    "contacts": "lastmodifieddate",
+}
+SEARCH_PAGE_SIZE = 100
+# The search API pages through at most this many results of one query
+SEARCH_RESULT_LIMIT = 10000
+
+# Associated objects are looked up for a page of parent objects at a time
+# with the batch APIs; these are the most ids one call accepts
+ASSOCIATION_BATCH_LIMIT = 1000
+BATCH_READ_LIMIT = 100
+
+# Properties read for objects shown as sections of the object they belong to
+ASSOCIATED_OBJECT_PROPERTIES = {
+    "contacts": ["firstname", "lastname", "email", "company", "jobtitle"],
+    "companies": ["name", "domain", "industry", "city", "state"],
+    "deals": ["dealname", "amount", "dealstage", "closedate", "pipeline"],
+    "tickets": ["subject", "content", "hs_ticket_priority"],
+    "notes": ["hs_note_body", "hs_timestamp", "hs_created_by", "hubspot_owner_id"],
+}
+
 logger = logging.getLogger(__name__)
 
 
@@ -142,137 +170,213 @@ class HubSpotConnector(LoadConnector, PollConnector):
         else:
             return f"{HUBSPOT_BASE_URL}/contacts/{self.portal_id}/{object_type}/{object_id}"
 
-    def _get_associated_objects(
+    def _fetch_objects(
         self,
         api_client: HubSpot,
-        object_id: str,
-        from_object_type: str,
-        to_object_type: str,
-    ) -> list[dict[str, Any]]:
-        """Get associated objects for a given object"""
-        try:
-            associations = api_client.crm.associations.v4.basic_api.get_page(
-                object_type=from_object_type,
-                object_id=object_id,
-                to_object_type=to_object_type,
+        object_type: str,
+        properties: list[str],
+        associations: list[str],
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> Iterator[Any]:
+        """Fetch every object, or only those modified between start and end"""
+        if start is None and end is None:
+            return getattr(api_client.crm, object_type).get_all(
+                properties=properties,
+                associations=associations,
             )
+        return self._search_objects(api_client, object_type, properties, start, end)
 
-            associated_objects = []
-            if associations.results:
-                object_ids = [assoc.to_object_id for assoc in associations.results]
-
-                # Batch get the associated objects
-                if to_object_type == "contacts":
-                    for obj_id in object_ids:
-                        try:
-                            obj = api_client.crm.contacts.basic_api.get_by_id(
-                                contact_id=obj_id,
-                                properties=[
-                                    "firstname",
-                                    "lastname",
-                                    "email",
-                                    "company",
-                                    "jobtitle",
-                                ],
-                            )
-                            associated_objects.append(obj.to_dict())
-                        except Exception as e:
-                            logger.warning(f"Failed to fetch contact {obj_id}: {e}")
-
-                elif to_object_type == "companies":
-                    for obj_id in object_ids:
-                        try:
-                            obj = api_client.crm.companies.basic_api.get_by_id(
-                                company_id=obj_id,
-                                properties=[
-                                    "name",
-                                    "domain",
-                                    "industry",
-                                    "city",
-                                    "state",
-                                ],
-                            )
-                            associated_objects.append(obj.to_dict())
-                        except Exception as e:
-                            logger.warning(f"Failed to fetch company {obj_id}: {e}")
-
-                elif to_object_type == "deals":
-                    for obj_id in object_ids:
-                        try:
-                            obj = api_client.crm.deals.basic_api.get_by_id(
-                                deal_id=obj_id,
-                                properties=[
-                                    "dealname",
-                                    "amount",
-                                    "dealstage",
-                                    "closedate",
-                                    "pipeline",
-                                ],
-                            )
-                            associated_objects.append(obj.to_dict())
-                        except Exception as e:
-                            logger.warning(f"Failed to fetch deal {obj_id}: {e}")
-
-                elif to_object_type == "tickets":
-                    for obj_id in object_ids:
-                        try:
-                            obj = api_client.crm.tickets.basic_api.get_by_id(
-                                ticket_id=obj_id,
-                                properties=["subject", "content", "hs_ticket_priority"],
-                            )
-                            associated_objects.append(obj.to_dict())
-                        except Exception as e:
-                            logger.warning(f"Failed to fetch ticket {obj_id}: {e}")
-
-            return associated_objects
+    def _search_objects(
+        self,
+        api_client: HubSpot,
+        object_type: str,
+        properties: list[str],
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> Iterator[Any]:
+        """Yield the objects modified between start and end, oldest first"""
+        search_api = getattr(api_client.crm, object_type).search_api
+        modified_property = LAST_MODIFIED_PROPERTIES[object_type]
+        lower = start
+        # Objects already yielded with the modification time of `lower`
+        seen_at_lower: set[str] = set()
+
+        while True:
+            filters = []
+            if lower is not None:
+                filters.append({
+                    "propertyName": modified_property,
+                    "operator": "GTE",
+                    "value": str(int(lower.timestamp() * 1000)),
+                })
+            if end is not None:
+                filters.append({
+                    "propertyName": modified_property,
+                    "operator": "LTE",
+                    "value": str(int(end.timestamp() * 1000)),
+                })
+
+            last_modified = None
+            last_ids: set[str] = set()
+            after = None
+            while True:
+                request: dict[str, Any] = {
+                    "filterGroups": [{"filters": filters}] if filters else [],
+                    "sorts": [{"propertyName": modified_property, "direction": "ASCENDING"}],
+                    "properties": properties,
+                    "limit": SEARCH_PAGE_SIZE,
+                }
+                if after is not None:
+                    request["after"] = after
+                page = search_api.do_search(public_object_search_request=request)
+
+                for obj in page.results:
+                    if obj.id in seen_at_lower:
+                        continue
+                    if obj.updated_at != last_modified:
+                        last_modified = obj.updated_at
+                        last_ids = set()
+                    last_ids.add(obj.id)
+                    yield obj
+
+                after = page.paging.next.after if page.paging and page.paging.next else None
+                if after is None:
+                    return
+                if int(after) + SEARCH_PAGE_SIZE > SEARCH_RESULT_LIMIT:
+                    break
+
+            # Past the search limit: search again from the last modification time seen
+            if last_modified is None or (lower is not None and last_modified <= lower):
+                logger.warning(
+                    f"More than {SEARCH_RESULT_LIMIT} {object_type} share one modification time; "
+                    "some of them were skipped"
+                )
+                return
+            lower = last_modified
+            seen_at_lower = last_ids
 
-        except Exception as e:
-            logger.warning(
-                f"Failed to get associations from {from_object_type} to {to_object_type}: {e}"
+    def _with_associations(
+        self,
+        api_client: HubSpot,
+        objects: Iterable[Any],
+        object_type: str,
+        to_object_types: list[str],
+    ) -> Iterator[tuple[Any, dict[str, list[dict[str, Any]]]]]:
+        """Yield each object with its associated objects (and notes), looked up a page of objects at a time"""
+        page: list[Any] = []
+        for obj in objects:
+            page.append(obj)
+            if len(page) >= self.batch_size:
+                yield from self._attach_associations(api_client, page, object_type, to_object_types)
+                page = []
+        if page:
+            yield from self._attach_associations(api_client, page, object_type, to_object_types)
+
+    def _attach_associations(
+        self,
+        api_client: HubSpot,
+        objects: list[Any],
+        object_type: str,
+        to_object_types: list[str],
+    ) -> Iterator[tuple[Any, dict[str, list[dict[str, Any]]]]]:
+        object_ids = [str(obj.id) for obj in objects]
+        associated = {
+            to_object_type: self._get_associated_objects(
+                api_client, object_ids, object_type, to_object_type
             )
-            return []
+            for to_object_type in [*to_object_types, "notes"]
+        }
+        for obj in objects:
+            yield obj, {
+                to_object_type: by_object.get(str(obj.id), [])
+                for to_object_type, by_object in associated.items()
+            }
 
-    def _get_associated_notes(
+    def _get_association_ids(
+        self,
+        api_client: HubSpot,
+        object_ids: list[str],
+        from_object_type: str,
+        to_object_type: str,
+    ) -> dict[str, list[str]]:
+        """Get the ids of the objects associated with each of the given objects"""
+        association_ids: dict[str, list[str]] = {}
+        for i in range(0, len(object_ids), ASSOCIATION_BATCH_LIMIT):
+            inputs = [{"id": object_id} for object_id in object_ids[i : i + ASSOCIATION_BATCH_LIMIT]]
+            while inputs:
+                response = api_client.crm.associations.v4.batch_api.get_page(
+                    from_object_type=from_object_type,
+                    to_object_type=to_object_type,
+                    batch_input_public_fetch_associations_batch_request={"inputs": inputs},
+                )
+                inputs = []
+                for result in response.results or []:
+                    from_id = str(result._from.id)
+                    association_ids.setdefault(from_id, []).extend(
+                        str(assoc.to_object_id) for assoc in result.to or []
+                    )
+                    # Objects with many associations are paged
+                    if result.paging and result.paging.next:
+                        inputs.append({"id": from_id, "after": result.paging.next.after})
+        return association_ids
+
+    def _batch_read_objects(
         self,
         api_client: HubSpot,
-        object_id: str,
         object_type: str,
-    ) -> list[dict[str, Any]]:
-        """Get notes associated with a given object"""
+        object_ids: list[str],
+    ) -> dict[str, dict[str, Any]]:
+        """Read objects by id, BATCH_READ_LIMIT per request"""
+        if object_type == "notes":
+            batch_api = api_client.crm.objects.notes.batch_api
+        else:
+            batch_api = getattr(api_client.crm, object_type).batch_api
+
+        objects: dict[str, dict[str, Any]] = {}
+        for i in range(0, len(object_ids), BATCH_READ_LIMIT):
+            batch_ids = object_ids[i : i + BATCH_READ_LIMIT]
+            try:
+                response = batch_api.read(
+                    batch_read_input_simple_public_object_id={
+                        "inputs": [{"id": object_id} for object_id in batch_ids],
+                        "properties": ASSOCIATED_OBJECT_PROPERTIES[object_type],
+                    }
+                )
+            except Exception as e:
+                logger.warning(f"Failed to fetch {len(batch_ids)} {object_type}: {e}")
+                continue
+            for obj in response.results or []:
+                objects[str(obj.id)] = obj.to_dict()
+        return objects
+
+    def _get_associated_objects(
+        self,
+        api_client: HubSpot,
+        object_ids: list[str],
+        from_object_type: str,
+        to_object_type: str,
+    ) -> dict[str, list[dict[str, Any]]]:
+        """Get the associated objects of a page of objects, keyed by object id"""
         try:
-            # Get associations to notes (engagement type)
-            associations = api_client.crm.associations.v4.basic_api.get_page(
-                object_type=object_type,
-                object_id=object_id,
-                to_object_type="notes",
+            association_ids = self._get_association_ids(
+                api_client, object_ids, from_object_type, to_object_type
             )
-
-            associated_notes = []
-            if associations.results:
-                note_ids = [assoc.to_object_id for assoc in associations.results]
-
-                # Batch get the associated notes
-                for note_id in note_ids:
-                    try:
-                        # Notes are engagements in HubSpot, use the engagements API
-                        note = api_client.crm.objects.notes.basic_api.get_by_id(
-                            note_id=note_id,
-                            properties=[
-                                "hs_note_body",
-                                "hs_timestamp",
-                                "hs_created_by",
-                                "hubspot_owner_id",
-                            ],
-                        )
-                        associated_notes.append(note.to_dict())
-                    except Exception as e:
-                        logger.warning(f"Failed to fetch note {note_id}: {e}")
-
-            return associated_notes
-
         except Exception as e:
-            logger.warning(f"Failed to get notes for {object_type} {object_id}: {e}")
-            return []
+            logger.warning(
+                f"Failed to get associations from {from_object_type} to {to_object_type}: {e}"
+            )
+            return {}
+
+        # Objects shared by several parents are read once
+        unique_ids = list(dict.fromkeys(
+            to_id for to_ids in association_ids.values() for to_id in to_ids
+        ))
+        objects = self._batch_read_objects(api_client, to_object_type, unique_ids)
+        return {
+            object_id: [objects[to_id] for to_id in to_ids if to_id in objects]
+            for object_id, to_ids in association_ids.items()
+        }
 
     def _create_object_section(
         self,
@@ -363,7 +467,9 @@ class HubSpotConnector(LoadConnector, PollConnector):
         end: datetime | None = None,
     ) -> GenerateDocumentsOutput:
         api_client = HubSpot(access_token=self.access_token)
-        all_tickets = api_client.crm.tickets.get_all(
+        all_tickets = self._fetch_objects(
+            api_client,
+            "tickets",
             properties=[
                 "subject",
                 "content",
@@ -372,17 +478,15 @@ class HubSpotConnector(LoadConnector, PollConnector):
                 "hs_lastmodifieddate",
             ],
             associations=["contacts", "companies", "deals"],
+            start=start,
+            end=end,
         )
 
         doc_batch: list[Document] = []
 
-        for ticket in all_tickets:
-            updated_at = ticket.updated_at.replace(tzinfo=None)
-            if start is not None and updated_at < start.replace(tzinfo=None):
-                continue
-            if end is not None and updated_at > end.replace(tzinfo=None):
-                continue
-
+        for ticket, associated in self._with_associations(
+            api_client, all_tickets, "tickets", ["contacts", "companies", "deals"]
+        ):
             title = ticket.properties.get("subject") or f"Ticket {ticket.id}"
             link = self._get_object_url("tickets", ticket.id)
             content_text = ticket.properties.get("content", "")
@@ -404,33 +508,25 @@ class HubSpotConnector(LoadConnector, PollConnector):
             associated_deal_ids = []
 
             # Get associated contacts
-            associated_contacts = self._get_associated_objects(
-                api_client, ticket.id, "tickets", "contacts"
-            )
+            associated_contacts = associated["contacts"]
             for contact in associated_contacts:
                 sections.append(self._create_object_section(contact, "contacts"))
                 associated_contact_ids.append(contact["id"])
 
             # Get associated companies
-            associated_companies = self._get_associated_objects(
-                api_client, ticket.id, "tickets", "companies"
-            )
+            associated_companies = associated["companies"]
             for company in associated_companies:
                 sections.append(self._create_object_section(company, "companies"))
                 associated_company_ids.append(company["id"])
 
             # Get associated deals
-            associated_deals = self._get_associated_objects(
-                api_client, ticket.id, "tickets", "deals"
-            )
+            associated_deals = associated["deals"]
             for deal in associated_deals:
                 sections.append(self._create_object_section(deal, "deals")),
                 associated_deal_ids.append(deal["id"])
 
             # Get associated notes
-            associated_notes = self._get_associated_notes(
-                api_client, ticket.id, "tickets"
-            )
+            associated_notes = associated["notes"]
             for note in associated_notes:
                 sections.append(self._create_object_section(note, "notes")),
 
@@ -466,7 +562,9 @@ class HubSpotConnector(LoadConnector, PollConnector):
         end: datetime | None = None,
     ) -> GenerateDocumentsOutput:
         api_client = HubSpot(access_token=self.access_token)
-        all_companies = api_client.crm.companies.get_all(
+        all_companies = self._fetch_objects(
+            api_client,
+            "companies",
             properties=[
                 "name",
                 "domain",
@@ -478,17 +576,15 @@ class HubSpotConnector(LoadConnector, PollConnector):
                 "hs_lastmodifieddate",
             ],
             associations=["contacts", "deals", "tickets"],
+            start=start,
+            end=end,
         )
 
         doc_batch: list[Document] = []
 
-        for company in all_companies:
-            updated_at = company.updated_at.replace(tzinfo=None)
-            if start is not None and updated_at < start.replace(tzinfo=None):
-                continue
-            if end is not None and updated_at > end.replace(tzinfo=None):
-                continue
-
+        for company, associated in self._with_associations(
+            api_client, all_companies, "companies", ["contacts", "deals", "tickets"]
+        ):
             title = company.properties.get("name") or f"Company {company.id}"
             link = self._get_object_url("companies", company.id)
 
@@ -529,33 +625,25 @@ class HubSpotConnector(LoadConnector, PollConnector):
             associated_ticket_ids = []
 
             # Get associated contacts
-            associated_contacts = self._get_associated_objects(
-                api_client, company.id, "companies", "contacts"
-            )
+            associated_contacts = associated["contacts"]
             for contact in associated_contacts:
                 sections.append(self._create_object_section(contact, "contacts")),
                 associated_contact_ids.append(contact["id"])
 
             # Get associated deals
-            associated_deals = self._get_associated_objects(
-                api_client, company.id, "companies", "deals"
-            )
+            associated_deals = associated["deals"]
             for deal in associated_deals:
                 sections.append(self._create_object_section(deal, "deals")),
                 associated_deal_ids.append(deal["id"])
 
             # Get associated tickets
-            associated_tickets = self._get_associated_objects(
-                api_client, company.id, "companies", "tickets"
-            )
+            associated_tickets = associated["tickets"]
             for ticket in associated_tickets:
                 sections.append(self._create_object_section(ticket, "tickets")),
                 associated_ticket_ids.append(ticket["id"])
 
             # Get associated notes
-            associated_notes = self._get_associated_notes(
-                api_client, company.id, "companies"
-            )
+            associated_notes = associated["notes"]
             for note in associated_notes:
                 sections.append(self._create_object_section(note, "notes")),
 
@@ -591,7 +679,9 @@ class HubSpotConnector(LoadConnector, PollConnector):
         end: datetime | None = None,
     ) -> GenerateDocumentsOutput:
         api_client = HubSpot(access_token=self.access_token)
-        all_deals = api_client.crm.deals.get_all(
+        all_deals = self._fetch_objects(
+            api_client,
+            "deals",
             properties=[
                 "dealname",
                 "amount",
@@ -603,17 +693,15 @@ class HubSpotConnector(LoadConnector, PollConnector):
                 "hs_lastmodifieddate",
             ],
             associations=["contacts", "companies", "tickets"],
+            start=start,
+            end=end,
         )
 
         doc_batch: list[Document] = []
 
-        for deal in all_deals:
-            updated_at = deal.updated_at.replace(tzinfo=None)
-            if start is not None and updated_at < start.replace(tzinfo=None):
-                continue
-            if end is not None and updated_at > end.replace(tzinfo=None):
-                continue
-
+        for deal, associated in self._with_associations(
+            api_client, all_deals, "deals", ["contacts", "companies", "tickets"]
+        ):
             title = deal.properties.get("dealname") or f"Deal {deal.id}"
             link = self._get_object_url("deals", deal.id)
 
@@ -654,31 +742,25 @@ class HubSpotConnector(LoadConnector, PollConnector):
             associated_ticket_ids = []
 
             # Get associated contacts
-            associated_contacts = self._get_associated_objects(
-                api_client, deal.id, "deals", "contacts"
-            )
+            associated_contacts = associated["contacts"]
             for contact in associated_contacts:
                 sections.append(self._create_object_section(contact, "contacts")),
                 associated_contact_ids.append(contact["id"])
 
             # Get associated companies
-            associated_companies = self._get_associated_objects(
-                api_client, deal.id, "deals", "companies"
-            )
+            associated_companies = associated["companies"]
             for company in associated_companies:
                 sections.append(self._create_object_section(company, "companies")),
                 associated_company_ids.append(company["id"])
 
             # Get associated tickets
-            associated_tickets = self._get_associated_objects(
-                api_client, deal.id, "deals", "tickets"
-            )
+            associated_tickets = associated["tickets"]
             for ticket in associated_tickets:
                 sections.append(self._create_object_section(ticket, "tickets")),
                 associated_ticket_ids.append(ticket["id"])
 
             # Get associated notes
-            associated_notes = self._get_associated_notes(api_client, deal.id, "deals")
+            associated_notes = associated["notes"]
             for note in associated_notes:
                 sections.append(self._create_object_section(note, "notes")),
 
@@ -714,7 +796,9 @@ class HubSpotConnector(LoadConnector, PollConnector):
         end: datetime | None = None,
     ) -> GenerateDocumentsOutput:
         api_client = HubSpot(access_token=self.access_token)
-        all_contacts = api_client.crm.contacts.get_all(
+        all_contacts = self._fetch_objects(
+            api_client,
+            "contacts",
             properties=[
                 "firstname",
                 "lastname",
@@ -728,17 +812,15 @@ class HubSpotConnector(LoadConnector, PollConnector):
                 "lastmodifieddate",
             ],
             associations=["companies", "deals", "tickets"],
+            start=start,
+            end=end,
         )
 
         doc_batch: list[Document] = []
 
-        for contact in all_contacts:
-            updated_at = contact.updated_at.replace(tzinfo=None)
-            if start is not None and updated_at < start.replace(tzinfo=None):
-                continue
-            if end is not None and updated_at > end.replace(tzinfo=None):
-                continue
-
+        for contact, associated in self._with_associations(
+            api_client, all_contacts, "contacts", ["companies", "deals", "tickets"]
+        ):
             # Build contact name
             name_parts = []
             if contact.properties.get("firstname"):
@@ -795,33 +877,25 @@ class HubSpotConnector(LoadConnector, PollConnector):
             associated_ticket_ids = []
 
             # Get associated companies
-            associated_companies = self._get_associated_objects(
-                api_client, contact.id, "contacts", "companies"
-            )
+            associated_companies = associated["companies"]
             for company in associated_companies:
                 sections.append(self._create_object_section(company, "companies")),
                 associated_company_ids.append(company["id"])
 
             # Get associated deals
-            associated_deals = self._get_associated_objects(
-                api_client, contact.id, "contacts", "deals"
-            )
+            associated_deals = associated["deals"]
             for deal in associated_deals:
                 sections.append(self._create_object_section(deal, "deals")),
                 associated_deal_ids.append(deal["id"])
 
             # Get associated tickets
-            associated_tickets = self._get_associated_objects(
-                api_client, contact.id, "contacts", "tickets"
-            )
+            associated_tickets = associated["tickets"]
             for ticket in associated_tickets:
                 sections.append(self._create_object_section(ticket, "tickets")),
                 associated_ticket_ids.append(ticket["id"])
 
             # Get associated notes
-            associated_notes = self._get_associated_notes(
-                api_client, contact.id, "contacts"
-            )
+            associated_notes = associated["notes"]
             for note in associated_notes:
                 sections.append(self._create_object_section(note, "notes")),
 
@@ -863,23 +937,36 @@ class HubSpotConnector(LoadConnector, PollConnector):
         if "contacts" in self.object_types:
             yield from self._process_contacts()
 
-    def poll_source(
+    def poll_object_type(
         self,
+        object_type: str,
         start: SecondsSinceUnixEpoch,
         end: SecondsSinceUnixEpoch,
     ) -> GenerateDocumentsOutput:
+        """Load the objects of one type modified between start and end, oldest first"""
+        processors = {
+            "tickets": self._process_tickets,
+            "companies": self._process_companies,
+            "deals": self._process_deals,
+            "contacts": self._process_contacts,
+        }
+        if object_type not in processors:
+            raise ValueError(
+                f"Invalid object type: {object_type}. Available types: {AVAILABLE_OBJECT_TYPES}"
+            )
         start_datetime = datetime.fromtimestamp(start, tz=timezone.utc)
         end_datetime = datetime.fromtimestamp(end, tz=timezone.utc)
+        yield from processors[object_type](start_datetime, end_datetime)
 
+    def poll_source(
+        self,
+        start: SecondsSinceUnixEpoch,
+        end: SecondsSinceUnixEpoch,
+    ) -> GenerateDocumentsOutput:
         # Process each object type with time filtering based on configuration
-        if "tickets" in self.object_types:
-            yield from self._process_tickets(start_datetime, end_datetime)
-        if "companies" in self.object_types:
-            yield from self._process_companies(start_datetime, end_datetime)
-        if "deals" in self.object_types:
-            yield from self._process_deals(start_datetime, end_datetime)
-        if "contacts" in self.object_types:
-            yield from self._process_contacts(start_datetime, end_datetime)
+        for object_type in ("tickets", "companies", "deals", "contacts"):
+            if object_type in self.object_types:
+                yield from self.poll_object_type(object_type, start, end)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,109 @@
+import os
+import time
+import queue
+import threading
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+# ----------------------------
+# Micro-batched query embeddings
+# ----------------------------
+# Concurrent requests each used to run their own one-sentence forward
+# pass. Here query texts are queued, and a single worker thread collects
+# whatever arrives within EMBEDDING_BATCH_WINDOW_MS (up to
+# EMBEDDING_BATCH_MAX_SIZE texts) and encodes them in one batch. Each
+# caller blocks only until its own vector is ready.
+#
+# Batches go through embed_documents, which for gte-small gives the same
+# vectors as embed_query (there is no query instruction).
+
+EMBEDDING_MICROBATCH_ENABLED = os.getenv("EMBEDDING_MICROBATCH_ENABLED", "True").lower() == "true"
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5"))
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "32"))
+
+
+class _Pending:
+    def __init__(self, text: str):
+        self.text = text
+        self.done = threading.Event()
+        self.vector = None
+        self.error = None
+
+
+class MicroBatchEmbeddings(Embeddings):
+    """Embeddings wrapper that encodes concurrent queries as one batch."""
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        window_ms: float = EMBEDDING_BATCH_WINDOW_MS,
+        max_batch_size: int = EMBEDDING_BATCH_MAX_SIZE,
+    ):
+        self.embeddings = embeddings
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.batches = 0
+        self.batched_texts = 0
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def warm_up(self):
+        warm_up = getattr(self.embeddings, "warm_up", None)
+        if warm_up:
+            warm_up()
+        else:
+            self.embeddings.embed_query("warm up")
+
+    def stats(self) -> dict:
+        return {"batches": self.batches, "texts": self.batched_texts}
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._worker.start()
+
+    def _collect(self) -> List[_Pending]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                vectors = self.embeddings.embed_documents([pending.text for pending in batch])
+                for pending, vector in zip(batch, vectors):
+                    pending.vector = vector
+            except Exception as e:
+                for pending in batch:
+                    pending.error = e
+            self.batches += 1
+            self.batched_texts += len(batch)
+            for pending in batch:
+                pending.done.set()
+
+    def embed_query(self, text: str) -> List[float]:
+        self._ensure_worker()
+        pending = _Pending(text)
+        self._queue.put(pending)
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Document lists are already batches
+        return self.embeddings.embed_documents(texts)
@@ -0,0 +1,132 @@
+import os
+import hashlib
+from array import array
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from backend import runtime
+from backend.local_cache import LocalLRUCache
+
+# ----------------------------
+# Embedding cache
+# ----------------------------
+# Vectors are keyed by a hash of the model name and the exact text, so a
+# repeated question costs a hash lookup instead of a transformer forward
+# pass. Lookups go through an in-process LRU first and, when enabled,
+# Redis second (vectors stored as packed float32). Query and document
+# vectors are cached separately, since some models embed them differently.
+#
+#   emb:<model>:<q|d>:<text hash>
+
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "True").lower() == "true"
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "4096"))
+EMBEDDING_CACHE_REDIS = os.getenv("EMBEDDING_CACHE_REDIS", "False").lower() == "true"
+EMBEDDING_CACHE_TTL = int(os.getenv("EMBEDDING_CACHE_TTL", "604800"))
+# Larger document batches (ingestion) are embedded without being cached,
+# so they don't push out the query vectors.
+EMBEDDING_CACHE_MAX_DOCUMENT_BATCH = int(os.getenv("EMBEDDING_CACHE_MAX_DOCUMENT_BATCH", "16"))
+
+
+def pack_vector(vector: List[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def unpack_vector(data: bytes) -> List[float]:
+    vector = array("f")
+    vector.frombytes(data)
+    return vector.tolist()
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that caches vectors by content hash."""
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_name: str,
+        max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES,
+        use_redis: bool = EMBEDDING_CACHE_REDIS,
+        ttl: int = EMBEDDING_CACHE_TTL,
+    ):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.use_redis = use_redis
+        self.ttl = ttl
+        # LocalLRUCache is bounded by entries here; sizes are left at 1
+        self.local_cache = LocalLRUCache(max_entries=max_entries, max_bytes=max_entries, ttl=ttl)
+
+    def key(self, kind: str, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+        return f"emb:{self.model_name}:{kind}:{digest}"
+
+    def warm_up(self):
+        """Load the wrapped model, bypassing the cache."""
+        warm_up = getattr(self.embeddings, "warm_up", None)
+        if warm_up:
+            warm_up()
+        else:
+            self.embeddings.embed_query("warm up")
+
+    def stats(self) -> dict:
+        stats = self.local_cache.stats()
+        inner_stats = getattr(self.embeddings, "stats", None)
+        if inner_stats:
+            stats["batching"] = inner_stats()
+        return stats
+
+    def _get_many(self, keys: List[str]) -> List:
+        vectors = [self.local_cache.get(key) for key in keys]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        cache = runtime.get_redis() if self.use_redis and missing else None
+        if not cache:
+            return vectors
+
+        try:
+            payloads = cache.mget([keys[i] for i in missing])
+        except Exception as e:
+            print(f"Embedding cache retrieval error: {e}")
+            return vectors
+
+        for i, payload in zip(missing, payloads):
+            if payload:
+                vectors[i] = unpack_vector(payload)
+                self.local_cache.set(keys[i], vectors[i])
+        return vectors
+
+    def _set_many(self, items: dict):
+        for key, vector in items.items():
+            self.local_cache.set(key, vector)
+
+        cache = runtime.get_redis() if self.use_redis else None
+        if not cache:
+            return
+        try:
+            pipe = cache.pipeline(transaction=False)
+            for key, vector in items.items():
+                pipe.set(key, pack_vector(vector), ex=self.ttl)
+            pipe.execute()
+        except Exception as e:
+            print(f"Embedding cache storage error: {e}")
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self.key("q", text)
+        vector = self._get_many([key])[0]
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self._set_many({key: vector})
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if len(texts) > EMBEDDING_CACHE_MAX_DOCUMENT_BATCH:
+            return self.embeddings.embed_documents(texts)
+
+        keys = [self.key("d", text) for text in texts]
+        vectors = self._get_many(keys)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            computed = self.embeddings.embed_documents([texts[i] for i in missing])
+            for i, vector in zip(missing, computed):
+                vectors[i] = vector
+            self._set_many({keys[i]: vectors[i] for i in missing})
+        return vectors
@@ -0,0 +1,106 @@
+import os
+import re
+import argparse
+
+import numpy as np
+from langchain_community.document_loaders import TextLoader
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+# backend.knowledgebase loads the embedding libraries, so it is imported
+# only when a comparison actually runs
+
+
+def load_corpus():
+    """Chunk the local .txt documents the same way ingestion does."""
+    from backend.knowledgebase import upload_dir
+
+    documents = []
+    for file in sorted(os.listdir(upload_dir)):
+        if file.endswith(".txt"):
+            documents.extend(TextLoader(os.path.join(upload_dir, file), encoding="utf-8").load())
+
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+    return [chunk.page_content for chunk in text_splitter.split_documents(documents)]
+
+
+def load_queries():
+    """Use the FAQ questions as evaluation queries."""
+    from backend.knowledgebase import faq_path
+
+    if not os.path.exists(faq_path):
+        return []
+    with open(faq_path, "r", encoding="utf-8") as f:
+        return re.findall(r"^Q:\s*(.+)$", f.read(), flags=re.MULTILINE)
+
+
+def top_k(query_vectors: np.ndarray, doc_vectors: np.ndarray, k: int) -> np.ndarray:
+    scores = query_vectors @ doc_vectors.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def recall_at_k(expected_hits: np.ndarray, hits: np.ndarray, k: int) -> float:
+    """Mean share of each query's expected top-k documents that were also retrieved."""
+    return float(np.mean([len(set(e) & set(h)) / k for e, h in zip(expected_hits, hits)]))
+
+
+def compare_backends(candidate: str, k: int = 5):
+    """
+    Compare a candidate embeddings backend with the current torch vectors.
+    Reports per-text cosine agreement and two recall@k figures against the
+    baseline's results:
+      - cross_recall@k: candidate queries searched against the torch
+        document vectors, which is what a store indexed with torch serves
+        after switching EMBEDDING_BACKEND without re-indexing
+      - recall@k: candidate queries against candidate document vectors,
+        as after a full re-index
+    """
+    from backend.knowledgebase import create_embedding_model
+
+    corpus = load_corpus()
+    queries = load_queries()
+    if not corpus or not queries:
+        print("Need local documents and FAQ questions to compare backends.")
+        return None
+
+    print(f"Comparing torch with {candidate} on {len(corpus)} chunks and {len(queries)} queries...")
+    baseline = create_embedding_model("torch")
+    model = create_embedding_model(candidate)
+
+    base_docs = np.array(baseline.embed_documents(corpus))
+    cand_docs = np.array(model.embed_documents(corpus))
+    base_queries = np.array([baseline.embed_query(q) for q in queries])
+    cand_queries = np.array([model.embed_query(q) for q in queries])
+
+    # Vectors are normalized, so the row-wise dot product is the cosine
+    cosines = np.concatenate([
+        np.sum(base_docs * cand_docs, axis=1),
+        np.sum(base_queries * cand_queries, axis=1),
+    ])
+
+    k = min(k, len(corpus))
+    base_hits = top_k(base_queries, base_docs, k)
+    # Candidate queries against the stored torch vectors, as served before re-indexing
+    cross_hits = top_k(cand_queries, base_docs, k)
+    # The candidate searches its own vectors, as it would after re-indexing
+    cand_hits = top_k(cand_queries, cand_docs, k)
+
+    report = {
+        "backend": candidate,
+        "cosine_mean": float(cosines.mean()),
+        "cosine_min": float(cosines.min()),
+        f"cross_recall@{k}": recall_at_k(base_hits, cross_hits, k),
+        f"recall@{k}": recall_at_k(base_hits, cand_hits, k),
+    }
+    for name, value in report.items():
+        print(f"{name}: {value}")
+    return report
+
+
+if __name__ == "__main__":
+    from backend.knowledgebase import EMBEDDING_BACKENDS
+
+    parser = argparse.ArgumentParser(description="Check an embeddings backend against the torch baseline.")
+    parser.add_argument("--backend", default="onnx-int8", choices=[b for b in EMBEDDING_BACKENDS if b != "torch"])
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+    compare_backends(args.backend, k=args.k)
@@ -0,0 +1,157 @@
+import os
+import re
+import json
+import difflib
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from backend import runtime
+from backend.lexical_index import STOPWORDS
+from backend.normalization import normalize_question
+from backend.retrieval import SHARED_BOT_ID
+
+# ----------------------------
+# FAQ fast path
+# ----------------------------
+# FAQ files hold "Q: ... / A: ..." pairs. update_knowledge_base parses them
+# into a small JSON index keyed by the normalized question, so a question
+# that matches an FAQ entry exactly after normalization is answered
+# straight from the file without retrieval or the LLM.
+#
+# With FAQ_MATCH_CUTOFF below 1, near matches are also accepted, but only
+# when they differ in filler words or in small typos of plain words: a
+# candidate with a different number, code or symbol token ("30-day" vs
+# "60-day", "c++" vs "c#") or a different content word is rejected.
+#
+#   {"v": 1, "entries": {"<bot_id>": {"<normalized question>": "<answer>"}}}
+
+INDEX_VERSION = 1
+FAQ_INDEX_FILE = "faq_index.json"
+FAQ_FAST_PATH_ENABLED = os.getenv("FAQ_FAST_PATH_ENABLED", "True").lower() == "true"
+# Minimum difflib similarity for a near-exact match; 1 = exact matches only
+FAQ_MATCH_CUTOFF = float(os.getenv("FAQ_MATCH_CUTOFF", "1"))
+# Minimum similarity of two differing words for them to count as a typo
+FAQ_TYPO_CUTOFF = 0.8
+# Words a near match may add or drop, including contractions as normalized
+# ("what's" becomes "whats"); negations always count
+FILLER_WORDS = (STOPWORDS - {"no", "not"}) | {"whats", "hows", "wheres", "whos", "im"}
+
+QA_PATTERN = re.compile(r"^Q:\s*(.+?)\s*\n\s*A:\s*(.*?)(?=\n\s*\nQ:|\nQ:|\Z)", re.MULTILINE | re.DOTALL)
+
+
+def parse_faq(text: str) -> List[Tuple[str, str]]:
+    """Return the (question, answer) pairs of an FAQ-style text."""
+    pairs = []
+    for question, answer in QA_PATTERN.findall(text.replace("\r\n", "\n")):
+        answer = answer.strip()
+        if question and answer:
+            pairs.append((question.strip(), answer))
+    return pairs
+
+
+def _content_tokens(question: str) -> List[str]:
+    return [token for token in question.split() if token not in FILLER_WORDS]
+
+
+def same_content(query: str, candidate: str) -> bool:
+    """True if two normalized questions differ at most in filler words and typos of plain words."""
+    tokens, candidate_tokens = _content_tokens(query), _content_tokens(candidate)
+    if len(tokens) != len(candidate_tokens):
+        return False
+    for token, candidate_token in zip(tokens, candidate_tokens):
+        if token == candidate_token:
+            continue
+        # Numbers, codes and symbols must match exactly
+        if not (token.isalpha() and candidate_token.isalpha()):
+            return False
+        if difflib.SequenceMatcher(None, token, candidate_token).ratio() < FAQ_TYPO_CUTOFF:
+            return False
+    return True
+
+
+class FAQIndex:
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict[str, str]] = {}
+        self.mtime = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            try:
+                mtime = os.path.getmtime(self.path)
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+                self.mtime = None
+                return False
+            if data.get("v") != INDEX_VERSION:
+                return False
+            self.entries = data["entries"]
+            self.mtime = mtime
+            return True
+
+    def reload_if_changed(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            mtime = None
+        if mtime != self.mtime:
+            self.load()
+
+    def build(self, faq_files: List[Tuple[str, int]]):
+        """Parse (path, bot_id) FAQ files and write the index."""
+        entries = {}
+        for path, bot_id in faq_files:
+            with open(path, "r", encoding="utf-8") as f:
+                pairs = parse_faq(f.read())
+            scope = entries.setdefault(str(int(bot_id or SHARED_BOT_ID)), {})
+            for question, answer in pairs:
+                scope[normalize_question(question)] = answer
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"v": INDEX_VERSION, "entries": entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self.load()
+        return sum(len(scope) for scope in entries.values())
+
+    def lookup(self, query: str, bot_id: int = None, cutoff: float = None) -> Optional[str]:
+        """Answer a normalized question from the bot's FAQ, then the shared FAQ."""
+        cutoff = FAQ_MATCH_CUTOFF if cutoff is None else cutoff
+        self.reload_if_changed()
+        scopes = [str(SHARED_BOT_ID)] if bot_id is None else [str(int(bot_id)), str(SHARED_BOT_ID)]
+        for scope in scopes:
+            entries = self.entries.get(scope)
+            if not entries:
+                continue
+            answer = entries.get(query)
+            if answer is not None:
+                return answer
+            if cutoff < 1:
+                for candidate in difflib.get_close_matches(query, entries.keys(), n=5, cutoff=cutoff):
+                    if same_content(query, candidate):
+                        return entries[candidate]
+        return None
+
+
+_faq_index = None
+_faq_index_lock = threading.Lock()
+
+
+def get_faq_index() -> FAQIndex:
+    """Return the process-wide FAQ index."""
+    global _faq_index
+    with _faq_index_lock:
+        if _faq_index is None:
+            _faq_index = FAQIndex(os.path.join(runtime.CHROMA_PERSIST_DIRECTORY, FAQ_INDEX_FILE))
+            _faq_index.load()
+        return _faq_index
+
+
+def lookup_faq(query: str, bot_id: int = None) -> Optional[str]:
+    if not FAQ_FAST_PATH_ENABLED or not query:
+        return None
+    return get_faq_index().lookup(query, bot_id)
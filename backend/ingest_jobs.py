@@ -0,0 +1,234 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from backend import runtime
+
+# ----------------------------
+# Background ingestion jobs
+# ----------------------------
+# Uploads used to parse, chunk and embed inside the request. Now the
+# request only saves the file and queues a job. A small local thread pool
+# runs the jobs, and their state is kept in SQLite, so the status
+# endpoint can report progress and jobs left unfinished by a restart are
+# picked up again.
+#
+#   status: queued -> running -> succeeded | failed
+#
+# Every app worker process runs its own queue on the shared database. A
+# monitor thread refreshes the heartbeat of the jobs its process is running
+# every INGEST_JOB_HEARTBEAT_SECONDS and requeues running jobs whose
+# heartbeat is older than INGEST_JOB_STALE_SECONDS, since the process that
+# ran them is gone. This also covers jobs that were running only moments
+# before a restart. Jobs queued longer than that, e.g. by a process that
+# died before running them, are taken over the same way.
+
+INGEST_JOBS_DB = os.getenv("INGEST_JOBS_DB", os.path.join(runtime.CHROMA_PERSIST_DIRECTORY, "ingest_jobs.sqlite3"))
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "1"))
+INGEST_JOB_HEARTBEAT_SECONDS = float(os.getenv("INGEST_JOB_HEARTBEAT_SECONDS", "30"))
+# Running jobs without a heartbeat for this long belong to a dead process
+INGEST_JOB_STALE_SECONDS = float(os.getenv("INGEST_JOB_STALE_SECONDS", "120"))
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingest_jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    heartbeat_at REAL,
+    finished_at REAL
+)
+"""
+
+
+class IngestJobQueue:
+    def __init__(
+        self,
+        db_path: str = INGEST_JOBS_DB,
+        workers: int = INGEST_WORKERS,
+        heartbeat_seconds: float = INGEST_JOB_HEARTBEAT_SECONDS,
+        stale_seconds: float = INGEST_JOB_STALE_SECONDS,
+    ):
+        self.db_path = db_path
+        self.workers = workers
+        self.heartbeat_seconds = heartbeat_seconds
+        self.stale_seconds = stale_seconds
+        self.handlers = {}
+        self._executor = None
+        self._running = set()
+        # Jobs handed to this process's pool that have not started yet
+        self._submitted = set()
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        if not self._initialized:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        connection = sqlite3.connect(self.db_path, timeout=30)
+        connection.row_factory = sqlite3.Row
+        if not self._initialized:
+            with connection:
+                connection.execute(SCHEMA)
+                columns = {row["name"] for row in connection.execute("PRAGMA table_info(ingest_jobs)")}
+                if "heartbeat_at" not in columns:
+                    connection.execute("ALTER TABLE ingest_jobs ADD COLUMN heartbeat_at REAL")
+            self._initialized = True
+        return connection
+
+    def _execute(self, sql: str, params: tuple = ()):
+        with self._db_lock, closing(self._connect()) as connection, connection:
+            return connection.execute(sql, params).fetchall()
+
+    def register(self, kind: str, handler):
+        """handler(payload, progress) runs the job; progress(fraction) reports 0..1."""
+        self.handlers[kind] = handler
+
+    def start(self):
+        """Start the worker pool and resume jobs left unfinished by a previous run."""
+        with self._lock:
+            if self._executor is not None:
+                return
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ingest")
+            self._stopped.clear()
+        self._requeue_stale()
+        for row in self._execute("SELECT id FROM ingest_jobs WHERE status = ? ORDER BY created_at", (QUEUED,)):
+            self._submit(row["id"])
+        threading.Thread(target=self._monitor, name="ingest-monitor", daemon=True).start()
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._submitted.clear()
+        self._stopped.set()
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, job_id: str):
+        with self._lock:
+            if self._executor is None or job_id in self._submitted or job_id in self._running:
+                return
+            self._submitted.add(job_id)
+            self._executor.submit(self._run, job_id)
+
+    def _monitor(self):
+        while not self._stopped.wait(self.heartbeat_seconds):
+            try:
+                self._heartbeat()
+                for job_id in self._requeue_stale():
+                    self._submit(job_id)
+                # Jobs queued by a process that died before running them
+                rows = self._execute(
+                    "SELECT id FROM ingest_jobs WHERE status = ? AND created_at < ? ORDER BY created_at",
+                    (QUEUED, time.time() - self.stale_seconds),
+                )
+                for row in rows:
+                    self._submit(row["id"])
+            except Exception as e:
+                print(f"Ingestion job monitor error: {e}")
+
+    def _heartbeat(self):
+        now = time.time()
+        for job_id in list(self._running):
+            self._execute("UPDATE ingest_jobs SET heartbeat_at = ? WHERE id = ? AND status = ?", (now, job_id, RUNNING))
+
+    def _requeue_stale(self) -> list:
+        """Queue running jobs whose process stopped sending heartbeats again; returns their ids."""
+        cutoff = time.time() - self.stale_seconds
+        requeued = []
+        with self._db_lock, closing(self._connect()) as connection, connection:
+            rows = connection.execute(
+                "SELECT id FROM ingest_jobs WHERE status = ? AND COALESCE(heartbeat_at, started_at) < ?",
+                (RUNNING, cutoff),
+            ).fetchall()
+            for row in rows:
+                if row["id"] in self._running:
+                    continue
+                connection.execute(
+                    "UPDATE ingest_jobs SET status = ?, progress = 0 WHERE id = ? AND status = ?",
+                    (QUEUED, row["id"], RUNNING),
+                )
+                requeued.append(row["id"])
+        for job_id in requeued:
+            print(f"Ingestion job {job_id} lost its worker; queued again.")
+        return requeued
+
+    def submit(self, kind: str, payload: dict = None) -> str:
+        """Queue a job and return its id."""
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown ingestion job kind '{kind}'")
+        job_id = uuid.uuid4().hex
+        self._execute(
+            "INSERT INTO ingest_jobs (id, kind, payload, status, created_at) VALUES (?, ?, ?, ?, ?)",
+            (job_id, kind, json.dumps(payload or {}), QUEUED, time.time()),
+        )
+        self.start()
+        self._submit(job_id)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[dict]:
+        rows = self._execute("SELECT * FROM ingest_jobs WHERE id = ?", (job_id,))
+        if not rows:
+            return None
+        job = dict(rows[0])
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def _claim(self, job_id: str):
+        """Mark a queued job as running; returns its row, or nothing if another worker has it."""
+        with self._db_lock, closing(self._connect()) as connection, connection:
+            now = time.time()
+            cursor = connection.execute(
+                "UPDATE ingest_jobs SET status = ?, started_at = ?, heartbeat_at = ? WHERE id = ? AND status = ?",
+                (RUNNING, now, now, job_id, QUEUED),
+            )
+            if cursor.rowcount != 1:
+                return []
+            return connection.execute("SELECT kind, payload FROM ingest_jobs WHERE id = ?", (job_id,)).fetchall()
+
+    def _run(self, job_id: str):
+        with self._lock:
+            self._submitted.discard(job_id)
+        rows = self._claim(job_id)
+        if not rows:
+            return
+        self._running.add(job_id)
+
+        def progress(fraction: float):
+            self._execute("UPDATE ingest_jobs SET progress = ? WHERE id = ?", (round(fraction, 3), job_id))
+
+        try:
+            result = self.handlers[rows[0]["kind"]](json.loads(rows[0]["payload"]), progress)
+            self._execute(
+                "UPDATE ingest_jobs SET status = ?, progress = 1, result = ?, finished_at = ? WHERE id = ?",
+                (SUCCEEDED, json.dumps(result), time.time(), job_id),
+            )
+        except Exception as e:
+            print(f"Ingestion job {job_id} failed: {e}")
+            self._execute(
+                "UPDATE ingest_jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                (FAILED, str(e), time.time(), job_id),
+            )
+        finally:
+            self._running.discard(job_id)
+
+
+ingest_jobs = IngestJobQueue()
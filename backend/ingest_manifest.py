@@ -0,0 +1,74 @@
+import os
+import json
+import hashlib
+from typing import Dict, List, Optional
+
+# ----------------------------
+# Ingestion manifest
+# ----------------------------
+# Records, per uploaded file, the content hash it was indexed with, its
+# bot_id and the ids of its chunks in Chroma, so update_knowledge_base can
+# skip unchanged files, re-index changed ones and delete the chunks of
+# files that are gone.
+#
+#   {"v": 1, "files": {"<path relative to uploaded_docs>":
+#       {"hash": "<sha256>", "bot_id": 0, "chunk_ids": ["...", ...]}}}
+
+MANIFEST_VERSION = 1
+MANIFEST_FILE = "ingest_manifest.json"
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_id(source: str, index: int, content: str) -> str:
+    """Stable id of a chunk: the same text at the same place always gets the same id."""
+    content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return hashlib.sha256(f"{source}\x00{index}\x00{content_hash}".encode("utf-8")).hexdigest()[:32]
+
+
+class IngestManifest:
+    def __init__(self, path: str):
+        self.path = path
+        self.files: Dict[str, dict] = {}
+
+    @property
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            self.files = {}
+            return self
+        self.files = data.get("files", {}) if data.get("v") == MANIFEST_VERSION else {}
+        return self
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"v": MANIFEST_VERSION, "files": self.files}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def get(self, name: str) -> Optional[dict]:
+        return self.files.get(name)
+
+    def is_current(self, name: str, content_hash: str, bot_id: int) -> bool:
+        entry = self.files.get(name)
+        return bool(entry) and entry["hash"] == content_hash and entry["bot_id"] == bot_id
+
+    def record(self, name: str, content_hash: str, bot_id: int, chunk_ids: List[str]):
+        self.files[name] = {"hash": content_hash, "bot_id": bot_id, "chunk_ids": chunk_ids}
+
+    def remove(self, name: str) -> List[str]:
+        """Forget a file and return the chunk ids it had."""
+        entry = self.files.pop(name, None)
+        return entry["chunk_ids"] if entry else []
@@ -0,0 +1,134 @@
+import os
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, NamedTuple
+
+from langchain_community.document_loaders import TextLoader, PyPDFLoader
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain.docstore.document import Document as LangchainDocument
+
+from backend.ingest_manifest import chunk_id
+
+# ----------------------------
+# Streaming ingestion pipeline
+# ----------------------------
+# update_knowledge_base used to load every file into one list, split it
+# and embed it all in one add_documents call. Now the files that changed
+# are parsed and split in a process pool, a few at a time, and their
+# chunks are written to Chroma in fixed-size batches as they arrive:
+#
+#   files -> parse_files (process pool, bounded) -> ChunkBuffer -> write(batch)
+#
+# At most INGEST_PARSE_WORKERS * 2 files are in flight. A new file is only
+# handed to the pool once an earlier one has been consumed, so parsing
+# never runs far ahead of embedding and memory stays flat.
+#
+# This module is imported by the pool's worker processes, so it must not
+# import the embeddings model or the vector store.
+
+INGEST_PARSE_WORKERS = int(os.getenv("INGEST_PARSE_WORKERS", "0")) or os.cpu_count() or 1
+# Chunks embedded and written to Chroma per batch
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "256"))
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+
+class FileTask(NamedTuple):
+    name: str
+    path: str
+    bot_id: int
+    content_hash: str
+
+
+class ParsedFile(NamedTuple):
+    task: FileTask
+    ids: List[str]
+    chunks: List[LangchainDocument]
+
+
+def load_file(file_path: str) -> List[LangchainDocument]:
+    if file_path.endswith(".pdf"):
+        return PyPDFLoader(file_path).load()
+    if file_path.endswith(".txt"):
+        return TextLoader(file_path, encoding="utf-8").load()
+    return []
+
+
+def parse_file(task: FileTask) -> ParsedFile:
+    """Load and split one file into chunks tagged with its bot_id, with stable chunk ids."""
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP
+    )
+    chunks = text_splitter.split_documents(load_file(task.path))
+    for chunk in chunks:
+        chunk.metadata["bot_id"] = int(task.bot_id)
+    ids = [chunk_id(task.name, i, chunk.page_content) for i, chunk in enumerate(chunks)]
+    return ParsedFile(task, ids, chunks)
+
+
+def parse_files(tasks: Iterable[FileTask], workers: int = INGEST_PARSE_WORKERS) -> Iterator[ParsedFile]:
+    """Yield the parsed files in order, parsing at most workers * 2 ahead."""
+    tasks = list(tasks)
+    if workers <= 1 or len(tasks) <= 1:
+        # Not worth starting worker processes
+        for task in tasks:
+            yield parse_file(task)
+        return
+
+    workers = min(workers, len(tasks))
+    # spawn, not fork: the app process runs threads (job workers, Redis, uvicorn)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending = deque()
+        remaining = iter(tasks)
+        for task in remaining:
+            pending.append(pool.submit(parse_file, task))
+            if len(pending) >= workers * 2:
+                break
+        while pending:
+            parsed = pending.popleft().result()
+            for task in remaining:
+                pending.append(pool.submit(parse_file, task))
+                break
+            yield parsed
+
+
+class ChunkBuffer:
+    """
+    Collects chunks and hands them to write(ids, chunks) in batches of
+    batch_size. The on_written callback given with a file's chunks runs
+    once all of them have been written.
+    """
+
+    def __init__(self, write, batch_size: int = INGEST_BATCH_SIZE):
+        self.write = write
+        self.batch_size = max(1, batch_size)
+        self.ids: List[str] = []
+        self.chunks: List[LangchainDocument] = []
+        self.callbacks = deque()
+        self.written = 0
+
+    def add(self, ids: List[str], chunks: List[LangchainDocument], on_written=None):
+        self.ids.extend(ids)
+        self.chunks.extend(chunks)
+        if on_written:
+            self.callbacks.append((self.written + len(self.ids), on_written))
+        while len(self.ids) >= self.batch_size:
+            self._write(self.batch_size)
+        self._run_callbacks()
+
+    def flush(self):
+        if self.ids:
+            self._write(len(self.ids))
+        self._run_callbacks()
+
+    def _write(self, count: int):
+        ids, self.ids = self.ids[:count], self.ids[count:]
+        chunks, self.chunks = self.chunks[:count], self.chunks[count:]
+        self.write(ids, chunks)
+        self.written += count
+
+    def _run_callbacks(self):
+        while self.callbacks and self.callbacks[0][0] <= self.written:
+            self.callbacks.popleft()[1]()
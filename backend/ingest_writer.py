@@ -0,0 +1,201 @@
+import os
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from langchain.docstore.document import Document as LangchainDocument
+
+from backend import runtime
+from backend.answer_cache import bump_kb_version
+from backend.ingest_pipeline import INGEST_BATCH_SIZE
+from backend.lexical_index import BM25Index, get_lexical_index
+
+try:
+    import fcntl
+except ImportError:  # Windows: updates are serialized within the process only
+    fcntl = None
+
+# ----------------------------
+# Knowledge base writer
+# ----------------------------
+# One writer per Chroma store, shared by update_knowledge_base and
+# add_documents_to_knowledge_base. It reuses the runtime's Chroma handle
+# instead of opening a client per call. Chunks are embedded
+# INGEST_EMBED_BATCH_SIZE texts at a time, spread over INGEST_EMBED_THREADS
+# threads, and upserted INGEST_BATCH_SIZE chunks at a time. The lexical
+# index is updated in memory and saved on commit(), once per sync rather
+# than once per batch; commit() does nothing if nothing was written.
+#
+# locked() serializes knowledge base updates: a thread lock within the
+# process and, where fcntl exists, an exclusive lock on INGEST_LOCK_FILE in
+# the store directory across the app's worker processes and sync scripts.
+
+INGEST_EMBED_BATCH_SIZE = int(os.getenv("INGEST_EMBED_BATCH_SIZE", "64"))
+# More than one thread only helps when a single encode call leaves cores idle
+INGEST_EMBED_THREADS = int(os.getenv("INGEST_EMBED_THREADS", "1"))
+INGEST_LOCK_FILE = ".ingest.lock"
+
+
+class KnowledgeBaseWriter:
+    def __init__(
+        self,
+        persist_directory: str = None,
+        embed_batch_size: int = INGEST_EMBED_BATCH_SIZE,
+        embed_threads: int = INGEST_EMBED_THREADS,
+        upsert_batch_size: int = INGEST_BATCH_SIZE,
+    ):
+        self.persist_directory = os.path.abspath(persist_directory or runtime.CHROMA_PERSIST_DIRECTORY)
+        self.embed_batch_size = max(1, embed_batch_size)
+        self.upsert_batch_size = max(1, upsert_batch_size)
+        self.written = 0
+        self._executor = (
+            ThreadPoolExecutor(max_workers=embed_threads, thread_name_prefix="embed") if embed_threads > 1 else None
+        )
+        self._changed = False
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def locked(self):
+        """Hold the store's update lock, shared with other threads and processes."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            os.makedirs(self.persist_directory, exist_ok=True)
+            with open(os.path.join(self.persist_directory, INGEST_LOCK_FILE), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @property
+    def vectorstore(self):
+        return runtime.get_vectorstore(self.persist_directory)
+
+    def _lexical_index(self) -> Optional[BM25Index]:
+        try:
+            return get_lexical_index(self.persist_directory)
+        except Exception as e:
+            print(f"Lexical index update error: {e}")
+            return None
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        embed_documents = self.vectorstore.embeddings.embed_documents
+        batches = [texts[i:i + self.embed_batch_size] for i in range(0, len(texts), self.embed_batch_size)]
+        if self._executor is not None and len(batches) > 1:
+            results = self._executor.map(embed_documents, batches)
+        else:
+            results = map(embed_documents, batches)
+        return [vector for batch in results for vector in batch]
+
+    def write(self, ids: List[str], chunks: List[LangchainDocument]):
+        """Embed chunks and upsert them into Chroma under the given ids."""
+        collection = self.vectorstore._collection
+        for start in range(0, len(ids), self.upsert_batch_size):
+            batch_ids = ids[start:start + self.upsert_batch_size]
+            batch = chunks[start:start + self.upsert_batch_size]
+            texts = [chunk.page_content for chunk in batch]
+            collection.upsert(
+                ids=batch_ids,
+                embeddings=self.embed(texts),
+                documents=texts,
+                metadatas=[chunk.metadata for chunk in batch],
+            )
+            self.written += len(batch_ids)
+            self._changed = True
+
+    def index(self, ids: List[str], chunks: List[LangchainDocument]):
+        """Add chunks that are new or changed to the lexical index (saved on commit)."""
+        index = self._lexical_index()
+        if index is None or not ids:
+            return
+        changed = [(doc_id, chunk) for doc_id, chunk in zip(ids, chunks) if not index.is_current(doc_id, chunk)]
+        if changed:
+            index.add([doc_id for doc_id, _ in changed], [chunk for _, chunk in changed])
+            self._changed = True
+
+    def delete(self, ids: List[str]):
+        """Remove chunks from Chroma and the lexical index."""
+        if not ids:
+            return
+        self.vectorstore.delete(ids=ids)
+        self._changed = True
+        index = self._lexical_index()
+        if index is not None:
+            index.delete(ids)
+
+    def missing_ids(self, ids: List[str]) -> set:
+        """Return the ids that are not stored in Chroma yet."""
+        if not ids:
+            return set()
+        existing = set()
+        for start in range(0, len(ids), self.upsert_batch_size):
+            batch = ids[start:start + self.upsert_batch_size]
+            existing.update(self.vectorstore.get(ids=batch, include=[])["ids"])
+        return set(ids) - existing
+
+    def replace_documents(
+        self, ids: List[str], chunks: List[LangchainDocument], doc_ids_by_source: Dict[str, List[str]], bot_id: int
+    ) -> dict:
+        """
+        Make the given chunks the stored chunks of their documents. Only
+        chunks not stored yet are embedded, chunks missing from the lexical
+        index or different there are (re-)added to it, and stored chunks of these documents that are no
+        longer current are deleted, including ones stored with random ids
+        or without a bot_id by earlier syncs. Returns counts of the added,
+        removed and unchanged chunks.
+        """
+        current_ids = set(ids)
+        stale = []
+        for source, doc_ids in doc_ids_by_source.items():
+            stored = self.vectorstore.get(
+                where={"$and": [{"source": source}, {"doc_id": {"$in": doc_ids}}]}, include=["metadatas"]
+            )
+            for stored_id, metadata in zip(stored["ids"], stored["metadatas"]):
+                # Chunks stored before bot scoping have no bot_id
+                if stored_id not in current_ids and (metadata or {}).get("bot_id", bot_id) == bot_id:
+                    stale.append(stored_id)
+        self.delete(stale)
+
+        # Same id means same text at the same place, so only new ids are embedded
+        new_ids = self.missing_ids(ids)
+        new_chunks = [(doc_id, chunk) for doc_id, chunk in zip(ids, chunks) if doc_id in new_ids]
+        self.write([doc_id for doc_id, _ in new_chunks], [chunk for _, chunk in new_chunks])
+        # Every current chunk is checked against the lexical index, so it
+        # stays complete even if an earlier run was cut short
+        self.index(ids, chunks)
+        return {
+            "chunks_added": len(new_chunks),
+            "chunks_removed": len(stale),
+            "chunks_unchanged": len(ids) - len(new_chunks),
+        }
+
+    def commit(self):
+        """Save the lexical index and invalidate cached answers, if anything changed."""
+        if not self._changed:
+            return
+        self._changed = False
+        index = self._lexical_index()
+        try:
+            if index is not None:
+                index.save()
+        except Exception as e:
+            print(f"Lexical index update error: {e}")
+        bump_kb_version()
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_ingest_writer(persist_directory: str = None) -> KnowledgeBaseWriter:
+    """Return the process-wide writer of a Chroma store."""
+    persist_directory = os.path.abspath(persist_directory or runtime.CHROMA_PERSIST_DIRECTORY)
+    with _writers_lock:
+        writer = _writers.get(persist_directory)
+        if writer is None:
+            writer = KnowledgeBaseWriter(persist_directory)
+            _writers[persist_directory] = writer
+        return writer
@@ -1,14 +1,24 @@
 # knowledgebase.py
 import os
-from langchain_community.document_loaders import TextLoader, PyPDFLoader
+import threading
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_chroma import Chroma
 from langchain_community.vectorstores.utils import DistanceStrategy
 from langchain_huggingface import HuggingFaceEmbeddings
+from langchain_core.embeddings import Embeddings
 from langchain.docstore.document import Document as LangchainDocument
 from typing import List
 
 from backend.connectors.models import Document, TextSection
+from backend.embedding_cache import CachedEmbeddings, EMBEDDING_CACHE_ENABLED
+from backend.embedding_batcher import MicroBatchEmbeddings, EMBEDDING_MICROBATCH_ENABLED
+from backend.onnx_embeddings import ensure_onnx_model, onnx_model_kwargs
+from backend import runtime
+from backend.retrieval import SHARED_BOT_ID
+from backend.lexical_index import reset_lexical_index
+from backend.faq_index import get_faq_index
+from backend.ingest_manifest import IngestManifest, MANIFEST_FILE, file_hash, chunk_id
+from backend.ingest_pipeline import FileTask, ChunkBuffer, parse_files
+from backend.ingest_writer import get_ingest_writer
 
 # ----------------------------
 # Paths
@@ -19,14 +29,166 @@ upload_dir = os.path.join(current_dir, "uploaded_docs")
 
 os.makedirs(upload_dir, exist_ok=True)
 
+# ----------------------------
+# Bot scoping
+# ----------------------------
+# Every chunk carries an integer "bot_id" metadata field. Documents shared
+# by all bots (the FAQ, files uploaded without a bot, HubSpot records) use
+# SHARED_BOT_ID; a bot's queries are pre-filtered to its own and the
+# shared chunks. Files uploaded for a bot live in uploaded_docs/bot_<id>/.
+BOT_UPLOAD_PREFIX = "bot_"
+BOT_ID_BACKFILL_MARKER = ".bot_ids_backfilled"
+
+
+def bot_upload_dir(bot_id: int = None) -> str:
+    if not bot_id:
+        return upload_dir
+    return os.path.join(upload_dir, f"{BOT_UPLOAD_PREFIX}{int(bot_id)}")
+
+
+def list_uploaded_files():
+    """Yield (file path, bot_id) for every uploaded document."""
+    for entry in sorted(os.listdir(upload_dir)):
+        path = os.path.join(upload_dir, entry)
+        if os.path.isfile(path):
+            yield path, SHARED_BOT_ID
+        elif entry.startswith(BOT_UPLOAD_PREFIX) and entry[len(BOT_UPLOAD_PREFIX):].isdigit():
+            bot_id = int(entry[len(BOT_UPLOAD_PREFIX):])
+            for file in sorted(os.listdir(path)):
+                if os.path.isfile(os.path.join(path, file)):
+                    yield os.path.join(path, file), bot_id
+
+
+def list_faq_files():
+    """Yield (file path, bot_id) for the FAQ files (FAQ*.txt) among the uploads."""
+    for path, bot_id in list_uploaded_files():
+        name = os.path.basename(path).lower()
+        if name.startswith("faq") and name.endswith(".txt"):
+            yield path, bot_id
+
+
+def ensure_faq_index():
+    """Build the FAQ fast path index if it has never been built."""
+    index = get_faq_index()
+    if index.mtime is None:
+        count = index.build(list(list_faq_files()))
+        print(f"✅ FAQ fast path indexed {count} questions.")
+
+
+def tag_bot_id(chunks: List[LangchainDocument], bot_id: int = None) -> List[LangchainDocument]:
+    for chunk in chunks:
+        chunk.metadata["bot_id"] = int(bot_id or SHARED_BOT_ID)
+    return chunks
+
+
+def backfill_bot_ids(persist_directory: str = None, batch_size: int = 1000):
+    """
+    Tag chunks ingested before bot scoping as shared, so bot-filtered
+    queries still find them. Runs once per persist directory.
+    """
+    persist_directory = persist_directory or runtime.CHROMA_PERSIST_DIRECTORY
+    marker = os.path.join(persist_directory, BOT_ID_BACKFILL_MARKER)
+    if os.path.exists(marker) or not os.path.exists(persist_directory):
+        return 0
+
+    collection = runtime.get_vectorstore(persist_directory)._collection
+    tagged = 0
+    offset = 0
+    while True:
+        batch = collection.get(include=["metadatas"], limit=batch_size, offset=offset)
+        ids = batch["ids"]
+        if not ids:
+            break
+        untagged = [(doc_id, metadata or {}) for doc_id, metadata in zip(ids, batch["metadatas"])
+                    if "bot_id" not in (metadata or {})]
+        if untagged:
+            collection.update(
+                ids=[doc_id for doc_id, _ in untagged],
+                metadatas=[{**metadata, "bot_id": SHARED_BOT_ID} for _, metadata in untagged],
+            )
+            tagged += len(untagged)
+        offset += len(ids)
+
+    with open(marker, "w") as f:
+        f.write(str(tagged))
+    if tagged:
+        # Rebuild the lexical index from the re-tagged chunks
+        reset_lexical_index(persist_directory)
+        print(f"✅ Tagged {tagged} existing chunks as shared knowledge.")
+    return tagged
+
+
 # ----------------------------
 # Initialize embeddings
 # ----------------------------
-embeddings = HuggingFaceEmbeddings(
-    model_name="thenlper/gte-small",
-    model_kwargs={"device": "cpu"},
-    encode_kwargs={"normalize_embeddings": True},
-)
+class LazyEmbeddings(Embeddings):
+    """
+    Defers loading the sentence-transformers model until the first text is
+    embedded, so importing this module (and every bot) stays cheap.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self) -> Embeddings:
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._factory()
+        return self._model
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    def warm_up(self):
+        _ = self.model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.model.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.model.embed_query(text)
+
+
+EMBEDDING_MODEL_NAME = "thenlper/gte-small"
+# torch (sentence-transformers + PyTorch), onnx, or onnx-int8 (see onnx_embeddings.py)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+def create_embedding_model(backend: str = EMBEDDING_BACKEND) -> Embeddings:
+    """Load the gte-small embeddings model on CPU with the given inference backend."""
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND '{backend}', expected one of {EMBEDDING_BACKENDS}")
+
+    if backend == "torch":
+        return HuggingFaceEmbeddings(
+            model_name=EMBEDDING_MODEL_NAME,
+            model_kwargs={"device": "cpu"},
+            encode_kwargs={"normalize_embeddings": True},
+        )
+
+    quantized = backend == "onnx-int8"
+    return HuggingFaceEmbeddings(
+        model_name=ensure_onnx_model(EMBEDDING_MODEL_NAME, quantized=quantized),
+        model_kwargs=onnx_model_kwargs(quantized),
+        encode_kwargs={"normalize_embeddings": True},
+    )
+
+
+embeddings = LazyEmbeddings(create_embedding_model)
+
+# Concurrent query embeddings are encoded together in small batches
+if EMBEDDING_MICROBATCH_ENABLED:
+    embeddings = MicroBatchEmbeddings(embeddings)
+
+# Repeated texts (mostly questions) are served from the embedding cache
+if EMBEDDING_CACHE_ENABLED:
+    embeddings = CachedEmbeddings(embeddings, model_name=f"{EMBEDDING_MODEL_NAME}:{EMBEDDING_BACKEND}")
 
 def convert_to_langchain_documents(documents: List[Document]) -> List[LangchainDocument]:
     """Converts a list of custom Document objects to Langchain's Document objects."""
@@ -54,80 +216,154 @@ def convert_to_langchain_documents(documents: List[Document]) -> List[LangchainD
         )
     return langchain_docs
 
-def add_documents_to_knowledge_base(documents: List[Document], persist_directory: str = None):
+def add_documents_to_knowledge_base(
+    documents: List[Document],
+    persist_directory: str = None,
+    bot_id: int = SHARED_BOT_ID,
+    commit: bool = True,
+):
     """
-    Adds a list of documents to the Chroma vector store.
+    Adds a list of documents to the Chroma vector store, tagged with the
+    bot they belong to (shared by default).
+
+    Chunk ids are derived from the document's source, bot, doc_id and the
+    chunk's position and text, so adding a document again only embeds the
+    chunks that changed, and chunks the document no longer has are deleted
+    (see KnowledgeBaseWriter.replace_documents). Returns counts of the
+    added, removed and unchanged chunks, also when there is nothing to add.
+
+    Bulk callers adding many batches can pass commit=False and call
+    get_ingest_writer(persist_directory).commit() once at the end.
     """
     if not documents:
         print("No documents to add to the knowledge base.")
-        return
+        return {"chunks_added": 0, "chunks_removed": 0, "chunks_unchanged": 0}
 
-    langchain_docs = convert_to_langchain_documents(documents)
+    bot_id = int(bot_id or SHARED_BOT_ID)
+    # A document sent twice in one batch is taken in its latest version
+    langchain_docs = {
+        (doc.metadata["source"], doc.metadata["doc_id"]): doc
+        for doc in convert_to_langchain_documents(documents)
+    }
 
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=1000,
         chunk_overlap=200
     )
-    document_chunks = text_splitter.split_documents(langchain_docs)
+    ids = []
+    document_chunks = []
+    doc_ids_by_source = {}
+    for (source, doc_id), doc in langchain_docs.items():
+        chunks = tag_bot_id(text_splitter.split_documents([doc]), bot_id)
+        ids.extend(chunk_id(f"{source}:{bot_id}:{doc_id}", i, chunk.page_content) for i, chunk in enumerate(chunks))
+        document_chunks.extend(chunks)
+        doc_ids_by_source.setdefault(source, []).append(doc_id)
 
-    if not document_chunks:
-        print("No document chunks to add to the knowledge base.")
-        return
+    writer = get_ingest_writer(persist_directory)
+    with writer.locked():
+        summary = writer.replace_documents(ids, document_chunks, doc_ids_by_source, bot_id)
+        if commit:
+            writer.commit()
 
-    if persist_directory is None:
-        persist_directory = os.path.join(current_dir, "chroma_db")
-
-    vectorstore = Chroma(
-        persist_directory=persist_directory,
-        embedding_function=embeddings,
+    print(
+        f"✅ Knowledgebase updated with {len(langchain_docs)} documents: "
+        f"{summary['chunks_added']} chunks added, {summary['chunks_removed']} removed, "
+        f"{summary['chunks_unchanged']} unchanged."
     )
-    vectorstore.add_documents(document_chunks)
-    print(f"✅ Knowledgebase updated with {len(documents)} documents.")
+    return summary
 
 
-def update_knowledge_base(persist_directory: str = None):
+def update_knowledge_base(persist_directory: str = None, progress=None):
     """
-    Loads all documents from the uploaded_docs directory, splits them into chunks,
-    and updates the Chroma vector store.
+    Brings the Chroma vector store in line with the uploaded_docs directory.
+    Files in uploaded_docs/bot_<id>/ are tagged with that bot_id, everything
+    else is shared.
+
+    A manifest of file hashes and chunk ids (see ingest_manifest.py) makes
+    this incremental: unchanged files are skipped, new or changed files are
+    split into chunks with stable ids and only chunks not already stored
+    are embedded, and chunks of changed or removed files that no longer
+    exist are deleted. Changed files are parsed in a process pool and
+    their chunks written in bounded batches (see ingest_pipeline.py).
+
+    progress, if given, is called as progress(files_done, files_total).
+    Returns counts of the changed files and the added and removed chunks.
     """
-    documents = []
-    if os.path.exists(faq_path):
-        faq_loader = TextLoader(faq_path, encoding="utf-8")
-        documents.extend(faq_loader.load())
-
-    for file in os.listdir(upload_dir):
-        file_path = os.path.join(upload_dir, file)
-        if file.endswith(".pdf"):
-            pdf_loader = PyPDFLoader(file_path)
-            documents.extend(pdf_loader.load())
-        elif file.endswith(".txt"):
-            text_loader = TextLoader(file_path, encoding="utf-8")
-            documents.extend(text_loader.load())
+    try:
+        faq_count = get_faq_index().build(list(list_faq_files()))
+        print(f"✅ FAQ fast path indexed {faq_count} questions.")
+    except Exception as e:
+        print(f"FAQ index update error: {e}")
 
-    if not documents:
-        print("No local documents to update in the knowledge base.")
-        return
+    writer = get_ingest_writer(persist_directory)
+    with writer.locked():
+        manifest = IngestManifest(os.path.join(writer.persist_directory, MANIFEST_FILE)).load()
+        vectorstore = writer.vectorstore
 
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200
-    )
-    document_chunks = text_splitter.split_documents(documents)
+        seen = set()
+        tasks = []
+        for file_path, bot_id in list_uploaded_files():
+            name = os.path.relpath(file_path, upload_dir)
+            content_hash = file_hash(file_path)
+            seen.add(name)
+            if not manifest.is_current(name, content_hash, bot_id):
+                tasks.append(FileTask(name, file_path, bot_id, content_hash))
 
-    if not document_chunks:
-        print("No document chunks to add to the knowledge base.")
-        return
+        added = deleted = 0
+        changed_files = len(tasks)
+        for name in [name for name in manifest.files if name not in seen]:
+            stale = manifest.remove(name)
+            writer.delete(stale)
+            deleted += len(stale)
+            changed_files += 1
 
-    if persist_directory is None:
-        persist_directory = os.path.join(current_dir, "../chroma_db")
+        buffer = ChunkBuffer(writer.write)
+        for done, parsed in enumerate(parse_files(tasks)):
+            if progress:
+                progress(done, len(tasks))
+            task, ids, chunks = parsed
 
-    # Initialize from directory to add to existing DB
-    vectorstore = Chroma(
-        persist_directory=persist_directory,
-        embedding_function=embeddings,
-    )
-    vectorstore.add_documents(document_chunks)
-    print("✅ Knowledgebase updated with FAQ + uploaded documents.")
+            previous = manifest.get(task.name)
+            if previous is None:
+                # Chunks added before the manifest existed have random ids;
+                # find them by source path so they are not left as duplicates
+                stale = vectorstore.get(where={"source": task.path}, include=[])["ids"]
+            else:
+                stale = previous["chunk_ids"]
+            current_ids = set(ids)
+            stale = [doc_id for doc_id in stale if doc_id not in current_ids]
+            writer.delete(stale)
+            deleted += len(stale)
+
+            # Every chunk is checked against the lexical index, so it stays
+            # complete even if an earlier run was cut short
+            writer.index(ids, chunks)
+
+            # Same id means same text at the same place, so only new ids are embedded
+            new_ids = writer.missing_ids(ids)
+            new_chunks = [(doc_id, chunk) for doc_id, chunk in zip(ids, chunks) if doc_id in new_ids]
+            added += len(new_chunks)
+            # The file is recorded once all of its chunks are in Chroma
+            buffer.add(
+                [doc_id for doc_id, _ in new_chunks],
+                [chunk for _, chunk in new_chunks],
+                on_written=lambda task=task, ids=ids: manifest.record(task.name, task.content_hash, task.bot_id, ids),
+            )
+
+        buffer.flush()
+        manifest.save()
+        if changed_files:
+            writer.commit()
+        if progress:
+            progress(len(tasks), len(tasks))
+
+    summary = {"files_changed": changed_files, "chunks_added": added, "chunks_removed": deleted}
+    if not changed_files:
+        print("Knowledge base is already up to date.")
+        return summary
+
+    print(f"✅ Knowledgebase updated: {changed_files} files changed, {added} chunks added, {deleted} removed.")
+    return summary
 
 # Initial update when the application starts
 # update_knowledge_base()
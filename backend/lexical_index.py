@@ -0,0 +1,321 @@
+import os
+import re
+import gzip
+import json
+import math
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from langchain.docstore.document import Document as LangchainDocument
+
+from backend import runtime
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves are serialized within the process only
+    fcntl = None
+
+# ----------------------------
+# Lexical (BM25) index
+# ----------------------------
+# gte-small often misses exact tokens such as product codes, plan names and
+# policy numbers, so every chunk written to Chroma is also indexed here.
+# The index is a gzip-compressed JSON file next to the Chroma store:
+#
+#   {"v": 1, "ids": [...], "texts": [...], "metadatas": [...],
+#    "lengths": [...], "postings": {term: [doc, tf, doc, tf, ...]}}
+#
+# Each process loads it once and reloads it only when the file changes,
+# so a lookup is a few dictionary reads per query term.
+#
+# Several processes may update the index. Adds and deletes not saved yet
+# are kept as pending operations and applied again whenever the file is
+# reloaded, and save() reloads, merges and writes under an exclusive lock
+# on "<index file>.lock", so one process's save never drops another's
+# changes.
+
+INDEX_VERSION = 1
+LEXICAL_INDEX_FILE = "bm25_index.json.gz"
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Common question words are ignored in queries, so "what is the ..." does
+# not match every chunk that contains "what", "is" or "the"
+STOPWORDS = frozenset("""
+a an and any are as at be but by can could do does for from had has have how i if in is it its me my
+no not of on or our please should so that the their them then there these they this those to us was
+we were what when where which who why will with would you your
+""".split())
+
+# Words plus codes like "PLAN-X200" or "4.5g"; codes also yield their parts
+TOKEN_PATTERN = re.compile(r"\w+(?:[-./]\w+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for match in TOKEN_PATTERN.findall(text.casefold()):
+        tokens.append(match)
+        if not match.isalnum():
+            tokens.extend(part for part in re.split(r"[-./]", match) if part)
+    return tokens
+
+
+class BM25Index:
+    def __init__(self, path: str):
+        self.path = path
+        self.ids: List[Optional[str]] = []
+        self.texts: List[str] = []
+        self.metadatas: List[dict] = []
+        self.lengths: List[int] = []
+        self.postings: Dict[str, List[int]] = {}
+        self.positions: Dict[str, int] = {}
+        self.total_length = 0
+        self.mtime = None
+        # (operation, ids, documents) applied since the last save
+        self._pending: List[Tuple[str, List[str], List[LangchainDocument]]] = []
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.positions)
+
+    @property
+    def average_length(self) -> float:
+        return self.total_length / len(self.positions) if self.positions else 0.0
+
+    # --- persistence ---
+
+    def load(self):
+        with self._lock:
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                return False
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("v") != INDEX_VERSION:
+                return False
+            self.ids = data["ids"]
+            self.texts = data["texts"]
+            self.metadatas = data["metadatas"]
+            self.lengths = data["lengths"]
+            self.postings = data["postings"]
+            self.positions = {doc_id: i for i, doc_id in enumerate(self.ids) if doc_id is not None}
+            self.total_length = sum(self.lengths[i] for i in self.positions.values())
+            self.mtime = mtime
+            # Changes not saved yet go on top of what is on disk
+            for operation, ids, documents in self._pending:
+                if operation == "add":
+                    self._add(ids, documents)
+                else:
+                    self._delete(ids)
+            return True
+
+    def reload_if_changed(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime != self.mtime:
+            self.load()
+
+    @contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(f"{self.path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def save(self):
+        with self._lock, self._file_lock():
+            # Merge what other processes saved since the last load
+            self.reload_if_changed()
+            self._compact()
+            data = {
+                "v": INDEX_VERSION,
+                "ids": self.ids,
+                "texts": self.texts,
+                "metadatas": self.metadatas,
+                "lengths": self.lengths,
+                "postings": self.postings,
+            }
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+            self.mtime = os.path.getmtime(self.path)
+            self._pending = []
+
+    # --- updates ---
+
+    def add(self, ids: Iterable[str], documents: Iterable[LangchainDocument]):
+        """Index chunks under the ids they were stored with in Chroma (re-adding an id replaces it)."""
+        with self._lock:
+            self.reload_if_changed()
+            ids = list(ids)
+            documents = list(documents)
+            self._add(ids, documents)
+            self._pending.append(("add", ids, documents))
+
+    def is_current(self, doc_id: str, document: LangchainDocument) -> bool:
+        """True if the chunk is already indexed under doc_id with the same text and metadata."""
+        with self._lock:
+            self.reload_if_changed()
+            position = self.positions.get(doc_id)
+            return (
+                position is not None
+                and self.texts[position] == document.page_content
+                and self.metadatas[position] == dict(document.metadata)
+            )
+
+    def delete(self, ids: Iterable[str]):
+        with self._lock:
+            self.reload_if_changed()
+            ids = list(ids)
+            self._delete(ids)
+            self._pending.append(("delete", ids, []))
+
+    def _add(self, ids: List[str], documents: List[LangchainDocument]):
+        self._remove(set(ids) & self.positions.keys())
+        for doc_id, document in zip(ids, documents):
+            position = len(self.ids)
+            tokens = tokenize(document.page_content)
+            self.ids.append(doc_id)
+            self.texts.append(document.page_content)
+            self.metadatas.append(dict(document.metadata))
+            self.lengths.append(len(tokens))
+            self.total_length += len(tokens)
+            self.positions[doc_id] = position
+            for term, tf in Counter(tokens).items():
+                self.postings.setdefault(term, []).extend((position, tf))
+
+    def _delete(self, ids: List[str]):
+        self._remove(set(ids) & self.positions.keys())
+
+    def _remove(self, ids: set):
+        # Removed chunks are tombstoned; save() compacts them away
+        for doc_id in ids:
+            position = self.positions.pop(doc_id)
+            self.ids[position] = None
+            self.total_length -= self.lengths[position]
+
+    def _compact(self):
+        if len(self.positions) == len(self.ids):
+            return
+        live = [i for i, doc_id in enumerate(self.ids) if doc_id is not None]
+        self.ids = [self.ids[i] for i in live]
+        self.texts = [self.texts[i] for i in live]
+        self.metadatas = [self.metadatas[i] for i in live]
+        self.lengths = [self.lengths[i] for i in live]
+        self.positions = {doc_id: i for i, doc_id in enumerate(self.ids)}
+        self.postings = {}
+        for position, text in enumerate(self.texts):
+            for term, tf in Counter(tokenize(text)).items():
+                self.postings.setdefault(term, []).extend((position, tf))
+
+    # --- search ---
+
+    def search(
+        self, query: str, k: int = 4, bot_ids: Iterable[int] = None, min_score: float = 0.0
+    ) -> List[Tuple[LangchainDocument, float]]:
+        """
+        Return the k best BM25 matches scoring at least min_score, optionally
+        limited to chunks of the given bot_ids. Stopwords in the query are ignored.
+        """
+        self.reload_if_changed()
+        with self._lock:
+            count = len(self.positions)
+            if not count:
+                return []
+            allowed = set(bot_ids) if bot_ids is not None else None
+            average_length = self.average_length or 1.0
+            scores = {}
+            for term in set(tokenize(query)) - STOPWORDS:
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                frequency = len(postings) // 2
+                idf = math.log(1 + (count - frequency + 0.5) / (frequency + 0.5))
+                for i in range(0, len(postings), 2):
+                    position, tf = postings[i], postings[i + 1]
+                    if self.ids[position] is None:
+                        continue
+                    if allowed is not None and self.metadatas[position].get("bot_id") not in allowed:
+                        continue
+                    norm = 1 - BM25_B + BM25_B * self.lengths[position] / average_length
+                    scores[position] = scores.get(position, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+
+            scores = {position: score for position, score in scores.items() if score >= min_score}
+            best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+            return [
+                (LangchainDocument(id=self.ids[p], page_content=self.texts[p], metadata=self.metadatas[p]), score)
+                for p, score in best
+            ]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def rebuild_from_vectorstore(index: BM25Index, persist_directory: str, batch_size: int = 1000):
+    """Index every chunk already stored in the Chroma collection."""
+    collection = runtime.get_vectorstore(persist_directory)._collection
+    offset = 0
+    while True:
+        batch = collection.get(include=["documents", "metadatas"], limit=batch_size, offset=offset)
+        if not batch["ids"]:
+            break
+        index.add(
+            batch["ids"],
+            [
+                LangchainDocument(page_content=text or "", metadata=metadata or {})
+                for text, metadata in zip(batch["documents"], batch["metadatas"])
+            ],
+        )
+        offset += len(batch["ids"])
+    index.save()
+    print(f"✅ Built lexical index with {len(index)} chunks.")
+
+
+def get_lexical_index(persist_directory: str = None) -> BM25Index:
+    """Return the process-wide BM25 index that belongs to a Chroma store."""
+    persist_directory = os.path.abspath(persist_directory or runtime.CHROMA_PERSIST_DIRECTORY)
+    with _indexes_lock:
+        index = _indexes.get(persist_directory)
+        if index is None:
+            index = BM25Index(os.path.join(persist_directory, LEXICAL_INDEX_FILE))
+            if not index.load() and os.path.exists(persist_directory):
+                rebuild_from_vectorstore(index, persist_directory)
+            _indexes[persist_directory] = index
+        return index
+
+
+def reset_lexical_index(persist_directory: str = None):
+    """Drop the index of a Chroma store so it is rebuilt on next use."""
+    persist_directory = os.path.abspath(persist_directory or runtime.CHROMA_PERSIST_DIRECTORY)
+    with _indexes_lock:
+        _indexes.pop(persist_directory, None)
+        path = os.path.join(persist_directory, LEXICAL_INDEX_FILE)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def reciprocal_rank_fusion(rankings: List[List[LangchainDocument]], k: int, rrf_k: int = 60) -> List[LangchainDocument]:
+    """Merge ranked lists by summing 1 / (rrf_k + rank) per document."""
+    scores = {}
+    documents = {}
+    for ranking in rankings:
+        for rank, document in enumerate(ranking, start=1):
+            key = document.id or document.page_content
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            documents.setdefault(key, document)
+    best = sorted(scores, key=scores.get, reverse=True)[:k]
+    return [documents[key] for key in best]
@@ -0,0 +1,84 @@
+import os
+import json
+import unicodedata
+
+# ----------------------------
+# Question normalization
+# ----------------------------
+# Questions are normalized before they are used as cache keys or embedded
+# for retrieval, so "What are your HOURS?? 🙂" and "what are your hours"
+# share one cache entry and one embedding. The LLM still sees the question
+# exactly as the user typed it.
+#
+# Steps: Unicode NFKC, case-folding, stripping of sentence punctuation,
+# emoji and format characters, optional spelling-variant replacement,
+# whitespace collapse. Symbols that change the meaning of a question
+# ("C++", "C#", "$50", "€50", "20%") and punctuation inside a token
+# ("4.5g", "plan-x200", "24/7") are kept, so such questions do not share
+# a cache key with a different question.
+
+QUESTION_NORMALIZATION_ENABLED = os.getenv("QUESTION_NORMALIZATION_ENABLED", "True").lower() == "true"
+NORMALIZATION_STRIP_PUNCTUATION = os.getenv("NORMALIZATION_STRIP_PUNCTUATION", "True").lower() == "true"
+# JSON file mapping spelling variants to a canonical form, e.g. {"colour": "color"}
+SPELLING_VARIANTS_FILE = os.getenv("SPELLING_VARIANTS_FILE", "")
+
+# Apostrophes are dropped rather than replaced, so "what's" becomes "whats"
+APOSTROPHES = {"'", "’", "ʼ", "`"}
+# Punctuation that is always kept (currency and math symbols are kept by category)
+KEPT_PUNCTUATION = set("#%&@")
+# Punctuation kept only between two letters or digits
+INNER_PUNCTUATION = set("-./:,")
+
+
+def load_spelling_variants(path: str) -> dict:
+    if not path:
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            variants = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Could not load spelling variants from {path}: {e}")
+        return {}
+    return {str(k).casefold(): str(v).casefold() for k, v in variants.items()}
+
+
+spelling_variants = load_spelling_variants(SPELLING_VARIANTS_FILE)
+
+
+def _strip_punctuation(text: str) -> str:
+    chars = []
+    for i, ch in enumerate(text):
+        if ch in APOSTROPHES:
+            continue
+        category = unicodedata.category(ch)
+        if ch in KEPT_PUNCTUATION or category in ("Sc", "Sm"):
+            chars.append(ch)
+        elif ch in INNER_PUNCTUATION:
+            inner = 0 < i < len(text) - 1 and text[i - 1].isalnum() and text[i + 1].isalnum()
+            chars.append(ch if inner else " ")
+        elif category[0] in "PSC" or "\ufe00" <= ch <= "\ufe0f":
+            # Sentence punctuation, emoji and skin tones (So, Sk), ZWJ and
+            # other format characters (C*), emoji variation selectors
+            chars.append(" ")
+        else:
+            chars.append(ch)
+    return "".join(chars)
+
+
+def normalize_question(text: str, variants: dict = None) -> str:
+    """Return the canonical form of a question used for cache keys and retrieval."""
+    if not text:
+        return ""
+    if not QUESTION_NORMALIZATION_ENABLED:
+        return text
+
+    variants = spelling_variants if variants is None else variants
+    folded = unicodedata.normalize("NFKC", text).casefold()
+
+    normalized = _strip_punctuation(folded) if NORMALIZATION_STRIP_PUNCTUATION else folded
+    words = normalized.split()
+    if variants:
+        words = [variants.get(word, word) for word in words]
+
+    # A question made only of punctuation or emoji keeps its folded form
+    return " ".join(words) or " ".join(folded.split())
@@ -0,0 +1,72 @@
+import os
+import threading
+
+# ----------------------------
+# ONNX Runtime embeddings backend
+# ----------------------------
+# sentence-transformers (>= 3.2, installed with the "onnx" extra) can run a
+# model through ONNX Runtime instead of PyTorch. The model is exported once
+# to ONNX_MODEL_DIR and, for the int8 backend, dynamically quantized with
+# the ONNX_QUANTIZATION_CONFIG instruction set (arm64, avx2, avx512 or
+# avx512_vnni). Later starts load the exported files directly.
+#
+#   pip install "sentence-transformers[onnx]>=3.2"
+#
+# Run backend/embedding_parity.py before switching EMBEDDING_BACKEND.
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", os.path.abspath(os.path.join(current_dir, "../onnx_models")))
+ONNX_QUANTIZATION_CONFIG = os.getenv("ONNX_QUANTIZATION_CONFIG", "avx2")
+
+_export_lock = threading.Lock()
+
+
+def onnx_model_dir(model_name: str) -> str:
+    return os.path.join(ONNX_MODEL_DIR, model_name.replace("/", "__"))
+
+
+def onnx_file_name(quantized: bool, quantization_config: str = ONNX_QUANTIZATION_CONFIG) -> str:
+    if quantized:
+        return f"onnx/model_qint8_{quantization_config}.onnx"
+    return "onnx/model.onnx"
+
+
+def ensure_onnx_model(model_name: str, quantized: bool = True, quantization_config: str = ONNX_QUANTIZATION_CONFIG) -> str:
+    """
+    Export (and optionally quantize) the model to ONNX unless that was
+    already done. Returns the local model directory.
+    """
+    model_dir = onnx_model_dir(model_name)
+    file_name = onnx_file_name(quantized, quantization_config)
+    if os.path.exists(os.path.join(model_dir, file_name)):
+        return model_dir
+
+    try:
+        from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+    except ImportError as e:
+        raise ImportError(
+            'The ONNX embedding backend needs "sentence-transformers[onnx]>=3.2".'
+        ) from e
+
+    with _export_lock:
+        if os.path.exists(os.path.join(model_dir, file_name)):
+            return model_dir
+
+        print(f"Exporting {model_name} to ONNX in {model_dir}...")
+        if not os.path.exists(os.path.join(model_dir, onnx_file_name(False))):
+            model = SentenceTransformer(model_name, backend="onnx", device="cpu")
+            model.save_pretrained(model_dir)
+        if quantized:
+            model = SentenceTransformer(model_dir, backend="onnx", device="cpu")
+            export_dynamic_quantized_onnx_model(model, quantization_config, model_dir)
+        print(f"✅ ONNX model ready: {os.path.join(model_dir, file_name)}")
+    return model_dir
+
+
+def onnx_model_kwargs(quantized: bool, quantization_config: str = ONNX_QUANTIZATION_CONFIG) -> dict:
+    """SentenceTransformer keyword arguments for loading the exported model."""
+    return {
+        "device": "cpu",
+        "backend": "onnx",
+        "model_kwargs": {"file_name": onnx_file_name(quantized, quantization_config)},
+    }
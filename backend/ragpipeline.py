@@ -1,89 +1,60 @@
 # ragpipeline.py
 import sys
-import pickle
 
 from dotenv import load_dotenv
-import redis
 from fastapi import Depends, HTTPException, APIRouter, Request
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.chains import create_retrieval_chain
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_chroma import Chroma
-from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
 from langchain.chains.combine_documents import create_stuff_documents_chain
 
 from auth.auth import SECRET_KEY, ALGORITHM
 from database.sessions import get_db
 from database.database import get_user_by_email, Conversation
-from .knowledgebase import embeddings
+from . import runtime
+from .answer_cache import AnswerCache
+from .normalization import normalize_question
+from .retrieval import RetrievalSettings, build_retriever
 
 load_dotenv()
 
-# Initialize the language model
-model = ChatGoogleGenerativeAI(
-    model="gemini-2.0-flash",
-    temperature=0.3,
-    max_tokens=None,
-    timeout=None,
-    max_retries=2,
-    callbacks=[StreamingStdOutCallbackHandler()],
-)
+# Shared language model from the runtime registry
+model = runtime.get_llm()
 llm = model
 
 # Define the system prompt template
-system_prompt = ChatPromptTemplate.from_template(
-    """
+system_prompt_text = """
 Answer the user's question based on the following context, whatever language they are typing decode the words well and try to answer it in english only.
 If you don't know the answer, just say that you don't know and ask them that can you flag this for human assistance.
 
 Context: {context}
 Question: {input}
 """
-)
+system_prompt = ChatPromptTemplate.from_template(system_prompt_text)
 
-# Initialize vector store
-vectorstore = Chroma(persist_directory="chroma_db", embedding_function=embeddings)
-
-# Connect to Redis for caching
-try:
-    cache = redis.Redis(host="localhost", port=6379, db=0, decode_responses=False)
-    cache.ping()  # Test the connection
-    print("Redis connection successful")
-except redis.ConnectionError:
-    print("Redis connection failed, caching will be disabled")
-    cache = None
+# Shared vector store and Redis connection
+vectorstore = runtime.get_vectorstore()
+cache = runtime.get_redis()
+retrieval_settings = RetrievalSettings.for_bot("ragpipeline")
+answer_cache = AnswerCache("ragpipeline", system_prompt_text + retrieval_settings.model_dump_json())
 
 
 def get_cached_answer(query):
     """Retrieve cached answer from Redis"""
-    if not cache:
-        return None
-    try:
-        cached = cache.get(query)
-        if cached:
-            return pickle.loads(cached)
-    except Exception as e:
-        print(f"Cache retrieval error: {e}")
-    return None
+    return answer_cache.get(query)
 
 
 def set_cached_answer(query, answer):
     """Store answer in Redis cache"""
-    if not cache:
-        return
-    try:
-        cache.set(query, pickle.dumps(answer), ex=3600)  # expires in 1 hour
-    except Exception as e:
-        print(f"Cache storage error: {e}")
+    answer_cache.set(query, answer)
 
 
 # Initialize retrieval chain
-retriever = vectorstore.as_retriever(search_type="similarity")
+retriever = build_retriever(vectorstore, retrieval_settings)
 document_chain = create_stuff_documents_chain(llm, system_prompt)
 retrieval_chain = create_retrieval_chain(retriever, document_chain)
 
@@ -161,14 +132,15 @@ def ask_question(
 ):
     """Handle user questions and return AI-generated answers"""
     question = request.question
-    cached = get_cached_answer(question)
+    query = normalize_question(question)
+    cached = get_cached_answer(query)
 
     if cached:
         answer = cached["answer"]
     else:
-        result = retrieval_chain.invoke({"input": question})
+        result = retrieval_chain.invoke({"input": question, "query": query})
         answer = result["answer"]
-        set_cached_answer(question, result)
+        set_cached_answer(query, result)
 
     # Save the user's question
     save_conversation(
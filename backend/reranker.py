@@ -0,0 +1,122 @@
+import os
+import time
+import threading
+from typing import List
+
+from langchain.docstore.document import Document as LangchainDocument
+
+# ----------------------------
+# Cross-encoder reranking
+# ----------------------------
+# Optional second stage after retrieval: a small CPU cross-encoder scores
+# each (question, chunk) pair and only the best chunks reach the prompt.
+# Scoring runs in batches against a per-request time budget. If the next
+# batch would not fit in the budget, or the model is still loading, the
+# candidates are returned in retrieval order instead, so reranking never
+# adds more than the budget to a request.
+#
+# Needs sentence-transformers (installed with langchain-huggingface).
+
+RERANKER_MODEL = os.getenv("RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "16"))
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "150"))
+
+
+class CrossEncoderReranker:
+    def __init__(self, model_name: str = RERANKER_MODEL, batch_size: int = RERANK_BATCH_SIZE):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.reranked = 0
+        self.fallbacks = 0
+        self._model = None
+        self._loading = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    def load(self):
+        if self._model is not None:
+            return self._model
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import CrossEncoder
+
+                self._model = CrossEncoder(self.model_name, device="cpu")
+        return self._model
+
+    def load_in_background(self):
+        """Start loading the model without making the current request wait for it."""
+        with self._lock:
+            if self._model is not None or self._loading:
+                return
+            self._loading = True
+
+        def run():
+            try:
+                self.load()
+            except Exception as e:
+                print(f"Reranker model failed to load: {e}")
+            finally:
+                self._loading = False
+
+        threading.Thread(target=run, name="reranker-loader", daemon=True).start()
+
+    def stats(self) -> dict:
+        return {"reranked": self.reranked, "fallbacks": self.fallbacks}
+
+    def rerank(
+        self,
+        query: str,
+        documents: List[LangchainDocument],
+        top_n: int,
+        budget_ms: float = RERANK_BUDGET_MS,
+    ) -> List[LangchainDocument]:
+        """Return the top_n documents by cross-encoder score, or in their given order if over budget."""
+        if len(documents) <= 1:
+            return documents[:top_n]
+        if not self.is_loaded:
+            self.load_in_background()
+            self.fallbacks += 1
+            return documents[:top_n]
+
+        deadline = time.monotonic() + budget_ms / 1000.0
+        scores = []
+        batch_seconds = 0.0
+        for start in range(0, len(documents), self.batch_size):
+            now = time.monotonic()
+            # Stop if the next batch is not expected to finish in time
+            if now + batch_seconds > deadline:
+                self.fallbacks += 1
+                return documents[:top_n]
+            batch = documents[start:start + self.batch_size]
+            try:
+                scores.extend(self._model.predict(
+                    [(query, document.page_content) for document in batch],
+                    batch_size=len(batch),
+                    show_progress_bar=False,
+                ))
+            except Exception as e:
+                print(f"Reranking error: {e}")
+                self.fallbacks += 1
+                return documents[:top_n]
+            batch_seconds = time.monotonic() - now
+
+        self.reranked += 1
+        order = sorted(range(len(documents)), key=lambda i: scores[i], reverse=True)
+        return [documents[i] for i in order[:top_n]]
+
+
+_rerankers = {}
+_rerankers_lock = threading.Lock()
+
+
+def get_reranker(model_name: str = RERANKER_MODEL) -> CrossEncoderReranker:
+    """Return the process-wide reranker for a model."""
+    with _rerankers_lock:
+        reranker = _rerankers.get(model_name)
+        if reranker is None:
+            reranker = CrossEncoderReranker(model_name)
+            _rerankers[model_name] = reranker
+        return reranker
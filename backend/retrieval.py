@@ -0,0 +1,192 @@
+import os
+import json
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, Field
+from langchain_core.runnables import Runnable, RunnableLambda
+from langchain.docstore.document import Document as LangchainDocument
+
+from backend.lexical_index import get_lexical_index, reciprocal_rank_fusion
+from backend.reranker import get_reranker, RERANKER_MODEL, RERANK_BUDGET_MS
+
+# ----------------------------
+# Retrieval settings
+# ----------------------------
+# How many chunks a bot retrieves and how much of them reaches the prompt.
+# Defaults come from the RETRIEVAL_* variables; RETRIEVAL_SETTINGS_JSON can
+# override them per bot type, e.g.
+#
+#   RETRIEVAL_SETTINGS_JSON={"Retail Bot": {"k": 3, "search_type": "similarity_score_threshold", "score_threshold": 0.8}}
+#
+# and a bot may pass its own settings to BaseBot.
+
+# Rough size of a token for Gemini-style tokenizers, used for the context budget
+CHARS_PER_TOKEN = 4
+
+# Chunks tagged with this bot_id are shared by every bot
+SHARED_BOT_ID = 0
+
+
+def bot_filter(bot_id: int) -> dict:
+    """Chroma metadata filter for the chunks a bot may retrieve."""
+    return {"bot_id": {"$in": [int(bot_id), SHARED_BOT_ID]}}
+
+
+def _optional_float(name: str) -> Optional[float]:
+    value = os.getenv(name)
+    return float(value) if value else None
+
+
+def _optional_int(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+class RetrievalSettings(BaseModel):
+    search_type: Literal["similarity", "mmr", "similarity_score_threshold"] = "similarity"
+    k: int = Field(default=4, ge=1)
+    # Candidates MMR picks k diverse chunks from
+    fetch_k: int = Field(default=20, ge=1)
+    # Minimum relevance (0-1) for similarity_score_threshold
+    score_threshold: Optional[float] = Field(default=None, ge=0, le=1)
+    # MMR trade-off: 1 = pure relevance, 0 = maximum diversity
+    lambda_mult: float = Field(default=0.5, ge=0, le=1)
+    # Upper bound on the estimated tokens of retrieved context; None = no limit
+    max_context_tokens: Optional[int] = Field(default=None, ge=1)
+    # Fuse BM25 matches with the vector results (reciprocal rank fusion)
+    hybrid: bool = True
+    rrf_k: int = Field(default=60, ge=1)
+    # BM25 matches scoring below this are not fused in
+    lexical_min_score: float = Field(default=0.0, ge=0)
+    # Rerank a wider candidate set with a cross-encoder and keep the best k
+    rerank: bool = False
+    rerank_candidates: int = Field(default=20, ge=1)
+    rerank_budget_ms: float = Field(default=RERANK_BUDGET_MS, gt=0)
+    reranker_model: str = RERANKER_MODEL
+
+    @classmethod
+    def from_env(cls) -> "RetrievalSettings":
+        values = {
+            "search_type": os.getenv("RETRIEVAL_SEARCH_TYPE"),
+            "k": _optional_int("RETRIEVAL_K"),
+            "fetch_k": _optional_int("RETRIEVAL_FETCH_K"),
+            "score_threshold": _optional_float("RETRIEVAL_SCORE_THRESHOLD"),
+            "lambda_mult": _optional_float("RETRIEVAL_MMR_LAMBDA"),
+            "max_context_tokens": _optional_int("RETRIEVAL_MAX_CONTEXT_TOKENS"),
+            "hybrid": os.getenv("RETRIEVAL_HYBRID", "True").lower() == "true",
+            "lexical_min_score": _optional_float("RETRIEVAL_BM25_MIN_SCORE"),
+            "rerank": os.getenv("RETRIEVAL_RERANK", "False").lower() == "true",
+            "rerank_candidates": _optional_int("RERANK_CANDIDATES"),
+        }
+        return cls(**{name: value for name, value in values.items() if value is not None})
+
+    @classmethod
+    def for_bot(cls, bot_type: str, overrides: "RetrievalSettings" = None) -> "RetrievalSettings":
+        """Environment defaults, then RETRIEVAL_SETTINGS_JSON for bot_type, then overrides."""
+        settings = cls.from_env().model_dump()
+        try:
+            per_bot = json.loads(os.getenv("RETRIEVAL_SETTINGS_JSON") or "{}")
+        except ValueError as e:
+            print(f"Invalid RETRIEVAL_SETTINGS_JSON: {e}")
+            per_bot = {}
+        settings.update(per_bot.get(bot_type, {}))
+        if overrides is not None:
+            settings.update(overrides.model_dump(exclude_unset=True))
+        return cls(**settings)
+
+    @property
+    def candidate_k(self) -> int:
+        """How many chunks the search returns before reranking (if any)."""
+        return max(self.rerank_candidates, self.k) if self.rerank else self.k
+
+    def search_kwargs(self, filter: dict = None) -> dict:
+        kwargs = {"k": self.candidate_k}
+        if self.search_type == "mmr":
+            kwargs["fetch_k"] = max(self.fetch_k, self.candidate_k)
+            kwargs["lambda_mult"] = self.lambda_mult
+        elif self.search_type == "similarity_score_threshold":
+            kwargs["score_threshold"] = self.score_threshold if self.score_threshold is not None else 0.0
+        if filter:
+            kwargs["filter"] = filter
+        return kwargs
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def trim_to_budget(documents: List[LangchainDocument], max_tokens: Optional[int]) -> List[LangchainDocument]:
+    """
+    Keep the best-ranked chunks that fit in max_tokens. The first chunk is
+    always kept (cut down if it alone is over budget) so the prompt is
+    never left without context when something was retrieved.
+    """
+    if not max_tokens or not documents:
+        return documents
+
+    kept = []
+    used = 0
+    for document in documents:
+        tokens = estimate_tokens(document.page_content)
+        if used + tokens > max_tokens:
+            if not kept:
+                kept.append(LangchainDocument(
+                    page_content=document.page_content[: max_tokens * CHARS_PER_TOKEN],
+                    metadata=document.metadata,
+                ))
+            break
+        kept.append(document)
+        used += tokens
+    return kept
+
+
+def build_retriever(
+    vectorstore,
+    settings: RetrievalSettings,
+    bot_id: int = None,
+    persist_directory: str = None,
+) -> Runnable:
+    """
+    Retriever for create_retrieval_chain: searches with the normalized
+    question ("query") when given, optionally fuses the vector results with
+    BM25 matches for the question as typed ("input") and reranks them, then
+    trims the chunks to the budget.
+    With a bot_id, only that bot's and the shared chunks are searched.
+    Under similarity_score_threshold search, BM25 matches only reorder the
+    chunks that passed the threshold and never add chunks of their own.
+    """
+    filter = bot_filter(bot_id) if bot_id is not None else None
+    candidate_k = settings.candidate_k
+    select_query = RunnableLambda(lambda x: x.get("query") or x["input"])
+    retriever = vectorstore.as_retriever(search_type=settings.search_type, search_kwargs=settings.search_kwargs(filter))
+    trim = RunnableLambda(lambda documents: trim_to_budget(documents, settings.max_context_tokens))
+
+    if settings.hybrid:
+        bot_ids = [int(bot_id), SHARED_BOT_ID] if bot_id is not None else None
+        thresholded = settings.search_type == "similarity_score_threshold"
+
+        def lexical_search(x: dict) -> List[LangchainDocument]:
+            matches = get_lexical_index(persist_directory).search(
+                x["input"], k=candidate_k, bot_ids=bot_ids, min_score=settings.lexical_min_score
+            )
+            return [document for document, _ in matches]
+
+        def fuse(results: dict) -> List[LangchainDocument]:
+            lexical = results["lexical"]
+            if thresholded:
+                passed = {document.id or document.page_content for document in results["vector"]}
+                lexical = [document for document in lexical if (document.id or document.page_content) in passed]
+            return reciprocal_rank_fusion([results["vector"], lexical], k=candidate_k, rrf_k=settings.rrf_k)
+
+        search = {"vector": select_query | retriever, "lexical": RunnableLambda(lexical_search)} | RunnableLambda(fuse)
+    else:
+        search = select_query | retriever
+
+    if not settings.rerank:
+        return search | trim
+
+    reranker = get_reranker(settings.reranker_model)
+    rerank = RunnableLambda(
+        lambda x: reranker.rerank(x["query"], x["documents"], top_n=settings.k, budget_ms=settings.rerank_budget_ms)
+    )
+    return {"query": select_query, "documents": search} | rerank | trim
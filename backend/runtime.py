@@ -0,0 +1,94 @@
+import os
+import threading
+
+from dotenv import load_dotenv
+import redis
+from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_chroma import Chroma
+from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
+
+load_dotenv()
+
+# ----------------------------
+# Shared runtime registry
+# ----------------------------
+# Every bot used to build its own LLM client, Chroma handle and Redis
+# connection. The helpers below hand out one instance per process (per
+# configuration) so all bots share them.
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+CHROMA_PERSIST_DIRECTORY = os.path.abspath(os.path.join(current_dir, "../chroma_db"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+DEFAULT_LLM_MODEL = "gemini-2.0-flash"
+DEFAULT_LLM_TEMPERATURE = 0.3
+
+_lock = threading.RLock()
+_llms = {}
+_vectorstores = {}
+_redis_client = None
+_redis_checked = False
+
+
+def get_embeddings():
+    """Return the process-wide embeddings model."""
+    from backend.knowledgebase import embeddings
+
+    return embeddings
+
+
+def get_llm(model: str = DEFAULT_LLM_MODEL, temperature: float = DEFAULT_LLM_TEMPERATURE, max_retries: int = 2):
+    """Return the shared chat model for a given model configuration."""
+    key = (model, temperature, max_retries)
+    with _lock:
+        llm = _llms.get(key)
+        if llm is None:
+            llm = ChatGoogleGenerativeAI(
+                model=model,
+                temperature=temperature,
+                max_tokens=None,
+                timeout=None,
+                max_retries=max_retries,
+                callbacks=[StreamingStdOutCallbackHandler()],
+            )
+            _llms[key] = llm
+        return llm
+
+
+def get_vectorstore(persist_directory: str = None, collection_name: str = None, collection_metadata: dict = None):
+    """Return the shared Chroma handle for a persist directory and collection."""
+    if persist_directory is None:
+        persist_directory = CHROMA_PERSIST_DIRECTORY
+    key = (os.path.abspath(persist_directory), collection_name)
+    with _lock:
+        vectorstore = _vectorstores.get(key)
+        if vectorstore is None:
+            kwargs = {"collection_name": collection_name} if collection_name else {}
+            vectorstore = Chroma(
+                persist_directory=key[0],
+                embedding_function=get_embeddings(),
+                collection_metadata=collection_metadata,
+                **kwargs,
+            )
+            _vectorstores[key] = vectorstore
+        return vectorstore
+
+
+def get_redis():
+    """
+    Return a Redis client backed by a single shared connection pool,
+    or None if Redis is unreachable. The connection is only checked once.
+    """
+    global _redis_client, _redis_checked
+    with _lock:
+        if not _redis_checked:
+            _redis_checked = True
+            try:
+                client = redis.Redis.from_url(REDIS_URL, decode_responses=False)
+                client.ping()
+                print("Redis connection successful")
+                _redis_client = client
+            except redis.ConnectionError:
+                print("Redis connection failed, caching will be disabled")
+                _redis_client = None
+        return _redis_client
@@ -0,0 +1,119 @@
+import os
+import time
+import hashlib
+import threading
+from typing import Optional
+
+from backend import runtime
+from backend.answer_cache import get_kb_version, prompt_hash
+
+# ----------------------------
+# Semantic answer cache
+# ----------------------------
+# Previously answered questions are embedded with the shared gte-small
+# embeddings and stored in their own Chroma collection, tagged by bot,
+# prompt and knowledge base version.
+# A new question whose nearest neighbour for the same bot is at least
+# SEMANTIC_CACHE_THRESHOLD cosine-similar reuses that answer and skips
+# both retrieval and the LLM.
+#
+# Entries of older knowledge base versions and entries past their TTL are
+# deleted by prune(), which add() runs when it sees a new version and at
+# most every SEMANTIC_CACHE_PRUNE_INTERVAL seconds otherwise, so the
+# collection does not grow without bound.
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "True").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_TTL = int(os.getenv("SEMANTIC_CACHE_TTL", "86400"))
+SEMANTIC_CACHE_PRUNE_INTERVAL = int(os.getenv("SEMANTIC_CACHE_PRUNE_INTERVAL", "600"))
+SEMANTIC_CACHE_COLLECTION = "semantic_answer_cache"
+
+_prune_lock = threading.Lock()
+_pruned_at = 0.0
+_pruned_version = None
+
+
+def get_cache_collection():
+    return runtime.get_vectorstore(
+        collection_name=SEMANTIC_CACHE_COLLECTION,
+        collection_metadata={"hnsw:space": "cosine"},
+    )
+
+
+def prune(kb_version: int = None, ttl: int = SEMANTIC_CACHE_TTL):
+    """Delete cached answers of older knowledge base versions and answers older than ttl."""
+    global _pruned_at, _pruned_version
+    kb_version = get_kb_version() if kb_version is None else kb_version
+    with _prune_lock:
+        try:
+            get_cache_collection()._collection.delete(where={"$or": [
+                {"kb_version": {"$lt": kb_version}},
+                {"created_at": {"$lt": time.time() - ttl}},
+            ]})
+        except Exception as e:
+            print(f"Semantic cache pruning error: {e}")
+        _pruned_at = time.monotonic()
+        _pruned_version = kb_version
+
+
+def prune_if_due(kb_version: int):
+    if kb_version != _pruned_version or time.monotonic() - _pruned_at > SEMANTIC_CACHE_PRUNE_INTERVAL:
+        prune(kb_version)
+
+
+class SemanticCache:
+    def __init__(self, namespace: str, prompt: str, threshold: float = None, ttl: int = None):
+        self.namespace = f"{namespace.strip().lower().replace(' ', '_')}:{prompt_hash(prompt)}"
+        self.threshold = SEMANTIC_CACHE_THRESHOLD if threshold is None else threshold
+        self.ttl = SEMANTIC_CACHE_TTL if ttl is None else ttl
+
+    @property
+    def collection(self):
+        return get_cache_collection()
+
+    def _entry_id(self, question: str, kb_version: int) -> str:
+        return hashlib.sha256(f"{self.namespace}:v{kb_version}\x00{question}".encode("utf-8")).hexdigest()
+
+    def lookup(self, question: str) -> Optional[str]:
+        """Return the answer of the closest cached question, if similar enough."""
+        try:
+            matches = self.collection.similarity_search_with_score(
+                question,
+                k=1,
+                filter={"$and": [{"namespace": self.namespace}, {"kb_version": get_kb_version()}]},
+            )
+        except Exception as e:
+            print(f"Semantic cache retrieval error: {e}")
+            return None
+
+        if not matches:
+            return None
+
+        document, distance = matches[0]
+        similarity = 1.0 - distance
+        if similarity < self.threshold:
+            return None
+
+        if time.time() - document.metadata.get("created_at", 0) > self.ttl:
+            return None
+
+        print(f"Semantic cache hit ({similarity:.3f}): '{question}' ~ '{document.page_content}'")
+        return document.metadata.get("answer")
+
+    def add(self, question: str, answer: str):
+        """Remember the answer given to a question."""
+        kb_version = get_kb_version()
+        prune_if_due(kb_version)
+        try:
+            self.collection.add_texts(
+                texts=[question],
+                metadatas=[{
+                    "namespace": self.namespace,
+                    "kb_version": kb_version,
+                    "answer": answer,
+                    "created_at": time.time(),
+                }],
+                ids=[self._entry_id(question, kb_version)],
+            )
+        except Exception as e:
+            print(f"Semantic cache storage error: {e}")
@@ -0,0 +1,187 @@
+import os
+import time
+import uuid
+import asyncio
+import threading
+
+# ----------------------------
+# Request coalescing
+# ----------------------------
+# When many users ask the same question at once, only the first request
+# (the leader) calls the LLM; concurrent identical requests wait for it and
+# share its result. SingleFlight does this for threads (sync routes) and
+# AsyncSingleFlight for coroutines on the event loop. RedisFlightLock
+# optionally extends it across workers: the worker holding the lock
+# generates the answer and the others wait for it to land in the cache.
+
+SINGLEFLIGHT_DISTRIBUTED = os.getenv("SINGLEFLIGHT_DISTRIBUTED", "False").lower() == "true"
+SINGLEFLIGHT_LOCK_TTL = float(os.getenv("SINGLEFLIGHT_LOCK_TTL", "60"))
+SINGLEFLIGHT_WAIT_TIMEOUT = float(os.getenv("SINGLEFLIGHT_WAIT_TIMEOUT", "30"))
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """Run fn() once for all concurrent callers with the same key."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    """
+    The shared work runs in a task of its own (spawn), not inside the
+    leader's request, so a leader whose client disconnects does not take
+    the waiting requests down with it.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._tasks = set()
+
+    def begin(self, key):
+        """
+        Join the flight for key. Returns (future, is_leader); the leader must
+        call complete() once it has a result or an error.
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            return future, False
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        return future, True
+
+    def complete(self, key, future, result=None, error: BaseException = None):
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        if future.done():
+            return
+        if isinstance(error, asyncio.CancelledError):
+            future.cancel()
+        elif error is not None:
+            future.set_exception(error)
+            # Avoid "exception was never retrieved" warnings without followers
+            future.exception()
+        else:
+            future.set_result(result)
+
+    def spawn(self, coro) -> asyncio.Task:
+        """Run coro in its own task, which keeps running if the caller that started it is cancelled."""
+        task = asyncio.ensure_future(coro)
+        # The event loop only keeps weak references to tasks
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def do(self, key, fn):
+        """Await fn() once for all concurrent callers with the same key."""
+        future, leader = self.begin(key)
+        if leader:
+            async def run():
+                try:
+                    result = await fn()
+                except BaseException as e:
+                    self.complete(key, future, error=e)
+                    return
+                self.complete(key, future, result=result)
+
+            self.spawn(run())
+        return await asyncio.shield(future)
+
+
+class RedisFlightLock:
+    """Cross-worker leader election for a flight, backed by SET NX PX."""
+
+    # Only delete the lock if we still own it
+    RELEASE_SCRIPT = """
+    if redis.call("get", KEYS[1]) == ARGV[1] then
+        return redis.call("del", KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(self, get_redis, lock_ttl: float = 60, wait_timeout: float = 30, poll_interval: float = 0.1):
+        self.get_redis = get_redis
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+
+    def _lock_key(self, key: str) -> str:
+        return f"flight:{key}"
+
+    def acquire(self, key: str):
+        """Return a token if this worker is now the leader for key, else None."""
+        cache = self.get_redis()
+        if not cache:
+            return str(uuid.uuid4())
+        token = str(uuid.uuid4())
+        try:
+            if cache.set(self._lock_key(key), token, nx=True, px=int(self.lock_ttl * 1000)):
+                return token
+            return None
+        except Exception as e:
+            print(f"Flight lock error: {e}")
+            return token
+
+    def release(self, key: str, token: str):
+        cache = self.get_redis()
+        if not cache:
+            return
+        try:
+            cache.eval(self.RELEASE_SCRIPT, 1, self._lock_key(key), token)
+        except Exception as e:
+            print(f"Flight lock release error: {e}")
+
+    def is_held(self, key: str) -> bool:
+        cache = self.get_redis()
+        if not cache:
+            return False
+        try:
+            return bool(cache.exists(self._lock_key(key)))
+        except Exception:
+            return False
+
+    def wait(self, key: str, check):
+        """
+        Poll check() while another worker holds the lock for key. Returns the
+        first non-None value, or None if the lock went away or timed out.
+        """
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            result = check()
+            if result is not None:
+                return result
+            if not self.is_held(key):
+                return check()
+            time.sleep(self.poll_interval)
+        return None
@@ -1,15 +1,94 @@
 import os
+import json
+import time
 import logging
+import argparse
 from dotenv import load_dotenv
 
+from backend import runtime
 from backend.connectors.hubspot import HubSpotConnector
 from backend.knowledgebase import add_documents_to_knowledge_base
+from backend.ingest_writer import get_ingest_writer
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# We specify only the object types that are available in your HubSpot account.
+OBJECT_TYPES = ["contacts", "companies", "deals"]
+
+# ----------------------------
+# Incremental sync checkpoint
+# ----------------------------
+# Per object type, the time up to which HubSpot changes are in the
+# knowledge base. An incremental sync only searches for records modified
+# since then (minus a small overlap for HubSpot's search indexing delay).
+# Results come oldest first, so the checkpoint also advances every few
+# batches, and a sync that crashes resumes close to where it stopped.
+#
+#   {"v": 1, "object_types": {"contacts": <seconds since epoch>, ...}}
+
+SYNC_STATE_VERSION = 1
+HUBSPOT_SYNC_STATE_FILE = os.getenv(
+    "HUBSPOT_SYNC_STATE_FILE", os.path.join(runtime.CHROMA_PERSIST_DIRECTORY, "hubspot_sync_state.json")
+)
+HUBSPOT_SYNC_OVERLAP_SECONDS = float(os.getenv("HUBSPOT_SYNC_OVERLAP_SECONDS", "300"))
+# Connector batches written between checkpoints
+HUBSPOT_CHECKPOINT_EVERY = int(os.getenv("HUBSPOT_CHECKPOINT_EVERY", "10"))
+
+
+def load_sync_state(path: str = HUBSPOT_SYNC_STATE_FILE) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data.get("object_types", {}) if data.get("v") == SYNC_STATE_VERSION else {}
+
+
+def save_sync_state(state: dict, path: str = HUBSPOT_SYNC_STATE_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"v": SYNC_STATE_VERSION, "object_types": state}, f)
+    os.replace(tmp_path, path)
+
+
+def sync_object_type(connector: HubSpotConnector, object_type: str, state: dict):
+    """Add the records of one object type changed since its checkpoint, then move the checkpoint."""
+    writer = get_ingest_writer()
+    end = time.time()
+    synced_until = state.get(object_type)
+    start = max(0.0, synced_until - HUBSPOT_SYNC_OVERLAP_SECONDS) if synced_until is not None else 0.0
+    logger.info(f"Syncing HubSpot {object_type} modified since {time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(start))} UTC...")
+
+    batches = 0
+    try:
+        for batch in connector.poll_object_type(object_type, start, end):
+            if not batch:
+                continue
+            add_documents_to_knowledge_base(batch, commit=False)
+            logger.info(f"Added a batch of {len(batch)} {object_type} to the knowledge base.")
+            batches += 1
+            if batches % HUBSPOT_CHECKPOINT_EVERY == 0:
+                writer.commit()
+                checkpoint = max((doc.doc_updated_at.timestamp() for doc in batch if doc.doc_updated_at), default=None)
+                if checkpoint is not None:
+                    state[object_type] = checkpoint
+                    save_sync_state(state)
+    finally:
+        # Keep the lexical index in step with what reached Chroma, even on errors
+        writer.commit()
+
+    state[object_type] = end
+    save_sync_state(state)
+
+
 def main():
     """Syncs HubSpot data to the knowledge base."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--full", action="store_true", help="re-read every record instead of only the changed ones")
+    args = parser.parse_args()
+
     load_dotenv()
 
     access_token = os.getenv("HUBSPOT_ACCESS_TOKEN")
@@ -18,17 +97,26 @@ def main():
         return
 
     try:
-        # We specify only the object types that are available in your HubSpot account.
-        connector = HubSpotConnector(object_types=["contacts", "companies", "deals"])
+        connector = HubSpotConnector(object_types=OBJECT_TYPES)
         connector.load_credentials({"hubspot_access_token": access_token})
 
-        logger.info("Starting HubSpot data sync...")
-        document_batches = connector.load_from_state()
-
-        for batch in document_batches:
-            if batch:
-                add_documents_to_knowledge_base(batch)
-                logger.info(f"Added a batch of {len(batch)} documents to the knowledge base.")
+        if args.full:
+            logger.info("Starting full HubSpot data sync...")
+            started = time.time()
+            try:
+                for batch in connector.load_from_state():
+                    if batch:
+                        add_documents_to_knowledge_base(batch, commit=False)
+                        logger.info(f"Added a batch of {len(batch)} documents to the knowledge base.")
+            finally:
+                # Save the lexical index and invalidate cached answers once for the whole sync
+                get_ingest_writer().commit()
+            save_sync_state({object_type: started for object_type in OBJECT_TYPES})
+        else:
+            logger.info("Starting incremental HubSpot data sync...")
+            state = load_sync_state()
+            for object_type in OBJECT_TYPES:
+                sync_object_type(connector, object_type, state)
 
         logger.info("HubSpot data sync finished.")
 
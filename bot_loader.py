@@ -1,25 +1,59 @@
 # bot_loader.py
-from bots.retail_bot import retail_bot
-from bots.telecom_bot import telecom_bot
-from bots.course_enrollment_bot import course_enrollment_bot
-from bots.career_counselling_bot import career_counselling_bot
-from bots.lead_capturing_bot import lead_capturing_bot
-from bots.insurance_bot import insurance_bot
-from bots.hotel_booking_bot import hotel_booking_bot
-from bots.banking_bot import banking_bot
-from bots.real_estate_bot import real_estate_bot
-
-BOTS = {
-    "Retail Bot": retail_bot,
-    "Telecom bot": telecom_bot,
-    "Course Enrollment bot": course_enrollment_bot,
-    "Career Counselling Bot": career_counselling_bot,
-    "Lead Capturing Bot": lead_capturing_bot,
-    "Insurance Bot": insurance_bot,
-    "Hotel Booking Bot": hotel_booking_bot,
-    "Banking Bot": banking_bot,
-    "Real estate bot": real_estate_bot,
+import importlib
+import threading
+
+# Bot modules are only imported (and their bots built) the first time a
+# bot type is requested, so a worker only pays for the bots it serves.
+BOT_MODULES = {
+    "Retail Bot": ("bots.retail_bot", "retail_bot"),
+    "Telecom bot": ("bots.telecom_bot", "telecom_bot"),
+    "Course Enrollment bot": ("bots.course_enrollment_bot", "course_enrollment_bot"),
+    "Career Counselling Bot": ("bots.career_counselling_bot", "career_counselling_bot"),
+    "Lead Capturing Bot": ("bots.lead_capturing_bot", "lead_capturing_bot"),
+    "Insurance Bot": ("bots.insurance_bot", "insurance_bot"),
+    "Hotel Booking Bot": ("bots.hotel_booking_bot", "hotel_booking_bot"),
+    "Banking Bot": ("bots.banking_bot", "banking_bot"),
+    "Real estate bot": ("bots.real_estate_bot", "real_estate_bot"),
 }
 
+BOTS = {}
+_lock = threading.Lock()
+
+
 def get_bot_by_type(bot_type: str):
-    return BOTS.get(bot_type)
+    bot = BOTS.get(bot_type)
+    if bot is not None:
+        return bot
+
+    target = BOT_MODULES.get(bot_type)
+    if target is None:
+        return None
+
+    with _lock:
+        if bot_type not in BOTS:
+            module_name, attribute = target
+            BOTS[bot_type] = getattr(importlib.import_module(module_name), attribute)
+        return BOTS[bot_type]
+
+
+def warm_up_bots(bot_types=None):
+    """
+    Pre-build the given bot types (all of them when None) and return the
+    names that were warmed. Unknown bot types are skipped.
+    """
+    if bot_types is None:
+        bot_types = list(BOT_MODULES)
+
+    warmed = []
+    for bot_type in bot_types:
+        bot = get_bot_by_type(bot_type)
+        if bot is None:
+            print(f"WARNING: Unknown bot type '{bot_type}', skipping warm-up")
+            continue
+        bot.warm_up()
+        warmed.append(bot_type)
+    return warmed
+
+
+def get_warm_bots():
+    return [bot_type for bot_type, bot in BOTS.items() if bot.is_warm]
@@ -62,14 +62,7 @@ class EnhancedBankingBot(BaseBot):
     def ask_question(self, request, bot_id, current_user, db):
         """Enhanced ask_question that automatically creates tickets for banking issues"""
         question = request.question
-        cached = self.get_cached_answer(question)
-
-        if cached:
-            answer = cached["answer"]
-        else:
-            result = self.retrieval_chain.invoke({"input": question})
-            answer = result["answer"]
-            self.set_cached_answer(question, result)
+        answer = self.get_answer(question, bot_id)
 
         # Save conversations
         from bots.base_bot import save_conversation
@@ -93,6 +86,10 @@ class EnhancedBankingBot(BaseBot):
             resolved=False,
         )
 
+        return self.build_response(question, answer, bot_id, current_user.id, db)
+
+    def build_response(self, question, answer, bot_id, user_id, db):
+        """Automatically creates a ticket when a banking query needs human assistance"""
         # Enhanced human assistance detection
         needs_assistance = self.detect_banking_human_assistance_needed(question, answer)
         
@@ -110,7 +107,7 @@ class EnhancedBankingBot(BaseBot):
             ticket = tickets_crud.create_ticket(
                 db=db,
                 ticket=ticket_data,
-                user_id=current_user.id,
+                user_id=user_id,
                 bot_id=bot_id
             )
             
@@ -124,7 +121,7 @@ class EnhancedBankingBot(BaseBot):
         else:
             return {"answer": answer, "needs_human_assistance": False}
 
-banking_bot = EnhancedBankingBot(system_prompt=banking_prompt)
+banking_bot = EnhancedBankingBot(system_prompt=banking_prompt, bot_type="Banking Bot")
 
 # Create router for banking bot
 router = APIRouter()
@@ -143,6 +140,20 @@ def ask_banking_question(
         db=db
     )
 
+@router.post("/ask/stream")
+def stream_banking_question(
+    request: QueryRequest,
+    current_user=Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Ask a banking question and stream the answer as server-sent events"""
+    return banking_bot.stream_question(
+        request=request,
+        bot_id=5,  # Banking bot ID (Bank Agent)
+        current_user=current_user,
+        db=db
+    )
+
 @router.post("/request-human-assistance")
 def request_human_assistance(
     request: HumanAssistanceRequest,
@@ -1,32 +1,54 @@
 # base_bot.py
 import sys
-import pickle
+import json
+import asyncio
+import threading
 
 from dotenv import load_dotenv
-import redis
 from fastapi import Depends, HTTPException, APIRouter, Request
 from fastapi.security import OAuth2PasswordBearer
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from jose import jwt, JWTError
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import Optional
 
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.chains import create_retrieval_chain
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_chroma import Chroma
-from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
 from langchain.chains.combine_documents import create_stuff_documents_chain
 
 from auth.auth import SECRET_KEY, ALGORITHM
-from database.sessions import get_db
+from database.sessions import get_db, session_local
 from database.database import get_user_by_email, Conversation
-from backend.knowledgebase import embeddings
+from backend import runtime
+from backend.answer_cache import AnswerCache
+from backend.semantic_cache import SemanticCache, SEMANTIC_CACHE_ENABLED
+from backend.normalization import normalize_question
+from backend.retrieval import RetrievalSettings, build_retriever
+from backend.reranker import get_reranker
+from backend.faq_index import lookup_faq
+from backend.singleflight import (
+    SingleFlight,
+    AsyncSingleFlight,
+    RedisFlightLock,
+    SINGLEFLIGHT_DISTRIBUTED,
+    SINGLEFLIGHT_LOCK_TTL,
+    SINGLEFLIGHT_WAIT_TIMEOUT,
+)
 
 load_dotenv()
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Coordinates identical questions across workers when enabled
+flight_lock = (
+    RedisFlightLock(runtime.get_redis, lock_ttl=SINGLEFLIGHT_LOCK_TTL, wait_timeout=SINGLEFLIGHT_WAIT_TIMEOUT)
+    if SINGLEFLIGHT_DISTRIBUTED
+    else None
+)
+
 class QueryRequest(BaseModel):
     question: str
 
@@ -68,54 +90,314 @@ def get_current_user(request: Request, db: Session = Depends(get_db)):
     return user
 
 class BaseBot:
-    def __init__(self, system_prompt: str, persist_directory: str = "chroma_db"):
-        self.model = ChatGoogleGenerativeAI(
-            model="gemini-2.0-flash",
-            temperature=0.3,
-            max_tokens=None,
-            timeout=None,
-            max_retries=2,
-            callbacks=[StreamingStdOutCallbackHandler()],
-        )
+    def __init__(
+        self,
+        system_prompt: str,
+        persist_directory: str = None,
+        model: str = runtime.DEFAULT_LLM_MODEL,
+        temperature: float = runtime.DEFAULT_LLM_TEMPERATURE,
+        bot_type: str = None,
+        semantic_cache_threshold: float = None,
+        retrieval_settings: RetrievalSettings = None,
+    ):
+        # The LLM client, vector store and Redis pool are shared by every bot
+        # through the runtime registry; only the prompt is bot specific.
+        # Nothing heavy is built here: the chain is assembled on first use.
+        self.model_name = model
+        self.temperature = temperature
+        self.persist_directory = persist_directory
         self.system_prompt = ChatPromptTemplate.from_template(system_prompt)
-        self.vectorstore = Chroma(persist_directory=persist_directory, embedding_function=embeddings)
-        self.cache = self._init_redis()
-        self.retrieval_chain = self._init_retrieval_chain()
-        
+        self.bot_type = bot_type or type(self).__name__
+        self.retrieval_settings = RetrievalSettings.for_bot(self.bot_type, retrieval_settings)
+        # Answers depend on the prompt and the retrieval settings, so both
+        # go into the cache namespace.
+        self.cache_fingerprint = system_prompt + self.retrieval_settings.model_dump_json()
+        self.semantic_cache_threshold = semantic_cache_threshold
+        self.answer_cache, self.semantic_cache = self._create_caches(self.bot_type)
+        # One chain and cache namespace per bot_id, since each bot_id
+        # retrieves only its own (and the shared) documents. None means
+        # "not tied to a bot" and searches the whole knowledge base.
+        self._retrieval_chains = {}
+        self._scoped_caches = {None: (self.answer_cache, self.semantic_cache)}
+        self._init_lock = threading.Lock()
+        # Concurrent identical questions share one in-flight LLM call
+        self._flight = SingleFlight()
+        self._async_flight = AsyncSingleFlight()
 
-    def _init_redis(self):
-        try:
-            cache = redis.Redis(host="localhost", port=6379, db=0, decode_responses=False)
-            cache.ping()
-            print("Redis connection successful")
-            return cache
-        except redis.ConnectionError:
-            print("Redis connection failed, caching will be disabled")
-            return None
-
-    def _init_retrieval_chain(self):
-        retriever = self.vectorstore.as_retriever(search_type="similarity")
+    @property
+    def model(self):
+        return runtime.get_llm(model=self.model_name, temperature=self.temperature)
+
+    @property
+    def vectorstore(self):
+        return runtime.get_vectorstore(self.persist_directory)
+
+    @property
+    def cache(self):
+        return runtime.get_redis()
+
+    @property
+    def retrieval_chain(self):
+        return self.get_retrieval_chain()
+
+    def get_retrieval_chain(self, bot_id: int = None):
+        chain = self._retrieval_chains.get(bot_id)
+        if chain is None:
+            with self._init_lock:
+                chain = self._retrieval_chains.get(bot_id)
+                if chain is None:
+                    chain = self._init_retrieval_chain(bot_id)
+                    self._retrieval_chains[bot_id] = chain
+        return chain
+
+    @property
+    def is_warm(self) -> bool:
+        return None in self._retrieval_chains
+
+    def _create_caches(self, namespace: str):
+        answer_cache = AnswerCache(namespace, self.cache_fingerprint)
+        semantic_cache = (
+            SemanticCache(namespace, self.cache_fingerprint, threshold=self.semantic_cache_threshold)
+            if SEMANTIC_CACHE_ENABLED
+            else None
+        )
+        return answer_cache, semantic_cache
+
+    def get_caches(self, bot_id: int = None):
+        """Return the (exact, semantic) answer caches for a bot_id."""
+        caches = self._scoped_caches.get(bot_id)
+        if caches is None:
+            with self._init_lock:
+                caches = self._scoped_caches.get(bot_id)
+                if caches is None:
+                    caches = self._create_caches(f"{self.bot_type}:{bot_id}")
+                    self._scoped_caches[bot_id] = caches
+        return caches
+
+    def warm_up(self):
+        """Build the retrieval chain and load the embeddings model ahead of the first request."""
+        _ = self.retrieval_chain
+        _ = self.cache
+        runtime.get_embeddings().warm_up()
+        if self.retrieval_settings.rerank:
+            get_reranker(self.retrieval_settings.reranker_model).load()
+
+    def _init_retrieval_chain(self, bot_id: int = None):
+        retriever = build_retriever(
+            self.vectorstore,
+            self.retrieval_settings,
+            bot_id=bot_id,
+            persist_directory=self.persist_directory,
+        )
         document_chain = create_stuff_documents_chain(self.model, self.system_prompt)
         return create_retrieval_chain(retriever, document_chain)
 
-    def get_cached_answer(self, query: str):
-        if not self.cache:
-            return None
-        try:
-            cached = self.cache.get(query)
-            if cached:
-                return pickle.loads(cached)
-        except Exception as e:
-            print(f"Cache retrieval error: {e}")
+    def get_cached_answer(self, query: str, bot_id: int = None):
+        return self.get_caches(bot_id)[0].get(query)
+
+    def set_cached_answer(self, query: str, answer: dict, bot_id: int = None):
+        self.get_caches(bot_id)[0].set(query, answer)
+
+    def lookup_answer(self, question: str, bot_id: int = None) -> Optional[str]:
+        """
+        Return an FAQ answer or a previously given answer from the exact or
+        the semantic cache. Expects the normalized question (see
+        normalize_question).
+        """
+        faq_answer = lookup_faq(question, bot_id)
+        if faq_answer is not None:
+            return faq_answer
+
+        cached = self.get_cached_answer(question, bot_id)
+        if cached:
+            return cached["answer"]
+
+        semantic_cache = self.get_caches(bot_id)[1]
+        if semantic_cache:
+            answer = semantic_cache.lookup(question)
+            if answer is not None:
+                self.set_cached_answer(question, {"answer": answer}, bot_id)
+                return answer
         return None
 
-    def set_cached_answer(self, query: str, answer: str):
-        if not self.cache:
-            return
+    def store_answer(self, question: str, result: dict, bot_id: int = None):
+        """Cache a retrieval chain result in the exact and the semantic cache."""
+        self.set_cached_answer(question, result, bot_id)
+        semantic_cache = self.get_caches(bot_id)[1]
+        if semantic_cache:
+            semantic_cache.add(question, result["answer"])
+
+    def _cached_answer_text(self, question: str, bot_id: int = None) -> Optional[str]:
+        cached = self.get_cached_answer(question, bot_id)
+        return cached["answer"] if cached else None
+
+    def get_answer(self, question: str, bot_id: int = None) -> str:
+        """
+        Answer a question from the cache or the retrieval chain. With a
+        bot_id, only that bot's and the shared documents are searched.
+        """
+        query = normalize_question(question)
+        cached = self.lookup_answer(query, bot_id)
+        if cached is not None:
+            return cached
+
+        key = self.get_caches(bot_id)[0].key(query)
+        return self._flight.do(key, lambda: self._generate_answer(question, query, key, bot_id))
+
+    def _generate_answer(self, question: str, query: str, key: str, bot_id: int = None) -> str:
+        token = None
+        if flight_lock:
+            token = flight_lock.acquire(key)
+            if token is None:
+                # Another worker is generating this answer; wait for its result
+                answer = flight_lock.wait(key, lambda: self._cached_answer_text(query, bot_id))
+                if answer is not None:
+                    return answer
+        try:
+            result = self.get_retrieval_chain(bot_id).invoke({"input": question, "query": query})
+            self.store_answer(query, result, bot_id)
+            return result["answer"]
+        finally:
+            if token:
+                flight_lock.release(key, token)
+
+    async def aget_answer(self, question: str, bot_id: int = None) -> str:
+        """
+        Async counterpart of get_answer. The LLM call is awaited and the
+        blocking cache and warm-up work runs in the thread pool, so the
+        event loop stays free for other requests.
+        """
+        query = normalize_question(question)
+        cached = await run_in_threadpool(self.lookup_answer, query, bot_id)
+        if cached is not None:
+            return cached
+
+        if not self.is_warm:
+            await run_in_threadpool(self.warm_up)
+
+        key = self.get_caches(bot_id)[0].key(query)
+        return await self._async_flight.do(key, lambda: self._agenerate_answer(question, query, key, bot_id))
+
+    async def _agenerate_answer(self, question: str, query: str, key: str, bot_id: int = None) -> str:
+        token = None
+        if flight_lock:
+            token = await run_in_threadpool(flight_lock.acquire, key)
+            if token is None:
+                answer = await run_in_threadpool(flight_lock.wait, key, lambda: self._cached_answer_text(query, bot_id))
+                if answer is not None:
+                    return answer
         try:
-            self.cache.set(query, pickle.dumps(answer), ex=3600)  # expires in 1 hour
-        except Exception as e:
-            print(f"Cache storage error: {e}")
+            result = await self.get_retrieval_chain(bot_id).ainvoke({"input": question, "query": query})
+            await run_in_threadpool(self.store_answer, query, result, bot_id)
+            return result["answer"]
+        finally:
+            if token:
+                await run_in_threadpool(flight_lock.release, key, token)
+
+    async def astream_answer(self, question: str, bot_id: int = None):
+        """
+        Yield the answer token by token as the LLM generates it. Cached
+        answers are yielded in one piece. The full result is cached at the end.
+        If the same question is already being answered, its result is awaited
+        and yielded in one piece instead of starting a second LLM call.
+        """
+        query = normalize_question(question)
+        cached = await run_in_threadpool(self.lookup_answer, query, bot_id)
+        if cached is not None:
+            yield cached
+            return
+
+        if not self.is_warm:
+            await run_in_threadpool(self.warm_up)
+
+        key = self.get_caches(bot_id)[0].key(query)
+        future, leader = self._async_flight.begin(key)
+        if not leader:
+            yield await asyncio.shield(future)
+            return
+
+        # Generate in a task of its own: if this client goes away, requests
+        # waiting on the same question still get the answer, and it is cached
+        tokens = asyncio.Queue()
+
+        async def generate():
+            result = {"answer": ""}
+            try:
+                async for chunk in self.get_retrieval_chain(bot_id).astream({"input": question, "query": query}):
+                    for key_name, value in chunk.items():
+                        if key_name == "answer":
+                            result["answer"] += value
+                            tokens.put_nowait(value)
+                        else:
+                            result[key_name] = value
+
+                await run_in_threadpool(self.store_answer, query, result, bot_id)
+                self._async_flight.complete(key, future, result=result["answer"])
+            except BaseException as e:
+                self._async_flight.complete(key, future, error=e)
+            finally:
+                tokens.put_nowait(None)
+
+        self._async_flight.spawn(generate())
+        while True:
+            token = await tokens.get()
+            if token is None:
+                break
+            yield token
+        if future.cancelled() or future.exception() is not None:
+            # Surface the generation error to this client
+            future.result()
+
+    def stream_question(
+        self,
+        request: "QueryRequest",
+        bot_id: int,
+        current_user,
+        db: Session,
+    ) -> StreamingResponse:
+        """
+        Streaming variant of ask_question. Tokens are sent as server-sent
+        "token" events and the human assistance flags as a trailing "done" event.
+        """
+        question = request.question
+        user_id = current_user.id
+
+        save_conversation(
+            db=db,
+            user_id=user_id,
+            bot_id=bot_id,
+            source="user",
+            content=question,
+            channel="web",
+            resolved=False,
+        )
+
+        async def events():
+            answer = ""
+            async for token in self.astream_answer(question, bot_id):
+                answer += token
+                yield format_sse_event("token", {"token": token})
+
+            # The request's session is already closed once the response
+            # starts streaming, so the answer is saved with a fresh one.
+            def finish():
+                with session_local() as stream_db:
+                    save_conversation(
+                        db=stream_db,
+                        user_id=user_id,
+                        bot_id=bot_id,
+                        source="bot",
+                        content=answer,
+                        channel="web",
+                        resolved=False,
+                    )
+                    return self.build_response(question, answer, bot_id, user_id, stream_db)
+
+            response = await run_in_threadpool(finish)
+            response.pop("answer", None)
+            yield format_sse_event("done", response)
+
+        return StreamingResponse(events(), media_type="text/event-stream")
 
     def detect_human_assistance_needed(self, question: str, answer: str) -> bool:
         """
@@ -179,14 +461,7 @@ class BaseBot:
         db: Session = Depends(get_db),
     ):
         question = request.question
-        cached = self.get_cached_answer(question)
-
-        if cached:
-            answer = cached["answer"]
-        else:
-            result = self.retrieval_chain.invoke({"input": question})
-            answer = result["answer"]
-            self.set_cached_answer(question, result)
+        answer = self.get_answer(question, bot_id)
 
         # Save user question
         save_conversation(
@@ -210,6 +485,10 @@ class BaseBot:
             resolved=False,
         )
 
+        return self.build_response(question, answer, bot_id, current_user.id, db)
+
+    def build_response(self, question: str, answer: str, bot_id: int, user_id: int, db: Session) -> dict:
+        """Build the final response, flagging it for human assistance when needed."""
         # Check if human assistance is needed
         needs_assistance = self.detect_human_assistance_needed(question, answer)
         print(f"DEBUG: Question: {question}")
@@ -276,6 +555,10 @@ class BaseBot:
             "created_at": ticket.created_at
         }
 
+def format_sse_event(event: str, data: dict) -> str:
+    """Format a server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
 def save_conversation(
     db: Session, user_id: int, bot_id: int, source: str, content: str, channel: str = "web", resolved: bool = False
 ):
@@ -289,3 +572,18 @@ def save_conversation(
     db.commit()
     db.refresh(convo)
     return convo
+
+
+async def async_save_conversation(
+    db: AsyncSession, user_id: int, bot_id: int, source: str, content: str, channel: str = "web", resolved: bool = False
+):
+    convo = Conversation(
+        user_id=user_id,
+        bot_id=bot_id,
+        interaction={"source": source, "content": content, "channel": channel},
+        resolved=resolved,
+    )
+    db.add(convo)
+    await db.commit()
+    await db.refresh(convo)
+    return convo
@@ -13,7 +13,7 @@ Context: {context}
 Question: {input}
 """
 
-career_counselling_bot = BaseBot(system_prompt=career_counselling_prompt)
+career_counselling_bot = BaseBot(system_prompt=career_counselling_prompt, bot_type="Career Counselling Bot")
 
 # Create router for career counselling bot
 router = APIRouter(prefix="/career-bot", tags=["Career Counselling Bot"])
@@ -27,7 +27,21 @@ def ask_career_question(
     """Ask a career counselling question"""
     return career_counselling_bot.ask_question(
         request=request,
-        bot_id=3,  # Career counselling bot ID
+        bot_id=2,  # Career counselling bot ID
+        current_user=current_user,
+        db=db
+    )
+
+@router.post("/ask/stream")
+def stream_career_question(
+    request: QueryRequest,
+    current_user=Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Ask a career counselling question and stream the answer as server-sent events"""
+    return career_counselling_bot.stream_question(
+        request=request,
+        bot_id=2,  # Career counselling bot ID
         current_user=current_user,
         db=db
     )
@@ -41,7 +55,7 @@ def request_human_assistance(
     """Create a human assistance ticket for career counselling"""
     return career_counselling_bot.create_human_assistance_ticket(
         request=request,
-        bot_id=3,  # Career counselling bot ID
+        bot_id=2,  # Career counselling bot ID
         current_user=current_user,
         db=db
     )
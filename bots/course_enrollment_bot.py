@@ -1,6 +1,6 @@
 # course_enrollment_bot.py
 from fastapi import APIRouter, HTTPException
-from bots.base_bot import BaseBot, QueryRequest
+from bots.base_bot import BaseBot, QueryRequest, get_current_user
 from schemas import HumanAssistanceRequest
 from sqlalchemy.orm import Session
 from database.sessions import get_db
@@ -15,7 +15,7 @@ Context: {context}
 Question: {input}
 """
 
-course_enrollment_bot = BaseBot(system_prompt=course_enrollment_prompt)
+course_enrollment_bot = BaseBot(system_prompt=course_enrollment_prompt, bot_type="Course Enrollment bot")
 
 @router.post("/ask")
 async def ask_course_enrollment_question(request: QueryRequest, db: Session = Depends(get_db)):
@@ -25,6 +25,20 @@ async def ask_course_enrollment_question(request: QueryRequest, db: Session = De
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/ask/stream")
+def stream_course_enrollment_question(
+    request: QueryRequest,
+    current_user=Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Ask a course enrollment question and stream the answer as server-sent events"""
+    return course_enrollment_bot.stream_question(
+        request=request,
+        bot_id=None,  # No bot ID of its own: searches every bot's documents on purpose
+        current_user=current_user,
+        db=db
+    )
+
 @router.post("/request-human-assistance")
 async def request_human_assistance(request: HumanAssistanceRequest, db: Session = Depends(get_db)):
     try:
@@ -13,7 +13,7 @@ Context: {context}
 Question: {input}
 """
 
-insurance_bot = BaseBot(system_prompt=insurance_prompt)
+insurance_bot = BaseBot(system_prompt=insurance_prompt, bot_type="Insurance Bot")
 
 # Create router for insurance bot
 router = APIRouter(prefix="/insurance-bot", tags=["Insurance Bot"])
@@ -32,6 +32,20 @@ def ask_insurance_question(
         db=db
     )
 
+@router.post("/ask/stream")
+def stream_insurance_question(
+    request: QueryRequest,
+    current_user=Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Ask a insurance question and stream the answer as server-sent events"""
+    return insurance_bot.stream_question(
+        request=request,
+        bot_id=6,  # Insurance bot ID
+        current_user=current_user,
+        db=db
+    )
+
 @router.post("/request-human-assistance")
 def request_human_assistance(
     request: HumanAssistanceRequest,
@@ -1,6 +1,6 @@
 # real_estate_bot.py
 from fastapi import APIRouter, HTTPException
-from bots.base_bot import BaseBot, QueryRequest
+from bots.base_bot import BaseBot, QueryRequest, get_current_user
 from schemas import HumanAssistanceRequest
 from sqlalchemy.orm import Session
 from database.sessions import get_db
@@ -15,7 +15,7 @@ Context: {context}
 Question: {input}
 """
 
-real_estate_bot = BaseBot(system_prompt=real_estate_prompt)
+real_estate_bot = BaseBot(system_prompt=real_estate_prompt, bot_type="Real estate bot")
 
 @router.post("/ask")
 async def ask_real_estate_question(request: QueryRequest, db: Session = Depends(get_db)):
@@ -25,6 +25,20 @@ async def ask_real_estate_question(request: QueryRequest, db: Session = Depends(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/ask/stream")
+def stream_real_estate_question(
+    request: QueryRequest,
+    current_user=Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Ask a real estate question and stream the answer as server-sent events"""
+    return real_estate_bot.stream_question(
+        request=request,
+        bot_id=None,  # No bot ID of its own: searches every bot's documents on purpose
+        current_user=current_user,
+        db=db
+    )
+
 @router.post("/request-human-assistance")
 async def request_human_assistance(request: HumanAssistanceRequest, db: Session = Depends(get_db)):
     try:
@@ -14,7 +14,7 @@ Context: {context}
 Question: {input}
 """
 
-retail_bot = BaseBot(system_prompt=retail_prompt)
+retail_bot = BaseBot(system_prompt=retail_prompt, bot_type="Retail Bot")
 
 # Create router for retail bot
 router = APIRouter(prefix="/retail-bot", tags=["Retail Bot"])
@@ -28,7 +28,21 @@ def ask_retail_question(
     """Ask a retail question"""
     return retail_bot.ask_question(
         request=request,
-        bot_id=5,  # Retail bot ID
+        bot_id=4,  # Retail bot ID (Customer service bot)
+        current_user=current_user,
+        db=db
+    )
+
+@router.post("/ask/stream")
+def stream_retail_question(
+    request: QueryRequest,
+    current_user=Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Ask a retail question and stream the answer as server-sent events"""
+    return retail_bot.stream_question(
+        request=request,
+        bot_id=4,  # Retail bot ID (Customer service bot)
         current_user=current_user,
         db=db
     )
@@ -42,7 +56,7 @@ def request_human_assistance(
     """Create a human assistance ticket for retail"""
     return retail_bot.create_human_assistance_ticket(
         request=request,
-        bot_id=5,  # Retail bot ID
+        bot_id=4,  # Retail bot ID (Customer service bot)
         current_user=current_user,
         db=db
     )
@@ -1,6 +1,6 @@
 # telecom_bot.py
 from fastapi import APIRouter, HTTPException
-from bots.base_bot import BaseBot, QueryRequest
+from bots.base_bot import BaseBot, QueryRequest, get_current_user
 from schemas import HumanAssistanceRequest
 from sqlalchemy.orm import Session
 from database.sessions import get_db
@@ -15,7 +15,7 @@ Context: {context}
 Question: {input}
 """
 
-telecom_bot = BaseBot(system_prompt=telecom_prompt)
+telecom_bot = BaseBot(system_prompt=telecom_prompt, bot_type="Telecom bot")
 
 @router.post("/ask")
 async def ask_telecom_question(request: QueryRequest, db: Session = Depends(get_db)):
@@ -25,6 +25,20 @@ async def ask_telecom_question(request: QueryRequest, db: Session = Depends(get_
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/ask/stream")
+def stream_telecom_question(
+    request: QueryRequest,
+    current_user=Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Ask a telecom question and stream the answer as server-sent events"""
+    return telecom_bot.stream_question(
+        request=request,
+        bot_id=1,  # Telecom bot ID
+        current_user=current_user,
+        db=db
+    )
+
 @router.post("/request-human-assistance")
 async def request_human_assistance(request: HumanAssistanceRequest, db: Session = Depends(get_db)):
     try:
@@ -0,0 +1,18 @@
+from twilio.rest import Client
+from twilio.http.async_http_client import AsyncTwilioHttpClient
+
+
+class TwilioSender:
+    """
+    Sends outbound WhatsApp/SMS replies through Twilio using its async HTTP
+    client, so a slow Twilio API call does not block the event loop.
+    """
+    def __init__(self, account_sid: str, auth_token: str):
+        self.http_client = AsyncTwilioHttpClient()
+        self.client = Client(account_sid, auth_token, http_client=self.http_client)
+
+    async def send(self, from_: str, to: str, body: str):
+        return await self.client.messages.create_async(from_=from_, body=body, to=to)
+
+    async def close(self):
+        await self.http_client.close()
@@ -4,6 +4,7 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 import datetime
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.dialects.postgresql import JSONB
 
 Base = sqlalchemy.orm.declarative_base()
@@ -85,4 +86,13 @@ class Admin(Base):
 
 
 def get_user_by_email(db: Session, email: str):
-    return db.query(User).filter(User.email == email).first()
\ No newline at end of file
+    return db.query(User).filter(User.email == email).first()
+
+async def aget_user_by_email(db, email: str):
+    result = await db.execute(sqlalchemy.select(User).where(User.email == email))
+    return result.scalars().first()
+
+
+async def aget_user_by_phone_number(db: AsyncSession, phone_number: str):
+    result = await db.execute(sqlalchemy.select(User).where(User.phone_number == phone_number))
+    return result.scalars().first()
@@ -1,6 +1,6 @@
-
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 # from src.core.config import settings
 from dotenv import load_dotenv
 import os
@@ -18,3 +18,38 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# ----------------------------
+# Async sessions
+# ----------------------------
+# Used by the async request handlers so database I/O does not block the
+# event loop. Derived from DATABASE_URL unless ASYNC_DATABASE_URL is set.
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def to_async_database_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    if "+" in scheme:
+        scheme = scheme.split("+", 1)[0]
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_database_url(DATABASE_URL)
+
+_async_session_local = None
+
+def get_async_session_local():
+    # The engine is created on first use so the async driver is only
+    # required by processes that actually serve async routes.
+    global _async_session_local
+    if _async_session_local is None:
+        async_engine = create_async_engine(ASYNC_DATABASE_URL)
+        _async_session_local = async_sessionmaker(async_engine, expire_on_commit=False, class_=AsyncSession)
+    return _async_session_local
+
+async def get_async_db():
+    async with get_async_session_local()() as db:
+        yield db
@@ -2,12 +2,12 @@
 import sys
 import os
 from datetime import timedelta, date
-from typing import List
+from typing import List, Optional
 
 # ... (rest of the code) ...
-from fastapi import FastAPI, Depends, HTTPException, Request, File, UploadFile
+from fastapi import FastAPI, Depends, HTTPException, Request, File, UploadFile, Form
 import shutil
-from fastapi.responses import HTMLResponse, Response
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.staticfiles import StaticFiles
@@ -15,6 +15,7 @@ from fastapi.templating import Jinja2Templates
 from jose import jwt, JWTError
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth.auth import (
     verify_password,
@@ -23,11 +24,30 @@ from auth.auth import (
     SECRET_KEY,
     ALGORITHM,
 )
-from database.sessions import session_local
-from database.database import User, Admin, Bot, get_user_by_email, Conversation, Ticket
+from database.sessions import session_local, get_async_db, get_async_session_local
+from database.database import (
+    User,
+    Admin,
+    Bot,
+    get_user_by_email,
+    aget_user_by_email,
+    aget_user_by_phone_number,
+    Conversation,
+    Ticket,
+)
 # from backend.ragpipeline import router as rag_router
 from adminbackend.inbox import get_inbox_dates, get_users_by_date, get_user_conversation_by_date
-from backend.knowledgebase import update_knowledge_base
+from backend.knowledgebase import (
+    update_knowledge_base,
+    embeddings,
+    backfill_bot_ids,
+    ensure_faq_index,
+    bot_upload_dir,
+    list_uploaded_files,
+    upload_dir as knowledge_base_upload_dir,
+    SHARED_BOT_ID,
+)
+from backend.ingest_jobs import ingest_jobs
 import schemas
 from adminbackend import tickets as tickets_crud
 from schemas import UserResponse, ConversationResponse
@@ -94,6 +114,28 @@ def get_current_user(request: Request, db: Session = Depends(get_db)):
 
     return user
 
+
+async def get_current_user_async(request: Request, db: AsyncSession = Depends(get_async_db)):
+    token = request.headers.get("Authorization")
+    if not token or not token.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Invalid token format")
+
+    token = token.split(" ")[1]
+
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        email: str = payload.get("sub")
+        if email is None:
+            raise HTTPException(status_code=401, detail="Invalid token payload")
+    except JWTError as e:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    user = await aget_user_by_email(db, email)
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+
+    return user
+
 @app.get("/users/me/bots", response_model=List[schemas.Bot])
 def get_user_bots(
     db: Session = Depends(get_db),
@@ -637,7 +679,7 @@ def create_admin_user(admin: AdminCreate, db: Session = Depends(get_db)):
 # -------------------------
 #  Omnichannel Webhooks
 # -------------------------
-from twilio.rest import Client
+from channels.senders import TwilioSender
 from bot_loader import get_bot_by_type
 from channels.builders.web import WebMessageBuilder
 from channels.builders.twilio import TwilioMessageBuilder
@@ -652,25 +694,90 @@ TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
 TWILIO_WHATSAPP_NUMBER = os.getenv("TWILIO_WHATSAPP_NUMBER") # e.g., 'whatsapp:+14155238886'
 TWILIO_SMS_NUMBER = os.getenv("TWILIO_SMS_NUMBER") # New SMS number env var
 
-# Initialize the Twilio client if credentials are provided
-twilio_client = None
+# Initialize the async Twilio sender if credentials are provided
+twilio_sender = None
 if TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN:
-    twilio_client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+    twilio_sender = TwilioSender(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
 else:
     print("WARNING: Twilio credentials not found. WhatsApp/SMS replies will be disabled.")
 
 
-from bots.base_bot import QueryRequest, save_conversation
+@app.on_event("shutdown")
+async def close_twilio_sender():
+    if twilio_sender:
+        await twilio_sender.close()
+
+
+from bots.base_bot import QueryRequest, async_save_conversation, format_sse_event
+
+
+# -------------------------
+#  Bot Warm-up
+# -------------------------
+from fastapi.concurrency import run_in_threadpool
+from bot_loader import warm_up_bots, get_warm_bots
+from backend.answer_cache import get_cache_stats
+
+# Comma-separated bot types to build before serving traffic, or "all".
+# Bots that are not listed are built lazily on their first request.
+WARMUP_BOT_TYPES = os.getenv("WARMUP_BOT_TYPES", "")
+
+
+def parse_warmup_bot_types(value: str):
+    value = value.strip()
+    if not value:
+        return []
+    if value.lower() == "all":
+        return None
+    return [bot_type.strip() for bot_type in value.split(",") if bot_type.strip()]
+
+
+@app.on_event("startup")
+async def warm_up_configured_bots():
+    bot_types = parse_warmup_bot_types(WARMUP_BOT_TYPES)
+    if bot_types == []:
+        return
+    warmed = await run_in_threadpool(warm_up_bots, bot_types)
+    print(f"Warmed up bots: {warmed}")
+
+
+class WarmupRequest(BaseModel):
+    bot_types: List[str] | None = None
+
+
+@app.post("/admin/warmup")
+async def warm_up_bots_route(
+    request: WarmupRequest,
+    current_admin: Admin = Depends(get_current_admin),
+):
+    """Pre-build the given bot types (all of them when none are given)."""
+    warmed = await run_in_threadpool(warm_up_bots, request.bot_types)
+    return {"warmed": warmed, "warm_bots": get_warm_bots()}
+
+
+@app.get("/admin/cache/stats")
+def cache_stats(current_admin: Admin = Depends(get_current_admin)):
+    """Hit/miss counters of the answer cache tiers and the embedding cache."""
+    stats = get_cache_stats()
+    if hasattr(embeddings, "stats"):
+        stats["embeddings"] = embeddings.stats()
+    return stats
+
+
+@app.get("/health")
+def health_check():
+    return {"status": "healthy", "warm_bots": get_warm_bots()}
+
 
 @app.post("/bots/{bot_id}/query")
-def ask_question(
+async def ask_question(
     bot_id: int,
     request: QueryRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
 ):
     """Handle user questions and return AI-generated answers"""
-    bot = db.query(Bot).filter(Bot.id == bot_id).first()
+    bot = await db.get(Bot, bot_id)
     if not bot:
         raise HTTPException(status_code=404, detail="Bot not found")
 
@@ -679,17 +786,10 @@ def ask_question(
         raise HTTPException(status_code=500, detail="Bot implementation not found")
 
     question = request.question
-    cached = bot_instance.get_cached_answer(question)
-
-    if cached:
-        answer = cached["answer"]
-    else:
-        result = bot_instance.retrieval_chain.invoke({"input": question})
-        answer = result["answer"]
-        bot_instance.set_cached_answer(question, result)
+    answer = await bot_instance.aget_answer(question, bot_id)
 
     # Save the user's question
-    save_conversation(
+    await async_save_conversation(
         db=db,
         user_id=current_user.id,
         bot_id=bot_id,
@@ -700,7 +800,7 @@ def ask_question(
     )
 
     # Save the bot's answer
-    save_conversation(
+    await async_save_conversation(
         db=db,
         user_id=current_user.id,
         bot_id=bot_id,
@@ -710,20 +810,76 @@ def ask_question(
         resolved=False, # Or determine based on answer
     )
 
-    # Check if human assistance is needed using the bot's detection logic
-    try:
-        needs_assistance = bot_instance.detect_human_assistance_needed(question, answer)
-        if needs_assistance:
-            return bot_instance.create_human_assistance_response(answer)
-        else:
-            return {"answer": answer, "needs_human_assistance": False}
-    except AttributeError:
-        # Fallback if bot doesn't have human assistance detection
-        return {"answer": answer, "needs_human_assistance": False}
+    return await run_in_threadpool(build_bot_response, bot_instance, question, answer, bot_id, current_user.id)
+
+
+def build_bot_response(bot_instance, question: str, answer: str, bot_id: int, user_id: int) -> dict:
+    """
+    Run the bot's build_response, which may flag the answer for human
+    assistance or, for some bots, open a ticket with a sync session.
+    """
+    with session_local() as db:
+        return bot_instance.build_response(question, answer, bot_id, user_id, db)
+
+
+@app.post("/bots/{bot_id}/query/stream")
+async def stream_question(
+    bot_id: int,
+    request: QueryRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
+):
+    """Stream the AI-generated answer as server-sent events"""
+    bot = await db.get(Bot, bot_id)
+    if not bot:
+        raise HTTPException(status_code=404, detail="Bot not found")
+
+    bot_instance = get_bot_by_type(bot.bot_type)
+    if not bot_instance:
+        raise HTTPException(status_code=500, detail="Bot implementation not found")
+
+    question = request.question
+    user_id = current_user.id
+
+    # Save the user's question
+    await async_save_conversation(
+        db=db,
+        user_id=user_id,
+        bot_id=bot_id,
+        source="user",
+        content=question,
+        channel="web",
+        resolved=False,
+    )
+
+    async def events():
+        answer = ""
+        async for token in bot_instance.astream_answer(question, bot_id):
+            answer += token
+            yield format_sse_event("token", {"token": token})
+
+        # The request's session is closed once streaming starts, so the
+        # answer is saved with a session of its own.
+        async with get_async_session_local()() as stream_db:
+            await async_save_conversation(
+                db=stream_db,
+                user_id=user_id,
+                bot_id=bot_id,
+                source="bot",
+                content=answer,
+                channel="web",
+                resolved=False,
+            )
+
+        response = await run_in_threadpool(build_bot_response, bot_instance, question, answer, bot_id, user_id)
+        response.pop("answer", None)
+        yield format_sse_event("done", response)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
 
 
 @app.post("/hooks/web")
-async def handle_web_message(payload: Dict[Any, Any], db: Session = Depends(get_db)):
+async def handle_web_message(payload: Dict[Any, Any], db: AsyncSession = Depends(get_async_db)):
     """
     Handles incoming messages from the web chat, gets an AI response, and returns it.
     """
@@ -736,7 +892,7 @@ async def handle_web_message(payload: Dict[Any, Any], db: Session = Depends(get_
         if not bot_id:
             raise HTTPException(status_code=400, detail="bot_id is required")
 
-        bot = db.query(Bot).filter(Bot.id == bot_id).first()
+        bot = await db.get(Bot, bot_id)
         if not bot:
             raise HTTPException(status_code=404, detail="Bot not found")
 
@@ -745,11 +901,11 @@ async def handle_web_message(payload: Dict[Any, Any], db: Session = Depends(get_
             raise HTTPException(status_code=500, detail="Bot implementation not found")
 
         # --- Find user and save their message ---
-        user = db.query(User).filter(User.email == standardized_message.sender_id).first()
+        user = await aget_user_by_email(db, standardized_message.sender_id)
         if not user:
             raise HTTPException(status_code=404, detail=f"User with email '{standardized_message.sender_id}' not found.")
 
-        save_conversation(
+        await async_save_conversation(
             db=db, 
             user_id=user.id, 
             bot_id=bot_id,
@@ -759,10 +915,9 @@ async def handle_web_message(payload: Dict[Any, Any], db: Session = Depends(get_
         )
 
         # --- Generate and Save AI Response ---
-        result = bot_instance.retrieval_chain.invoke({"input": question})
-        ai_response_text = result.get("answer", "I could not find an answer.")
+        ai_response_text = await bot_instance.aget_answer(question, bot_id) or "I could not find an answer."
 
-        save_conversation(
+        await async_save_conversation(
             db=db, 
             user_id=user.id, 
             bot_id=bot_id,
@@ -779,7 +934,7 @@ async def handle_web_message(payload: Dict[Any, Any], db: Session = Depends(get_
 
 
 @app.post("/hooks/twilio/{bot_id}")
-async def handle_twilio_message(request: Request, bot_id: int, db: Session = Depends(get_db)):
+async def handle_twilio_message(request: Request, bot_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Handles incoming SMS from Twilio, gets an AI response, and sends a reply.
     """
@@ -789,7 +944,7 @@ async def handle_twilio_message(request: Request, bot_id: int, db: Session = Dep
         standardized_message = builder.build()
         question = standardized_message.content
 
-        bot = db.query(Bot).filter(Bot.id == bot_id).first()
+        bot = await db.get(Bot, bot_id)
         if not bot:
             raise HTTPException(status_code=404, detail="Bot not found")
 
@@ -798,12 +953,12 @@ async def handle_twilio_message(request: Request, bot_id: int, db: Session = Dep
             raise HTTPException(status_code=500, detail="Bot implementation not found")
 
         # --- Find user and save their message ---
-        user = db.query(User).filter(User.phone_number == standardized_message.sender_id).first()
+        user = await aget_user_by_phone_number(db, standardized_message.sender_id)
         if not user:
             print(f"User with phone number '{standardized_message.sender_id}' not found.")
             return Response(content="", media_type="application/xml")
 
-        save_conversation(
+        await async_save_conversation(
             db=db, 
             user_id=user.id, 
             bot_id=bot_id,
@@ -813,10 +968,9 @@ async def handle_twilio_message(request: Request, bot_id: int, db: Session = Dep
         )
 
         # --- Generate and Send AI Response ---
-        result = bot_instance.retrieval_chain.invoke({"input": question})
-        ai_response_text = result.get("answer", "I could not find an answer.")
+        ai_response_text = await bot_instance.aget_answer(question, bot_id) or "I could not find an answer."
 
-        save_conversation(
+        await async_save_conversation(
             db=db, 
             user_id=user.id, 
             bot_id=bot_id,
@@ -826,10 +980,10 @@ async def handle_twilio_message(request: Request, bot_id: int, db: Session = Dep
         )
 
         # --- Send Reply via Twilio ---
-        if twilio_client and TWILIO_WHATSAPP_NUMBER:
+        if twilio_sender and TWILIO_WHATSAPP_NUMBER:
             try:
                 to_number = f"whatsapp:{standardized_message.sender_id}"
-                twilio_client.messages.create(
+                await twilio_sender.send(
                     from_=TWILIO_WHATSAPP_NUMBER,
                     body=ai_response_text,
                     to=to_number
@@ -845,7 +999,7 @@ async def handle_twilio_message(request: Request, bot_id: int, db: Session = Dep
 
 
 @app.post("/hooks/sms/{bot_id}")
-async def handle_sms_message(request: Request, bot_id: int, db: Session = Depends(get_db)):
+async def handle_sms_message(request: Request, bot_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Handles incoming SMS from Twilio, gets an AI response, and sends a reply.
     """
@@ -855,7 +1009,7 @@ async def handle_sms_message(request: Request, bot_id: int, db: Session = Depend
         standardized_message = builder.build()
         question = standardized_message.content
 
-        bot = db.query(Bot).filter(Bot.id == bot_id).first()
+        bot = await db.get(Bot, bot_id)
         if not bot:
             raise HTTPException(status_code=404, detail="Bot not found")
 
@@ -864,12 +1018,12 @@ async def handle_sms_message(request: Request, bot_id: int, db: Session = Depend
             raise HTTPException(status_code=500, detail="Bot implementation not found")
 
         # --- Find user and save their message ---
-        user = db.query(User).filter(User.phone_number == standardized_message.sender_id).first()
+        user = await aget_user_by_phone_number(db, standardized_message.sender_id)
         if not user:
             print(f"User with phone number '{standardized_message.sender_id}' not found.")
             return Response(content="", media_type="application/xml")
 
-        save_conversation(
+        await async_save_conversation(
             db=db, 
             user_id=user.id, 
             bot_id=bot_id,
@@ -879,10 +1033,9 @@ async def handle_sms_message(request: Request, bot_id: int, db: Session = Depend
         )
 
         # --- Generate and Send AI Response ---
-        result = bot_instance.retrieval_chain.invoke({"input": question})
-        ai_response_text = result.get("answer", "I could not find an answer.")
+        ai_response_text = await bot_instance.aget_answer(question, bot_id) or "I could not find an answer."
 
-        save_conversation(
+        await async_save_conversation(
             db=db, 
             user_id=user.id, 
             bot_id=bot_id,
@@ -892,10 +1045,10 @@ async def handle_sms_message(request: Request, bot_id: int, db: Session = Depend
         )
 
         # --- Send Reply via Twilio ---
-        if twilio_client and TWILIO_SMS_NUMBER:
+        if twilio_sender and TWILIO_SMS_NUMBER:
             try:
                 # For SMS, no special prefix is needed for the 'to' number
-                twilio_client.messages.create(
+                await twilio_sender.send(
                     from_=TWILIO_SMS_NUMBER,
                     body=ai_response_text,
                     to=standardized_message.sender_id
@@ -925,21 +1078,84 @@ app.include_router(lead_capturing_router, prefix="/lead-capturing", tags=["Lead
 app.include_router(course_enrollment_router, prefix="/course-enrollment", tags=["Course Enrollment Bot"])
 
 
-@app.post("/admin/upload-document")
-async def upload_document(file: UploadFile = File(...)):
-    upload_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend", "uploaded_docs")
-    file_path = os.path.join(upload_dir, file.filename)
+@app.on_event("startup")
+async def tag_existing_chunks():
+    # Chunks ingested before bot scoping have no bot_id; mark them as shared
+    try:
+        await run_in_threadpool(backfill_bot_ids)
+    except Exception as e:
+        print(f"Could not tag existing knowledge base chunks: {e}")
+
+
+@app.on_event("startup")
+async def build_faq_index():
+    try:
+        await run_in_threadpool(ensure_faq_index)
+    except Exception as e:
+        print(f"Could not build the FAQ index: {e}")
+
+
+def run_knowledge_base_update(payload: dict, progress):
+    return update_knowledge_base(progress=lambda done, total: progress(done / total if total else 1))
+
+
+ingest_jobs.register("update_knowledge_base", run_knowledge_base_update)
+
+
+@app.on_event("startup")
+async def start_ingest_jobs():
+    # Also resumes jobs that were queued or running when the app stopped
+    try:
+        await run_in_threadpool(ingest_jobs.start)
+    except Exception as e:
+        print(f"Could not start the ingestion job queue: {e}")
+
+
+@app.on_event("shutdown")
+async def stop_ingest_jobs():
+    ingest_jobs.shutdown()
+
+
+def save_upload(file: UploadFile, file_path: str):
     with open(file_path, "wb") as buffer:
         shutil.copyfileobj(file.file, buffer)
 
+
+@app.post("/admin/upload-document")
+async def upload_document(file: UploadFile = File(...), bot_id: Optional[int] = Form(None)):
+    """
+    Upload a document for one bot, or for every bot when no bot_id is given.
+    The knowledge base is updated by a background job; poll
+    /admin/ingest-jobs/{job_id} for its progress.
+    """
+    upload_dir = bot_upload_dir(bot_id)
+    os.makedirs(upload_dir, exist_ok=True)
+    file_path = os.path.join(upload_dir, file.filename)
+    await run_in_threadpool(save_upload, file, file_path)
+
     # Trigger knowledgebase update
-    update_knowledge_base()
-    return {"success": True, "filename": file.filename}
+    job_id = await run_in_threadpool(
+        ingest_jobs.submit, "update_knowledge_base", {"filename": file.filename, "bot_id": bot_id or SHARED_BOT_ID}
+    )
+    return {
+        "success": True,
+        "filename": file.filename,
+        "bot_id": bot_id or SHARED_BOT_ID,
+        "job_id": job_id,
+        "status": "queued",
+    }
+
+
+@app.get("/admin/ingest-jobs/{job_id}")
+async def get_ingest_job(job_id: str, current_admin: Admin = Depends(get_current_admin)):
+    job = await run_in_threadpool(ingest_jobs.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 @app.get("/admin/get-documents")
 async def get_documents():
-    upload_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend", "uploaded_docs")
-    documents = os.listdir(upload_dir)
+    documents = [os.path.relpath(path, knowledge_base_upload_dir) for path, _ in list_uploaded_files()]
     return documents
 
 @app.get("/admin/bots/{bot_id}/knowledge-base", response_model=List[str])
@@ -949,14 +1165,14 @@ def get_bot_knowledge_base(
     current_admin: Admin = Depends(get_current_admin),
 ):
     """
-    Returns a list of knowledge base documents for a specific bot.
-    For now, it returns all documents in backend/uploaded_docs.
-    In a real application, this would be filtered by bot_id.
+    Returns a list of knowledge base documents for a specific bot: the
+    shared documents plus the ones uploaded for this bot.
     """
-    upload_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend", "uploaded_docs")
-    if not os.path.exists(upload_dir):
-        return []
-    documents = [f for f in os.listdir(upload_dir) if os.path.isfile(os.path.join(upload_dir, f))]
+    documents = [
+        os.path.basename(path)
+        for path, document_bot_id in list_uploaded_files()
+        if document_bot_id in (SHARED_BOT_ID, bot_id)
+    ]
     return documents
 
 
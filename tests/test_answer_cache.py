@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for the namespaced, versioned answer cache keys
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from backend import answer_cache, runtime
+from backend.answer_cache import AnswerCache, bump_kb_version, get_kb_version, prompt_hash
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.published = []
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    def incr(self, key):
+        self.values[key] = int(self.values.get(key, 0)) + 1
+        return self.values[key]
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+
+
+@pytest.fixture
+def no_redis(monkeypatch):
+    monkeypatch.setattr(runtime, "get_redis", lambda: None)
+    monkeypatch.setattr(answer_cache, "_kb_version", 0)
+    answer_cache.local_cache.clear()
+    yield
+    answer_cache.local_cache.clear()
+
+
+def test_keys_are_namespaced_per_bot(no_redis):
+    retail = AnswerCache("Retail Bot", "prompt")
+    banking = AnswerCache("Banking Bot", "prompt")
+
+    assert retail.key("what are your hours").startswith(f"answer:retail_bot:{prompt_hash('prompt')}:v0:")
+    assert retail.key("what are your hours") != banking.key("what are your hours")
+
+    retail.set("what are your hours", {"answer": "nine to five"})
+    assert retail.get("what are your hours")["answer"] == "nine to five"
+    assert banking.get("what are your hours") is None
+
+
+def test_prompt_hash_is_part_of_the_key(no_redis):
+    old = AnswerCache("Retail Bot", "Answer briefly: {context}")
+    new = AnswerCache("Retail Bot", "Answer in detail: {context}")
+
+    assert old.key("what are your hours") != new.key("what are your hours")
+    old.set("what are your hours", {"answer": "nine to five"})
+    assert new.get("what are your hours") is None
+
+
+def test_bump_changes_keys_and_clears_l1(no_redis):
+    cache = AnswerCache("Retail Bot", "prompt")
+    cache.set("what are your hours", {"answer": "nine to five"})
+    key = cache.key("what are your hours")
+
+    assert bump_kb_version() == 1
+    assert cache.key("what are your hours") != key
+    assert ":v1:" in cache.key("what are your hours")
+    assert len(answer_cache.local_cache) == 0
+    assert cache.get("what are your hours") is None
+
+
+def test_bump_with_redis_publishes_the_new_version(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(runtime, "get_redis", lambda: redis)
+    monkeypatch.setattr(answer_cache, "_kb_version", 0)
+    monkeypatch.setattr(answer_cache, "_kb_version_read_at", 0.0)
+
+    assert get_kb_version() == 0
+    assert bump_kb_version() == 1
+    assert redis.values[answer_cache.KB_VERSION_KEY] == 1
+    assert redis.published == [(answer_cache.INVALIDATION_CHANNEL, 1)]
+    assert get_kb_version() == 1
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests that one bot cannot retrieve another bot's chunks or cached answers
+"""
+import os
+import ast
+import sys
+import glob
+import uuid
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chromadb
+from langchain.docstore.document import Document
+from langchain_chroma import Chroma
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from backend import answer_cache, runtime, semantic_cache
+from backend.answer_cache import AnswerCache
+from backend.lexical_index import BM25Index
+from backend.retrieval import SHARED_BOT_ID, bot_filter
+from backend.semantic_cache import SemanticCache
+
+RETAIL_BOT_ID = 4
+BANKING_BOT_ID = 5
+
+CHUNKS = {
+    "retail": Document(page_content="Refunds for order 1234 take five days.", metadata={"bot_id": RETAIL_BOT_ID}),
+    "banking": Document(page_content="Refunds for card 1234 take five days.", metadata={"bot_id": BANKING_BOT_ID}),
+    "shared": Document(page_content="Refunds are answered by support.", metadata={"bot_id": SHARED_BOT_ID}),
+}
+
+
+def make_vectorstore():
+    return Chroma(
+        client=chromadb.EphemeralClient(),
+        collection_name=f"kb_{uuid.uuid4().hex}",
+        embedding_function=DeterministicFakeEmbedding(size=16),
+        collection_metadata={"hnsw:space": "cosine"},
+    )
+
+
+def test_vector_search_only_returns_own_and_shared_chunks():
+    vectorstore = make_vectorstore()
+    vectorstore.add_documents(list(CHUNKS.values()), ids=list(CHUNKS))
+
+    found = vectorstore.similarity_search("refunds 1234", k=10, filter=bot_filter(BANKING_BOT_ID))
+    assert sorted(doc.id for doc in found) == ["banking", "shared"]
+    found = vectorstore.similarity_search("refunds 1234", k=10, filter=bot_filter(RETAIL_BOT_ID))
+    assert sorted(doc.id for doc in found) == ["retail", "shared"]
+
+
+def test_lexical_search_only_returns_own_and_shared_chunks(tmp_path):
+    index = BM25Index(str(tmp_path / "bm25_index.json.gz"))
+    index.add(list(CHUNKS), list(CHUNKS.values()))
+
+    found = index.search("refunds 1234", k=10, bot_ids=[BANKING_BOT_ID, SHARED_BOT_ID])
+    assert sorted(doc.id for doc, _ in found) == ["banking", "shared"]
+    found = index.search("refunds 1234", k=10, bot_ids=[RETAIL_BOT_ID, SHARED_BOT_ID])
+    assert sorted(doc.id for doc, _ in found) == ["retail", "shared"]
+
+
+def test_answer_cache_is_scoped_per_bot(monkeypatch):
+    monkeypatch.setattr(runtime, "get_redis", lambda: None)
+    answer_cache.local_cache.clear()
+    # BaseBot.get_caches uses "<bot_type>:<bot_id>" as the namespace
+    retail = AnswerCache(f"Retail Bot:{RETAIL_BOT_ID}", "prompt")
+    other_retail = AnswerCache(f"Retail Bot:{BANKING_BOT_ID}", "prompt")
+    banking = AnswerCache(f"Banking Bot:{BANKING_BOT_ID}", "prompt")
+
+    retail.set("how long do refunds take", {"answer": "five days"})
+
+    assert retail.get("how long do refunds take")["answer"] == "five days"
+    assert other_retail.get("how long do refunds take") is None
+    assert banking.get("how long do refunds take") is None
+    answer_cache.local_cache.clear()
+
+
+def test_semantic_cache_is_scoped_per_bot(monkeypatch):
+    collection = make_vectorstore()
+    monkeypatch.setattr(semantic_cache, "get_cache_collection", lambda: collection)
+    monkeypatch.setattr(semantic_cache, "get_kb_version", lambda: 1)
+    retail = SemanticCache(f"Retail Bot:{RETAIL_BOT_ID}", "prompt", threshold=0.99)
+    banking = SemanticCache(f"Banking Bot:{BANKING_BOT_ID}", "prompt", threshold=0.99)
+
+    retail.add("how long do refunds take", "five days")
+
+    assert retail.lookup("how long do refunds take") == "five days"
+    assert banking.lookup("how long do refunds take") is None
+
+
+def router_bot_ids() -> dict:
+    """The bot_id literals each bots/*_bot.py router passes, by module."""
+    bots_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bots")
+    ids = {}
+    for path in glob.glob(os.path.join(bots_dir, "*_bot.py")):
+        with open(path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.keyword) and node.arg == "bot_id" and isinstance(node.value, ast.Constant):
+                ids.setdefault(os.path.basename(path), set()).add(node.value.value)
+    return ids
+
+
+def test_bot_routers_use_distinct_bot_ids():
+    ids = router_bot_ids()
+    assert ids["retail_bot.py"] == {RETAIL_BOT_ID}
+    assert ids["banking_bot.py"] == {BANKING_BOT_ID}
+    owners = {}
+    for module, module_ids in ids.items():
+        assert len(module_ids) == 1, f"{module} passes several bot ids: {module_ids}"
+        bot_id = next(iter(module_ids))
+        if bot_id is not None:
+            assert bot_id not in owners, f"{module} and {owners[bot_id]} both use bot_id {bot_id}"
+            owners[bot_id] = module
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests for the compact cached answer payload format
+"""
+import os
+import sys
+import pickle
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.cache_payload import encode_payload, decode_payload, COMPRESSED_PREFIX, PLAIN_PREFIX
+
+
+class FakeDocument:
+    def __init__(self, page_content, metadata, id=None):
+        self.page_content = page_content
+        self.metadata = metadata
+        self.id = id
+
+
+def test_round_trip_keeps_answer_and_source_ids():
+    result = {
+        "input": "What is your return policy?",
+        "context": [
+            FakeDocument("x" * 1000, {"source": "FAQ.txt"}, id="chunk-1"),
+            FakeDocument("y" * 1000, {"doc_id": "hubspot_company_1"}),
+        ],
+        "answer": "We offer a 30-day return policy.",
+    }
+    payload = encode_payload(result)
+    decoded = decode_payload(payload)
+
+    assert decoded["answer"] == result["answer"]
+    assert decoded["sources"] == ["chunk-1", "hubspot_company_1"]
+    assert decoded["created_at"] is not None
+    # The retrieved page contents are not stored
+    assert len(payload) < 200
+
+
+def test_large_answers_are_compressed():
+    payload = encode_payload({"answer": "shipping " * 200})
+    assert payload.startswith(COMPRESSED_PREFIX)
+    assert decode_payload(payload)["answer"] == "shipping " * 200
+
+
+def test_small_answers_are_plain_json():
+    payload = encode_payload({"answer": "Hi"})
+    assert payload.startswith(PLAIN_PREFIX)
+
+
+def test_unknown_payloads_are_misses():
+    assert decode_payload(pickle.dumps({"answer": "legacy"})) is None
+    assert decode_payload(b"") is None
+    assert decode_payload(b"jnot json") is None
+    assert decode_payload(b'j{"v": 99, "answer": "future"}') is None
+
+
+if __name__ == "__main__":
+    test_round_trip_keeps_answer_and_source_ids()
+    test_large_answers_are_compressed()
+    test_small_answers_are_plain_json()
+    test_unknown_payloads_are_misses()
+    print("✅ All cache payload tests passed!")
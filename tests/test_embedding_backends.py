@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests for the ONNX embeddings backend settings and the parity check's recall
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import onnx_embeddings
+from backend.onnx_embeddings import onnx_file_name, onnx_model_dir, onnx_model_kwargs, ensure_onnx_model
+from backend.embedding_parity import top_k, recall_at_k
+
+
+def test_model_file_naming():
+    assert onnx_file_name(False) == "onnx/model.onnx"
+    assert onnx_file_name(True, "avx512_vnni") == "onnx/model_qint8_avx512_vnni.onnx"
+    assert onnx_file_name(True, "arm64") == "onnx/model_qint8_arm64.onnx"
+    model_dir = onnx_model_dir("thenlper/gte-small")
+    assert os.path.basename(model_dir) == "thenlper__gte-small"
+    assert os.path.dirname(model_dir) == onnx_embeddings.ONNX_MODEL_DIR
+
+
+def test_model_kwargs():
+    assert onnx_model_kwargs(False) == {
+        "device": "cpu",
+        "backend": "onnx",
+        "model_kwargs": {"file_name": "onnx/model.onnx"},
+    }
+    kwargs = onnx_model_kwargs(True, "avx2")
+    assert kwargs["model_kwargs"]["file_name"] == "onnx/model_qint8_avx2.onnx"
+    assert kwargs["backend"] == "onnx"
+
+
+def test_exported_model_is_not_exported_again(tmp_path, monkeypatch):
+    monkeypatch.setattr(onnx_embeddings, "ONNX_MODEL_DIR", str(tmp_path))
+    model_dir = onnx_model_dir("org/model")
+    path = os.path.join(model_dir, onnx_file_name(True, "avx2"))
+    os.makedirs(os.path.dirname(path))
+    open(path, "w").close()
+    # No sentence-transformers import or export when the file already exists
+    assert ensure_onnx_model("org/model", quantized=True, quantization_config="avx2") == model_dir
+
+
+def test_recall_calculation():
+    expected = np.array([[0, 1], [2, 3]])
+    assert recall_at_k(expected, np.array([[1, 0], [3, 2]]), 2) == 1.0
+    assert recall_at_k(expected, np.array([[0, 4], [4, 5]]), 2) == 0.25
+    assert recall_at_k(expected, np.array([[4, 5], [6, 7]]), 2) == 0.0
+
+
+def test_cross_recall_uses_stored_vectors():
+    # Stored (torch) documents and a candidate model whose vectors are rotated:
+    # its queries find the right documents among its own vectors but not
+    # among the stored ones
+    base_docs = np.eye(3)
+    base_queries = np.eye(3)
+    rotation = np.roll(np.eye(3), 1, axis=0)
+    cand_docs = base_docs @ rotation
+    cand_queries = base_queries @ rotation
+
+    base_hits = top_k(base_queries, base_docs, 1)
+    assert recall_at_k(base_hits, top_k(cand_queries, cand_docs, 1), 1) == 1.0
+    assert recall_at_k(base_hits, top_k(cand_queries, base_docs, 1), 1) == 0.0
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
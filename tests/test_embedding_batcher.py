@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests for micro-batching concurrent query embeddings
+"""
+import os
+import sys
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.embeddings import Embeddings
+
+from backend.embedding_batcher import MicroBatchEmbeddings
+
+
+class RecordingEmbeddings(Embeddings):
+    def __init__(self):
+        self.batches = []
+
+    def embed_documents(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def test_concurrent_queries_share_a_batch():
+    inner = RecordingEmbeddings()
+    batcher = MicroBatchEmbeddings(inner, window_ms=50, max_batch_size=8)
+    texts = ["a" * n for n in range(1, 7)]
+    results = {}
+
+    def embed(text):
+        results[text] = batcher.embed_query(text)
+
+    threads = [threading.Thread(target=embed, args=(text,)) for text in texts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(results[text] == [float(len(text))] for text in texts)
+    assert len(inner.batches) < len(texts)
+
+
+def test_errors_reach_every_caller():
+    class FailingEmbeddings(RecordingEmbeddings):
+        def embed_documents(self, texts):
+            raise RuntimeError("model unavailable")
+
+    batcher = MicroBatchEmbeddings(FailingEmbeddings(), window_ms=1)
+    try:
+        batcher.embed_query("hello")
+        assert False, "expected RuntimeError"
+    except RuntimeError:
+        pass
+
+
+if __name__ == "__main__":
+    test_concurrent_queries_share_a_batch()
+    test_errors_reach_every_caller()
+    print("✅ All embedding batcher tests passed!")
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Tests for the content-hash embedding cache
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.embeddings import Embeddings
+
+from backend.embedding_cache import CachedEmbeddings, pack_vector, unpack_vector
+
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        self.calls.append([text])
+        return [float(len(text)), 0.0]
+
+
+def test_repeated_query_is_not_re_embedded():
+    inner = CountingEmbeddings()
+    cached = CachedEmbeddings(inner, model_name="test", use_redis=False)
+    assert cached.embed_query("opening hours") == cached.embed_query("opening hours")
+    assert inner.calls == [["opening hours"]]
+
+
+def test_documents_only_embed_missing_texts():
+    inner = CountingEmbeddings()
+    cached = CachedEmbeddings(inner, model_name="test", use_redis=False)
+    cached.embed_documents(["a", "bb"])
+    assert cached.embed_documents(["bb", "ccc"]) == [[2.0, 1.0], [3.0, 1.0]]
+    assert inner.calls == [["a", "bb"], ["ccc"]]
+
+
+def test_vector_packing_round_trip():
+    assert unpack_vector(pack_vector([0.5, -1.0, 2.25])) == [0.5, -1.0, 2.25]
+
+
+if __name__ == "__main__":
+    test_repeated_query_is_not_re_embedded()
+    test_documents_only_embed_missing_texts()
+    test_vector_packing_round_trip()
+    print("✅ All embedding cache tests passed!")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests for the FAQ fast path index
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.faq_index import FAQIndex, parse_faq, same_content
+from backend.normalization import normalize_question
+
+FAQ_TEXT = """Q: What is your return policy?
+A: We offer a 30-day return policy on all unused items.
+
+Q: How do I contact customer support?
+A: You can reach our customer support team:
+- Email: support@example.com
+- Phone: 1-800-123-4567
+"""
+
+
+def test_parse_faq_pairs():
+    pairs = parse_faq(FAQ_TEXT)
+    assert [q for q, _ in pairs] == ["What is your return policy?", "How do I contact customer support?"]
+    assert pairs[1][1].endswith("1-800-123-4567")
+
+
+def test_lookup_by_bot_then_shared(tmp_path):
+    shared = tmp_path / "FAQ.txt"
+    shared.write_text(FAQ_TEXT, encoding="utf-8")
+    bot = tmp_path / "faq_bot.txt"
+    bot.write_text("Q: What is your return policy?\nA: Returns within 14 days.\n", encoding="utf-8")
+
+    index = FAQIndex(str(tmp_path / "faq_index.json"))
+    assert index.build([(str(shared), 0), (str(bot), 7)]) == 3
+
+    query = normalize_question("what is your RETURN policy??")
+    assert index.lookup(query).startswith("We offer a 30-day")
+    assert index.lookup(query, bot_id=7) == "Returns within 14 days."
+    assert index.lookup(normalize_question("How do I contact customer support"), bot_id=7).startswith("You can reach")
+    assert index.lookup(normalize_question("Do you sell gift cards?")) is None
+
+
+def test_near_matches_need_the_same_content(tmp_path):
+    faq = tmp_path / "FAQ.txt"
+    faq.write_text(
+        "Q: Do you offer C++ courses?\nA: Yes, C++ twice a year.\n\n"
+        "Q: What is the 30-day return policy?\nA: Unused items within 30 days.\n\n"
+        "Q: Can I cancel my order?\nA: Yes, before it ships.\n",
+        encoding="utf-8",
+    )
+    index = FAQIndex(str(tmp_path / "faq_index.json"))
+    index.build([(str(faq), 0)])
+
+    def lookup(question, cutoff):
+        return index.lookup(normalize_question(question), cutoff=cutoff)
+
+    # Exact matches only by default
+    assert lookup("Do you offer C++ courses", 1) == "Yes, C++ twice a year."
+    assert lookup("Can I cancel the order?", 1) is None
+    # Filler words and typos of plain words are tolerated below 1
+    assert lookup("Can I cancel the order?", 0.8) == "Yes, before it ships."
+    assert lookup("Can I cancle my order?", 0.8) == "Yes, before it ships."
+    # Different symbols, numbers or content words are not
+    assert lookup("Do you offer C# courses?", 0.8) is None
+    assert lookup("What is the 60-day return policy?", 0.8) is None
+    assert lookup("Can I not cancel my order?", 0.5) is None
+    assert lookup("Can I change my order?", 0.8) is None
+
+
+def test_same_content():
+    assert same_content("what is your return policy", "whats your return policy")
+    assert not same_content("is it $50", "is it €50")
+    assert not same_content("debit card fees", "credit card fees")
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for batched association lookups in the HubSpot connector
+"""
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.connectors.hubspot import HubSpotConnector
+
+# parent contact id -> associated ids per object type
+ASSOCIATIONS = {
+    "companies": {"1": ["10"], "2": ["10", "11"]},
+    "notes": {"2": ["20"]},
+}
+
+
+class FakeAssociationsApi:
+    def __init__(self):
+        self.calls = []
+
+    def get_page(self, from_object_type, to_object_type, batch_input_public_fetch_associations_batch_request):
+        inputs = batch_input_public_fetch_associations_batch_request["inputs"]
+        self.calls.append((from_object_type, to_object_type, [i["id"] for i in inputs]))
+        results = []
+        for i in inputs:
+            to_ids = ASSOCIATIONS.get(to_object_type, {}).get(i["id"])
+            if to_ids:
+                results.append(SimpleNamespace(
+                    _from=SimpleNamespace(id=i["id"]),
+                    to=[SimpleNamespace(to_object_id=int(to_id)) for to_id in to_ids],
+                    paging=None,
+                ))
+        return SimpleNamespace(results=results)
+
+
+class FakeBatchApi:
+    def __init__(self, object_type):
+        self.object_type = object_type
+        self.calls = []
+
+    def read(self, batch_read_input_simple_public_object_id):
+        ids = [i["id"] for i in batch_read_input_simple_public_object_id["inputs"]]
+        self.calls.append(ids)
+        return SimpleNamespace(results=[
+            SimpleNamespace(id=object_id, to_dict=lambda object_id=object_id: {
+                "id": object_id, "properties": {"name": f"{self.object_type} {object_id}"}
+            })
+            for object_id in ids
+        ])
+
+
+def make_client():
+    return SimpleNamespace(crm=SimpleNamespace(
+        associations=SimpleNamespace(v4=SimpleNamespace(batch_api=FakeAssociationsApi())),
+        companies=SimpleNamespace(batch_api=FakeBatchApi("companies")),
+        deals=SimpleNamespace(batch_api=FakeBatchApi("deals")),
+        objects=SimpleNamespace(notes=SimpleNamespace(batch_api=FakeBatchApi("notes"))),
+    ))
+
+
+def test_associations_are_fetched_once_per_page():
+    client = make_client()
+    connector = HubSpotConnector(batch_size=2)
+    contacts = [SimpleNamespace(id=str(i)) for i in (1, 2, 3)]
+
+    results = list(connector._with_associations(client, contacts, "contacts", ["companies", "deals"]))
+
+    assert [contact.id for contact, _ in results] == ["1", "2", "3"]
+    by_id = {contact.id: associated for contact, associated in results}
+    assert [c["id"] for c in by_id["1"]["companies"]] == ["10"]
+    assert [c["id"] for c in by_id["2"]["companies"]] == ["10", "11"]
+    assert [n["id"] for n in by_id["2"]["notes"]] == ["20"]
+    assert by_id["3"] == {"companies": [], "deals": [], "notes": []}
+
+    # Two pages x three association types, one batch read per page and type with associations
+    assert len(client.crm.associations.v4.batch_api.calls) == 6
+    assert client.crm.companies.batch_api.calls == [["10", "11"]]
+    assert client.crm.deals.batch_api.calls == []
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests for incremental HubSpot fetching through the CRM search API
+"""
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.connectors import hubspot
+from backend.connectors.hubspot import HubSpotConnector
+
+BASE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+class FakeSearchApi:
+    """Serves objects sorted by modification time, honouring GTE/LTE filters and the result limit."""
+
+    def __init__(self, objects):
+        self.objects = sorted(objects, key=lambda obj: obj.updated_at)
+        self.requests = []
+
+    def do_search(self, public_object_search_request):
+        request = public_object_search_request
+        self.requests.append(request)
+        matching = self.objects
+        for group in request["filterGroups"]:
+            for f in group["filters"]:
+                value = int(f["value"])
+                if f["operator"] == "GTE":
+                    matching = [o for o in matching if o.updated_at.timestamp() * 1000 >= value]
+                else:
+                    matching = [o for o in matching if o.updated_at.timestamp() * 1000 <= value]
+        offset = int(request.get("after", 0))
+        assert offset < hubspot.SEARCH_RESULT_LIMIT
+        results = matching[offset:offset + request["limit"]]
+        after = offset + request["limit"]
+        paging = SimpleNamespace(next=SimpleNamespace(after=str(after))) if after < len(matching) else None
+        return SimpleNamespace(results=results, paging=paging)
+
+
+def make_client(search_api):
+    return SimpleNamespace(crm=SimpleNamespace(contacts=SimpleNamespace(search_api=search_api)))
+
+
+def make_objects(count, step=timedelta(minutes=1)):
+    return [
+        SimpleNamespace(id=str(i), properties={}, updated_at=BASE + step * (i // 2))
+        for i in range(count)
+    ]
+
+
+def test_search_filters_and_sorts_on_last_modified():
+    api = FakeSearchApi(make_objects(10))
+    connector = HubSpotConnector()
+
+    found = list(connector._search_objects(
+        make_client(api), "contacts", ["email"], BASE + timedelta(minutes=1), BASE + timedelta(minutes=3)
+    ))
+
+    assert [obj.id for obj in found] == ["2", "3", "4", "5", "6", "7"]
+    request = api.requests[0]
+    assert request["sorts"] == [{"propertyName": "lastmodifieddate", "direction": "ASCENDING"}]
+    assert [f["operator"] for f in request["filterGroups"][0]["filters"]] == ["GTE", "LTE"]
+
+
+def test_search_continues_past_the_result_limit(monkeypatch):
+    monkeypatch.setattr(hubspot, "SEARCH_RESULT_LIMIT", 6)
+    monkeypatch.setattr(hubspot, "SEARCH_PAGE_SIZE", 3)
+    objects = make_objects(15)
+    api = FakeSearchApi(objects)
+
+    found = list(HubSpotConnector()._search_objects(make_client(api), "contacts", [], BASE, None))
+
+    assert sorted(obj.id for obj in found) == sorted(obj.id for obj in objects)
+    assert len(found) == len(objects)
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Tests for the background ingestion job queue
+"""
+import os
+import sys
+import time
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from backend.ingest_jobs import IngestJobQueue, QUEUED, RUNNING, SUCCEEDED, FAILED
+
+
+def wait_for(queue, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] not in (QUEUED, RUNNING):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_job_reports_progress_and_result(tmp_path):
+    queue = IngestJobQueue(str(tmp_path / "jobs.sqlite3"))
+    seen = []
+
+    def handler(payload, progress):
+        progress(0.5)
+        seen.append(payload)
+        return {"chunks_added": 3}
+
+    queue.register("ingest", handler)
+    try:
+        job_id = queue.submit("ingest", {"filename": "a.txt"})
+        job = wait_for(queue, job_id)
+    finally:
+        queue.shutdown()
+
+    assert job["status"] == SUCCEEDED
+    assert job["progress"] == 1
+    assert job["result"] == {"chunks_added": 3}
+    assert seen == [{"filename": "a.txt"}]
+
+
+def test_failed_job_keeps_error(tmp_path):
+    queue = IngestJobQueue(str(tmp_path / "jobs.sqlite3"))
+
+    def handler(payload, progress):
+        raise RuntimeError("bad pdf")
+
+    queue.register("ingest", handler)
+    try:
+        job = wait_for(queue, queue.submit("ingest"))
+    finally:
+        queue.shutdown()
+
+    assert job["status"] == FAILED
+    assert job["error"] == "bad pdf"
+
+
+def test_unknown_kind_and_missing_job(tmp_path):
+    queue = IngestJobQueue(str(tmp_path / "jobs.sqlite3"))
+    with pytest.raises(ValueError):
+        queue.submit("unknown")
+    assert queue.get("missing") is None
+
+
+def test_queued_jobs_resume_on_start(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    first = IngestJobQueue(path)
+    first.register("ingest", lambda payload, progress: None)
+    job_id = "a" * 32
+    first._execute(
+        "INSERT INTO ingest_jobs (id, kind, payload, status, created_at) VALUES (?, ?, ?, ?, ?)",
+        (job_id, "ingest", "{}", QUEUED, time.time()),
+    )
+
+    second = IngestJobQueue(path)
+    second.register("ingest", lambda payload, progress: {"ok": True})
+    second.start()
+    try:
+        job = wait_for(second, job_id)
+    finally:
+        second.shutdown()
+    assert job["status"] == SUCCEEDED
+    assert job["result"] == {"ok": True}
+
+
+def insert_running_job(queue, job_id, heartbeat_at):
+    queue._execute(
+        "INSERT INTO ingest_jobs (id, kind, payload, status, created_at, started_at, heartbeat_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (job_id, "ingest", "{}", RUNNING, heartbeat_at, heartbeat_at, heartbeat_at),
+    )
+
+
+def test_running_job_of_a_dead_process_is_requeued(tmp_path):
+    # The job was running moments before the restart, so it is not stale
+    # at start; it is picked up once its heartbeat is overdue
+    queue = IngestJobQueue(str(tmp_path / "jobs.sqlite3"), heartbeat_seconds=0.05, stale_seconds=0.2)
+    queue.register("ingest", lambda payload, progress: {"ok": True})
+    job_id = "b" * 32
+    insert_running_job(queue, job_id, time.time())
+
+    queue.start()
+    try:
+        assert queue.get(job_id)["status"] == RUNNING
+        job = wait_for(queue, job_id)
+    finally:
+        queue.shutdown()
+    assert job["status"] == SUCCEEDED
+
+
+def test_queued_job_of_a_dead_process_is_taken_over(tmp_path):
+    queue = IngestJobQueue(str(tmp_path / "jobs.sqlite3"), heartbeat_seconds=0.05, stale_seconds=0.2)
+    queue.register("ingest", lambda payload, progress: {"ok": True})
+    queue.start()
+    try:
+        # Queued by another process after this one started, which then died
+        job_id = "c" * 32
+        queue._execute(
+            "INSERT INTO ingest_jobs (id, kind, payload, status, created_at) VALUES (?, ?, ?, ?, ?)",
+            (job_id, "ingest", "{}", QUEUED, time.time()),
+        )
+        time.sleep(0.1)
+        assert queue.get(job_id)["status"] == QUEUED
+        job = wait_for(queue, job_id)
+    finally:
+        queue.shutdown()
+    assert job["status"] == SUCCEEDED
+
+
+def test_running_job_of_a_live_process_is_left_alone(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    release = threading.Event()
+    calls = []
+
+    def slow_handler(payload, progress):
+        calls.append(payload)
+        release.wait(5)
+        return {"ok": True}
+
+    owner = IngestJobQueue(path, heartbeat_seconds=0.05, stale_seconds=0.2)
+    owner.register("ingest", slow_handler)
+    other = IngestJobQueue(path, heartbeat_seconds=0.05, stale_seconds=0.2)
+    other.register("ingest", slow_handler)
+    try:
+        job_id = owner.submit("ingest")
+        other.start()
+        time.sleep(0.5)
+        assert owner.get(job_id)["status"] == RUNNING
+        release.set()
+        job = wait_for(owner, job_id)
+    finally:
+        release.set()
+        owner.shutdown()
+        other.shutdown()
+    assert job["status"] == SUCCEEDED
+    assert len(calls) == 1
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Tests for the incremental ingestion manifest
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.ingest_manifest import IngestManifest, chunk_id, file_hash
+
+
+def test_chunk_ids_are_stable():
+    assert chunk_id("FAQ.txt", 0, "hello") == chunk_id("FAQ.txt", 0, "hello")
+    assert chunk_id("FAQ.txt", 0, "hello") != chunk_id("FAQ.txt", 1, "hello")
+    assert chunk_id("FAQ.txt", 0, "hello") != chunk_id("FAQ.txt", 0, "hello!")
+
+
+def test_manifest_round_trip(tmp_path):
+    doc = tmp_path / "doc.txt"
+    doc.write_text("v1", encoding="utf-8")
+    manifest = IngestManifest(str(tmp_path / "manifest.json"))
+    manifest.record("doc.txt", file_hash(str(doc)), 0, ["a", "b"])
+    manifest.save()
+
+    loaded = IngestManifest(manifest.path).load()
+    assert loaded.is_current("doc.txt", file_hash(str(doc)), 0)
+    assert not loaded.is_current("doc.txt", file_hash(str(doc)), 3)
+
+    doc.write_text("v2", encoding="utf-8")
+    assert not loaded.is_current("doc.txt", file_hash(str(doc)), 0)
+    assert loaded.remove("doc.txt") == ["a", "b"]
+    assert loaded.get("doc.txt") is None
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming ingestion pipeline
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.ingest_pipeline import ChunkBuffer, FileTask, parse_files
+
+
+def test_parse_files_keeps_order_and_tags_bot(tmp_path):
+    tasks = []
+    for i in range(5):
+        path = tmp_path / f"doc{i}.txt"
+        path.write_text(f"document {i} " * 300, encoding="utf-8")
+        tasks.append(FileTask(path.name, str(path), i, "hash"))
+
+    parsed = list(parse_files(tasks, workers=2))
+
+    assert [result.task.name for result in parsed] == [task.name for task in tasks]
+    for result in parsed:
+        assert len(result.chunks) > 1
+        assert len(result.ids) == len(set(result.ids)) == len(result.chunks)
+        assert {chunk.metadata["bot_id"] for chunk in result.chunks} == {result.task.bot_id}
+    assert parsed[0].ids == list(parse_files(tasks[:1], workers=1))[0].ids
+
+
+def test_chunk_buffer_writes_bounded_batches():
+    batches = []
+    recorded = []
+    buffer = ChunkBuffer(lambda ids, chunks: batches.append(list(ids)), batch_size=3)
+
+    buffer.add(["a", "b"], ["A", "B"], on_written=lambda: recorded.append("first"))
+    assert batches == [] and recorded == []
+    buffer.add(["c", "d", "e", "f", "g"], list("CDEFG"), on_written=lambda: recorded.append("second"))
+    assert batches == [["a", "b", "c"], ["d", "e", "f"]]
+    assert recorded == ["first"]
+    buffer.add([], [], on_written=lambda: recorded.append("empty"))
+    assert recorded == ["first"]
+
+    buffer.flush()
+    assert batches[-1] == ["g"]
+    assert recorded == ["first", "second", "empty"]
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Tests for the batched knowledge base writer
+"""
+import os
+import sys
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from langchain.docstore.document import Document as LangchainDocument
+
+from backend.connectors.models import Document, DocumentSource, TextSection
+from backend import ingest_writer
+from backend.ingest_writer import INGEST_LOCK_FILE, KnowledgeBaseWriter
+from backend.lexical_index import BM25Index
+
+
+class RecordingEmbeddings:
+    def __init__(self):
+        self.calls = []
+        self.threads = set()
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        self.threads.add(threading.current_thread().name)
+        return [[float(len(text))] for text in texts]
+
+
+class RecordingCollection:
+    def __init__(self):
+        self.upserts = []
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.upserts.append((ids, embeddings, documents, metadatas))
+
+
+class FakeVectorstore:
+    def __init__(self):
+        self.embeddings = RecordingEmbeddings()
+        self._collection = RecordingCollection()
+
+
+class StubWriter(KnowledgeBaseWriter):
+    def __init__(self, **kwargs):
+        super().__init__("/tmp/unused", **kwargs)
+        self.store = FakeVectorstore()
+
+    @property
+    def vectorstore(self):
+        return self.store
+
+
+def matches(metadata, where):
+    """Evaluate the subset of Chroma where filters the writer uses."""
+    if "$and" in where:
+        return all(matches(metadata, clause) for clause in where["$and"])
+    (key, condition), = where.items()
+    if isinstance(condition, dict):
+        return metadata.get(key) in condition["$in"]
+    return metadata.get(key) == condition
+
+
+class MemoryCollection:
+    def __init__(self, store):
+        self.store = store
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        for doc_id, text, metadata in zip(ids, documents, metadatas):
+            self.store.chunks[doc_id] = (text, dict(metadata))
+
+
+class MemoryVectorstore:
+    def __init__(self):
+        self.embeddings = RecordingEmbeddings()
+        self.chunks = {}
+        self._collection = MemoryCollection(self)
+
+    def get(self, ids=None, where=None, include=None):
+        found = [
+            doc_id for doc_id, (_, metadata) in self.chunks.items()
+            if (ids is None or doc_id in ids) and (where is None or matches(metadata, where))
+        ]
+        return {"ids": found, "metadatas": [self.chunks[doc_id][1] for doc_id in found]}
+
+    def delete(self, ids):
+        for doc_id in ids:
+            self.chunks.pop(doc_id, None)
+
+
+class MemoryWriter(KnowledgeBaseWriter):
+    def __init__(self, tmp_path):
+        super().__init__(str(tmp_path), embed_threads=1)
+        self.store = MemoryVectorstore()
+        self.lexical = BM25Index(str(tmp_path / "bm25_index.json.gz"))
+
+    @property
+    def vectorstore(self):
+        return self.store
+
+    def _lexical_index(self):
+        return self.lexical
+
+
+def chunks_of(source, doc_id, texts, bot_id=0):
+    return [
+        LangchainDocument(page_content=text, metadata={"source": source, "doc_id": doc_id, "bot_id": bot_id})
+        for text in texts
+    ]
+
+
+def test_embeds_in_batches_and_keeps_order():
+    writer = StubWriter(embed_batch_size=2, embed_threads=3, upsert_batch_size=100)
+    texts = ["a" * n for n in range(1, 8)]
+
+    vectors = writer.embed(texts)
+
+    assert vectors == [[float(n)] for n in range(1, 8)]
+    assert sorted(len(call) for call in writer.store.embeddings.calls) == [1, 2, 2, 2]
+
+
+def test_write_upserts_in_sized_batches():
+    writer = StubWriter(embed_batch_size=2, embed_threads=1, upsert_batch_size=3)
+    chunks = [LangchainDocument(page_content="x" * n, metadata={"bot_id": 0}) for n in range(1, 8)]
+    ids = [f"id{n}" for n in range(1, 8)]
+
+    writer.write(ids, chunks)
+
+    upserts = writer.store._collection.upserts
+    assert [batch[0] for batch in upserts] == [ids[0:3], ids[3:6], ids[6:7]]
+    assert upserts[0][1] == [[1.0], [2.0], [3.0]]
+    assert upserts[0][3] == [{"bot_id": 0}] * 3
+    assert writer.written == 7
+
+
+def test_replace_documents_embeds_only_new_chunks(tmp_path):
+    writer = MemoryWriter(tmp_path)
+    chunks = chunks_of("hubspot", "d1", ["first", "second"])
+
+    first = writer.replace_documents(["c1", "c2"], chunks, {"hubspot": ["d1"]}, 0)
+    again = writer.replace_documents(["c1", "c2"], chunks, {"hubspot": ["d1"]}, 0)
+
+    assert first == {"chunks_added": 2, "chunks_removed": 0, "chunks_unchanged": 0}
+    assert again == {"chunks_added": 0, "chunks_removed": 0, "chunks_unchanged": 2}
+    assert writer.store.embeddings.calls == [["first", "second"]]
+
+
+def test_replace_documents_deletes_stale_chunks(tmp_path):
+    writer = MemoryWriter(tmp_path)
+    writer.replace_documents(["c1", "c2"], chunks_of("hubspot", "d1", ["first", "second"]), {"hubspot": ["d1"]}, 0)
+    # Chunks of an earlier sync: random ids, no bot_id, and another bot's copy
+    writer.store.chunks["legacy"] = ("old", {"source": "hubspot", "doc_id": "d1"})
+    writer.store.chunks["other_bot"] = ("kept", {"source": "hubspot", "doc_id": "d1", "bot_id": 7})
+    writer.store.chunks["other_doc"] = ("kept", {"source": "hubspot", "doc_id": "d2", "bot_id": 0})
+
+    summary = writer.replace_documents(["c1", "c3"], chunks_of("hubspot", "d1", ["first", "changed"]), {"hubspot": ["d1"]}, 0)
+
+    assert summary == {"chunks_added": 1, "chunks_removed": 2, "chunks_unchanged": 1}
+    assert sorted(writer.store.chunks) == ["c1", "c3", "other_bot", "other_doc"]
+
+
+def test_replace_documents_indexes_every_current_chunk(tmp_path):
+    writer = MemoryWriter(tmp_path)
+    writer.store.chunks["c1"] = ("first", {"source": "hubspot", "doc_id": "d1", "bot_id": 0})
+
+    # c1 is already in Chroma but missing from the lexical index
+    writer.replace_documents(["c1", "c2"], chunks_of("hubspot", "d1", ["first", "second"]), {"hubspot": ["d1"]}, 0)
+
+    assert sorted(writer.lexical.positions) == ["c1", "c2"]
+
+
+def count_version_bumps(monkeypatch):
+    bumps = []
+    monkeypatch.setattr(ingest_writer, "bump_kb_version", lambda: bumps.append(1))
+    return bumps
+
+
+def test_unchanged_resync_does_not_invalidate_answers(tmp_path, monkeypatch):
+    bumps = count_version_bumps(monkeypatch)
+    writer = MemoryWriter(tmp_path)
+    chunks = chunks_of("hubspot", "d1", ["first", "second"])
+
+    writer.replace_documents(["c1", "c2"], chunks, {"hubspot": ["d1"]}, 0)
+    writer.commit()
+    writer.replace_documents(["c1", "c2"], chunks_of("hubspot", "d1", ["first", "second"]), {"hubspot": ["d1"]}, 0)
+    writer.commit()
+    assert len(bumps) == 1
+
+    writer.replace_documents(["c1", "c3"], chunks_of("hubspot", "d1", ["first", "changed"]), {"hubspot": ["d1"]}, 0)
+    writer.commit()
+    assert len(bumps) == 2
+
+
+def hubspot_document(doc_id, text):
+    return Document(
+        id=doc_id,
+        sections=[TextSection(text=text)],
+        source=DocumentSource.HUBSPOT,
+        semantic_identifier=doc_id,
+    )
+
+
+def test_add_documents_takes_the_last_version_of_a_duplicate(tmp_path, monkeypatch):
+    knowledgebase = pytest.importorskip("backend.knowledgebase")
+    writer = MemoryWriter(tmp_path)
+    monkeypatch.setattr(knowledgebase, "get_ingest_writer", lambda persist_directory=None: writer)
+
+    summary = knowledgebase.add_documents_to_knowledge_base(
+        [hubspot_document("d1", "old text"), hubspot_document("d1", "new text")], commit=False
+    )
+
+    assert summary == {"chunks_added": 1, "chunks_removed": 0, "chunks_unchanged": 0}
+    assert [text for text, _ in writer.store.chunks.values()] == ["new text"]
+    assert knowledgebase.add_documents_to_knowledge_base([]) == {
+        "chunks_added": 0, "chunks_removed": 0, "chunks_unchanged": 0,
+    }
+
+
+def test_add_documents_again_unchanged_does_not_bump_the_version(tmp_path, monkeypatch):
+    knowledgebase = pytest.importorskip("backend.knowledgebase")
+    bumps = count_version_bumps(monkeypatch)
+    writer = MemoryWriter(tmp_path)
+    monkeypatch.setattr(knowledgebase, "get_ingest_writer", lambda persist_directory=None: writer)
+
+    knowledgebase.add_documents_to_knowledge_base([hubspot_document("d1", "some text")])
+    summary = knowledgebase.add_documents_to_knowledge_base([hubspot_document("d1", "some text")])
+
+    assert summary == {"chunks_added": 0, "chunks_removed": 0, "chunks_unchanged": 1}
+    assert len(bumps) == 1
+
+
+def test_lock_is_held_across_processes(tmp_path):
+    fcntl = pytest.importorskip("fcntl")
+    writer = KnowledgeBaseWriter(str(tmp_path), embed_threads=1)
+
+    def try_lock():
+        # A separate open file behaves like another process's lock attempt
+        with open(tmp_path / INGEST_LOCK_FILE, "a") as other:
+            try:
+                fcntl.flock(other, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            fcntl.flock(other, fcntl.LOCK_UN)
+            return True
+
+    with writer.locked():
+        assert not try_lock()
+    assert try_lock()
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
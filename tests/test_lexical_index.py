@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for the BM25 lexical index and reciprocal rank fusion
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain.docstore.document import Document
+
+from backend.lexical_index import BM25Index, tokenize, reciprocal_rank_fusion
+
+
+def make_index(tmp_path):
+    index = BM25Index(str(tmp_path / "bm25_index.json.gz"))
+    index.add(
+        ["a", "b", "c"],
+        [
+            Document(page_content="The PLAN-X200 includes 5GB of data.", metadata={"bot_id": 1}),
+            Document(page_content="Standard shipping takes 3-5 business days.", metadata={"bot_id": 0}),
+            Document(page_content="Policy POL-7781 covers water damage.", metadata={"bot_id": 2}),
+        ],
+    )
+    return index
+
+
+def test_tokenize_keeps_codes_and_parts():
+    assert tokenize("PLAN-X200 plan") == ["plan-x200", "plan", "x200", "plan"]
+
+
+def test_search_finds_codes(tmp_path):
+    index = make_index(tmp_path)
+    assert index.search("what is in plan x200")[0][0].id == "a"
+    assert index.search("POL-7781")[0][0].id == "c"
+    assert [doc.id for doc, _ in index.search("POL-7781", bot_ids=[1, 0])] == []
+
+
+def test_stopwords_and_score_floor(tmp_path):
+    index = make_index(tmp_path)
+    assert index.search("what is the") == []
+    assert [doc.id for doc, _ in index.search("what is the shipping time")] == ["b"]
+    score = index.search("shipping")[0][1]
+    assert index.search("shipping", min_score=score + 0.01) == []
+
+
+def test_save_load_and_delete(tmp_path):
+    index = make_index(tmp_path)
+    index.delete(["a"])
+    index.save()
+
+    loaded = BM25Index(index.path)
+    assert loaded.load()
+    assert len(loaded) == 2
+    assert loaded.search("x200") == []
+    assert loaded.search("shipping")[0][0].id == "b"
+
+
+def test_reciprocal_rank_fusion():
+    a, b, c = (Document(id=i, page_content=i) for i in "abc")
+    fused = reciprocal_rank_fusion([[a, b], [b, c]], k=2)
+    assert [doc.id for doc in fused] == ["b", "a"]
+
+
+def test_unsaved_changes_survive_other_saves(tmp_path):
+    path = str(tmp_path / "bm25_index.json.gz")
+    first, second = BM25Index(path), BM25Index(path)
+
+    first.add(["a1"], [Document(page_content="alpha one", metadata={"bot_id": 0})])
+    second.add(["b1"], [Document(page_content="beta one", metadata={"bot_id": 0})])
+    second.save()
+    first.add(["a2"], [Document(page_content="alpha two", metadata={"bot_id": 0})])
+    first.delete(["b1"])
+    second.add(["b2"], [Document(page_content="beta two", metadata={"bot_id": 0})])
+    first.save()
+    second.save()
+
+    reloaded = BM25Index(path)
+    assert reloaded.load()
+    assert sorted(reloaded.positions) == ["a1", "a2", "b2"]
+    assert sorted(doc.id for doc, _ in reloaded.search("alpha", k=5)) == ["a1", "a2"]
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-process LRU answer cache tier
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.local_cache import LocalLRUCache
+
+
+def test_hit_and_miss_counters():
+    cache = LocalLRUCache()
+    assert cache.get("q") is None
+    cache.set("q", {"answer": "a"})
+    assert cache.get("q") == {"answer": "a"}
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_evicts_least_recently_used_entry():
+    cache = LocalLRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_memory_cap():
+    cache = LocalLRUCache(max_bytes=100)
+    cache.set("a", "x", size=60)
+    cache.set("b", "y", size=60)
+    assert cache.get("a") is None
+    assert cache.size_bytes == 60
+    # Values larger than the whole cache are never stored
+    cache.set("c", "z", size=101)
+    assert cache.get("c") is None
+
+
+def test_entries_expire():
+    cache = LocalLRUCache(ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+if __name__ == "__main__":
+    test_hit_and_miss_counters()
+    test_evicts_least_recently_used_entry()
+    test_memory_cap()
+    test_entries_expire()
+    print("✅ All local cache tests passed!")
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Tests for question normalization ahead of the answer cache and retrieval
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.normalization import normalize_question
+
+
+def test_case_whitespace_and_punctuation():
+    assert normalize_question("  What are your   HOURS?? ") == "what are your hours"
+    assert normalize_question("what are your hours") == "what are your hours"
+
+
+def test_emoji_and_compatibility_forms():
+    assert normalize_question("Ｏｐｅｎ today 🙂👍🏽") == "open today"
+    assert normalize_question("What's the fee?") == "whats the fee"
+
+
+def test_spelling_variants():
+    variants = {"colour": "color", "favourite": "favorite"}
+    assert normalize_question("My favourite Colour!", variants=variants) == "my favorite color"
+
+
+def test_punctuation_only_question_is_kept():
+    assert normalize_question("???") == "???"
+    assert normalize_question("") == ""
+
+
+def test_meaningful_symbols_do_not_collide():
+    questions = ["Do you offer C++ courses?", "Do you offer C# courses?", "Do you offer C courses?"]
+    assert normalize_question(questions[0]) == "do you offer c++ courses"
+    assert normalize_question(questions[1]) == "do you offer c# courses"
+    assert len({normalize_question(q) for q in questions}) == 3
+    assert normalize_question("Is it $50?") == "is it $50"
+    assert normalize_question("Is it €50?") == "is it €50"
+    assert normalize_question("Is it 50?") == "is it 50"
+    assert normalize_question("20% off?") == "20% off"
+
+
+def test_inner_punctuation_is_kept():
+    assert normalize_question("Is 4.5g available?") == "is 4.5g available"
+    assert normalize_question("What is PLAN-X200?") == "what is plan-x200"
+    assert normalize_question("Open 24/7?") == "open 24/7"
+    assert normalize_question("Hello... - anyone?") == "hello anyone"
+
+
+if __name__ == "__main__":
+    test_case_whitespace_and_punctuation()
+    test_emoji_and_compatibility_forms()
+    test_spelling_variants()
+    test_punctuation_only_question_is_kept()
+    test_meaningful_symbols_do_not_collide()
+    test_inner_punctuation_is_kept()
+    print("✅ All normalization tests passed!")
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Tests for cross-encoder reranking and its latency budget fallback
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain.docstore.document import Document
+
+from backend.reranker import CrossEncoderReranker
+
+
+class LengthModel:
+    """Scores a chunk by its length, optionally slowly."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    def predict(self, pairs, batch_size=None, show_progress_bar=False):
+        time.sleep(self.delay)
+        return [len(text) for _, text in pairs]
+
+
+DOCS = [Document(page_content="x" * n) for n in (1, 3, 2, 5, 4)]
+
+
+def test_reranks_within_budget():
+    reranker = CrossEncoderReranker(batch_size=2)
+    reranker._model = LengthModel()
+    result = reranker.rerank("q", DOCS, top_n=2, budget_ms=1000)
+    assert [len(d.page_content) for d in result] == [5, 4]
+    assert reranker.stats() == {"reranked": 1, "fallbacks": 0}
+
+
+def test_falls_back_to_retrieval_order_over_budget():
+    reranker = CrossEncoderReranker(batch_size=2)
+    reranker._model = LengthModel(delay=0.05)
+    result = reranker.rerank("q", DOCS, top_n=2, budget_ms=60)
+    assert result == DOCS[:2]
+    assert reranker.stats()["fallbacks"] == 1
+
+
+if __name__ == "__main__":
+    test_reranks_within_budget()
+    test_falls_back_to_retrieval_order_over_budget()
+    print("✅ All reranker tests passed!")
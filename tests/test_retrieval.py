@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tests for per-bot retrieval settings and the context token budget
+"""
+import os
+import sys
+import json
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain.docstore.document import Document
+from langchain_core.runnables import RunnableLambda
+
+from backend import retrieval
+from backend.lexical_index import BM25Index
+from backend.retrieval import RetrievalSettings, build_retriever, trim_to_budget
+
+
+class FakeVectorstore:
+    """Returns fixed vector results and records the query it was given."""
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.queries = []
+
+    def as_retriever(self, search_type, search_kwargs):
+        return RunnableLambda(lambda query: self.queries.append(query) or self.documents)
+
+
+def make_index(tmp_path, monkeypatch):
+    index = BM25Index(str(tmp_path / "bm25_index.json.gz"))
+    index.add(
+        ["vec", "code"],
+        [
+            Document(page_content="Our opening hours are nine to five.", metadata={"bot_id": 0}),
+            Document(page_content="The PLAN-X200 includes 5GB of data.", metadata={"bot_id": 0}),
+        ],
+    )
+    monkeypatch.setattr(retrieval, "get_lexical_index", lambda persist_directory=None: index)
+    return index
+
+
+def test_search_kwargs_per_mode():
+    assert RetrievalSettings(k=3).search_kwargs() == {"k": 3}
+    mmr = RetrievalSettings(search_type="mmr", k=3, fetch_k=10, lambda_mult=0.7)
+    assert mmr.search_kwargs({"bot_id": 1}) == {"k": 3, "fetch_k": 10, "lambda_mult": 0.7, "filter": {"bot_id": 1}}
+    threshold = RetrievalSettings(search_type="similarity_score_threshold", score_threshold=0.8)
+    assert threshold.search_kwargs()["score_threshold"] == 0.8
+
+
+def test_per_bot_overrides(monkeypatch):
+    monkeypatch.setenv("RETRIEVAL_K", "6")
+    monkeypatch.setenv("RETRIEVAL_SETTINGS_JSON", json.dumps({"Retail Bot": {"k": 2, "search_type": "mmr"}}))
+    assert RetrievalSettings.for_bot("Telecom bot").k == 6
+    retail = RetrievalSettings.for_bot("Retail Bot")
+    assert (retail.k, retail.search_type) == (2, "mmr")
+    assert RetrievalSettings.for_bot("Retail Bot", RetrievalSettings(k=1)).k == 1
+
+
+def test_trim_to_budget():
+    docs = [Document(page_content="x" * 400, metadata={"i": i}) for i in range(4)]
+    assert len(trim_to_budget(docs, None)) == 4
+    assert [d.metadata["i"] for d in trim_to_budget(docs, 250)] == [0, 1]
+    # An oversized first chunk is cut down rather than dropped
+    trimmed = trim_to_budget(docs, 10)
+    assert len(trimmed) == 1 and len(trimmed[0].page_content) == 40
+
+
+def test_hybrid_search_uses_raw_input_for_bm25(tmp_path, monkeypatch):
+    index = make_index(tmp_path, monkeypatch)
+    searched = []
+    search = index.search
+    monkeypatch.setattr(index, "search", lambda query, **kwargs: searched.append(query) or search(query, **kwargs))
+    vectorstore = FakeVectorstore([Document(id="vec", page_content="Our opening hours are nine to five.")])
+
+    found = build_retriever(vectorstore, RetrievalSettings(k=2)).invoke(
+        {"input": "What's in PLAN-X200?", "query": "whats in plan-x200"}
+    )
+
+    assert vectorstore.queries == ["whats in plan-x200"]
+    assert searched == ["What's in PLAN-X200?"]
+    assert sorted(doc.id for doc in found) == ["code", "vec"]
+
+
+def test_threshold_search_is_not_padded_with_lexical_hits(tmp_path, monkeypatch):
+    make_index(tmp_path, monkeypatch)
+    settings = RetrievalSettings(k=2, search_type="similarity_score_threshold", score_threshold=0.8)
+
+    nothing_passed = build_retriever(FakeVectorstore([]), settings)
+    assert nothing_passed.invoke({"input": "PLAN-X200"}) == []
+
+    passed = build_retriever(FakeVectorstore([Document(id="vec", page_content="Our opening hours are nine to five.")]), settings)
+    assert [doc.id for doc in passed.invoke({"input": "PLAN-X200 opening hours"})] == ["vec"]
+
+
+def test_lexical_score_floor(tmp_path, monkeypatch):
+    make_index(tmp_path, monkeypatch)
+    assert [doc.id for doc in build_retriever(FakeVectorstore([]), RetrievalSettings()).invoke({"input": "PLAN-X200"})] == ["code"]
+    floored = build_retriever(FakeVectorstore([]), RetrievalSettings(lexical_min_score=100))
+    assert floored.invoke({"input": "PLAN-X200"}) == []
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests for pruning the semantic answer cache
+"""
+import os
+import sys
+import time
+import uuid
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chromadb
+
+from backend import semantic_cache
+
+
+def make_collection(monkeypatch):
+    collection = chromadb.EphemeralClient().create_collection(f"cache_{uuid.uuid4().hex}")
+    monkeypatch.setattr(semantic_cache, "get_cache_collection", lambda: SimpleNamespace(_collection=collection))
+    return collection
+
+
+def add_entry(collection, entry_id, kb_version, created_at):
+    collection.add(
+        ids=[entry_id],
+        embeddings=[[1.0, 0.0]],
+        documents=[entry_id],
+        metadatas=[{"namespace": "bot", "kb_version": kb_version, "answer": "a", "created_at": created_at}],
+    )
+
+
+def test_prune_drops_old_versions_and_expired_entries(monkeypatch):
+    collection = make_collection(monkeypatch)
+    now = time.time()
+    add_entry(collection, "old_version", 1, now)
+    add_entry(collection, "expired", 2, now - 1000)
+    add_entry(collection, "current", 2, now)
+    add_entry(collection, "newer", 3, now)
+
+    semantic_cache.prune(kb_version=2, ttl=100)
+
+    assert sorted(collection.get()["ids"]) == ["current", "newer"]
+
+
+def test_prune_runs_when_the_version_changes(monkeypatch):
+    calls = []
+    monkeypatch.setattr(semantic_cache, "prune", lambda kb_version: calls.append(kb_version))
+    monkeypatch.setattr(semantic_cache, "_pruned_version", 4)
+    monkeypatch.setattr(semantic_cache, "_pruned_at", time.monotonic())
+
+    semantic_cache.prune_if_due(4)
+    semantic_cache.prune_if_due(5)
+
+    assert calls == [5]
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
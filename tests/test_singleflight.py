@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for coalescing concurrent identical questions
+"""
+import os
+import sys
+import time
+import asyncio
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.singleflight import SingleFlight, AsyncSingleFlight
+
+
+def test_threads_share_one_call():
+    flight = SingleFlight()
+    calls = []
+    results = []
+
+    def generate():
+        calls.append(1)
+        time.sleep(0.1)
+        return "answer"
+
+    threads = [threading.Thread(target=lambda: results.append(flight.do("q", generate))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ["answer"] * 5
+
+
+def test_threads_share_errors():
+    flight = SingleFlight()
+
+    def generate():
+        raise ValueError("boom")
+
+    try:
+        flight.do("q", generate)
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    # The failed flight is forgotten so the next caller retries
+    assert flight.do("q", lambda: "answer") == "answer"
+
+
+def test_coroutines_share_one_call():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def generate():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    async def run():
+        return await asyncio.gather(*(flight.do("q", generate) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["answer"] * 5
+    assert len(calls) == 1
+
+
+def test_cancelled_leader_does_not_fail_followers():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def generate():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    async def run():
+        leader = asyncio.ensure_future(flight.do("q", generate))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("q", generate))
+        await asyncio.sleep(0.01)
+        # The leader's client goes away mid-generation
+        leader.cancel()
+        return await follower, leader.cancelled()
+
+    assert asyncio.run(run()) == ("answer", True)
+    assert len(calls) == 1
+
+
+def test_coroutines_share_errors():
+    flight = AsyncSingleFlight()
+
+    async def generate():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def run():
+        return await asyncio.gather(*(flight.do("q", generate) for _ in range(3)), return_exceptions=True)
+
+    errors = asyncio.run(run())
+    assert [type(e) for e in errors] == [ValueError] * 3
+
+
+if __name__ == "__main__":
+    test_threads_share_one_call()
+    test_threads_share_errors()
+    test_coroutines_share_one_call()
+    test_cancelled_leader_does_not_fail_followers()
+    test_coroutines_share_errors()
+    print("✅ All single-flight tests passed!")
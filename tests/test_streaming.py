@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Tests that a streamed answer ends with the same payload as the non-streaming one
+"""
+import os
+import sys
+import json
+import asyncio
+from contextlib import nullcontext
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+# bots.base_bot needs the embedding stack and a database URL at import time
+pytest.importorskip("langchain_huggingface")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from bots import base_bot
+from bots.base_bot import BaseBot, QueryRequest
+
+TOKENS = ["We open ", "at nine", "."]
+
+
+class FixedAnswerBot(BaseBot):
+    """Answers every question with TOKENS instead of calling the retrieval chain."""
+
+    def get_answer(self, question, bot_id=None):
+        return "".join(TOKENS)
+
+    async def astream_answer(self, question, bot_id=None):
+        for token in TOKENS:
+            yield token
+
+
+def read_events(response):
+    async def collect():
+        return [chunk async for chunk in response.body_iterator]
+
+    events = []
+    for chunk in asyncio.run(collect()):
+        text = chunk.decode("utf-8") if isinstance(chunk, bytes) else chunk
+        for block in text.strip().split("\n\n"):
+            lines = dict(line.split(": ", 1) for line in block.splitlines())
+            events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+@pytest.mark.parametrize("question", ["When do you open?", "I need help with my account"])
+def test_stream_ends_with_the_non_streaming_payload(monkeypatch, question):
+    monkeypatch.setattr(base_bot, "save_conversation", lambda **kwargs: None)
+    monkeypatch.setattr(base_bot, "session_local", lambda: nullcontext(None))
+    bot = FixedAnswerBot(system_prompt="{context} {input}", bot_type="Test Bot")
+    user = SimpleNamespace(id=1)
+    request = QueryRequest(question=question)
+
+    expected = bot.ask_question(request, 1, user, None)
+    events = read_events(bot.stream_question(request, 1, user, None))
+
+    assert [name for name, _ in events] == ["token"] * len(TOKENS) + ["done"]
+    assert "".join(data["token"] for name, data in events if name == "token") == "".join(TOKENS)
+    assert events[-1][1] == {key: value for key, value in expected.items() if key != "answer"}
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))